@@ -0,0 +1,194 @@
+"""
+Analysis Cache - Content-addressed cache for LLM analysis results
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def normalize_text(text: Optional[str]) -> str:
+    """Collapse whitespace so cosmetic differences don't change the cache key"""
+    if not text:
+        return ""
+    return " ".join(text.split())
+
+def hash_text(text: Optional[str]) -> str:
+    """sha256 of normalized text, used to spot text-identical resumes"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+def make_cache_key(method: str, model: str, prompt_version: str, resume_text: str, job_text: Optional[str] = None) -> str:
+    """Hash (method, model, prompt version, resume text, job text) into a cache key"""
+    digest = hashlib.sha256()
+    for part in (method, model, prompt_version, normalize_text(resume_text), normalize_text(job_text)):
+        digest.update(part.encode('utf-8'))
+        # Separator keeps ("ab", "c") and ("a", "bc") from colliding
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+class MemoryCacheBackend:
+    """In-process LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class SQLiteCacheBackend:
+    """Persistent cache tier stored in a local SQLite file
+
+    Each set also deletes up to prune_batch expired rows, so entries that are
+    never read again do not grow the file without limit.
+    """
+
+    def __init__(self, path: str, ttl: float = 7 * 86400, prune_batch: int = 100):
+        self.path = path
+        self.ttl = ttl
+        self.prune_batch = prune_batch
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                "cache_key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_analysis_cache_expires_at ON analysis_cache (expires_at)")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per call keeps the backend safe to use
+        # from the job-matching thread pool.
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM analysis_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                conn.execute("DELETE FROM analysis_cache WHERE cache_key = ?", (key,))
+                return None
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (cache_key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + self.ttl)
+            )
+            # A small batch keeps the write lock short; steady writes clear the backlog
+            conn.execute(
+                "DELETE FROM analysis_cache WHERE rowid IN "
+                "(SELECT rowid FROM analysis_cache WHERE expires_at < ? LIMIT ?)",
+                (now, self.prune_batch)
+            )
+
+    def clear(self) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM analysis_cache")
+
+class AnalysisCache:
+    """Tiered cache of analysis results; earlier backends are checked first"""
+
+    def __init__(self, backends: List):
+        self.backends = backends
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'AnalysisCache':
+        """Build the cache tiers from Flask app config"""
+        backends = [MemoryCacheBackend(
+            max_entries=config.get('ANALYSIS_CACHE_SIZE', 1024),
+            ttl=config.get('ANALYSIS_CACHE_TTL', 86400)
+        )]
+        path = config.get('ANALYSIS_CACHE_PATH')
+        if path:
+            try:
+                backends.append(SQLiteCacheBackend(path, ttl=config.get('ANALYSIS_CACHE_PERSIST_TTL', 7 * 86400)))
+            except Exception as e:
+                # Read-only filesystems (e.g. serverless) just run memory-only
+                logger.warning(f"Persistent analysis cache disabled: {str(e)}")
+        return cls(backends)
+
+    def get(self, key: str) -> Optional[Dict]:
+        for index, backend in enumerate(self.backends):
+            try:
+                value = backend.get(key)
+            except Exception as e:
+                logger.error(f"Error reading analysis cache: {str(e)}")
+                continue
+            if value is not None:
+                # Promote to the faster tiers that missed
+                for faster in self.backends[:index]:
+                    faster.set(key, value)
+                with self._lock:
+                    self.hits += 1
+                return json.loads(value)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, result: Dict) -> None:
+        value = json.dumps(result)
+        for backend in self.backends:
+            try:
+                backend.set(key, value)
+            except Exception as e:
+                logger.error(f"Error writing analysis cache: {str(e)}")
+
+    def clear(self) -> None:
+        for backend in self.backends:
+            backend.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total) if total else 0.0,
+                'backends': [type(backend).__name__ for backend in self.backends]
+            }
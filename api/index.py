@@ -5,6 +5,12 @@ import os
 root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, root_dir)
 
+# Cold starts skip schema migration; run `flask --app main db-upgrade` on deploy
+os.environ.setdefault("AUTO_MIGRATE", "False")
+# Instances freeze between requests, so analyses run in-request rather than on worker threads
+os.environ.setdefault("ANALYSIS_WORKERS", "0")
+os.environ.setdefault("ANALYSIS_INLINE", "True")
+
 # Import the Flask app from the root directory
 from app import app
 
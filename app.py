@@ -14,8 +14,9 @@ try:
 except ImportError:
     pass  # dotenv not available in serverless environment
 
-# Set up logging for debugging
-logging.basicConfig(level=logging.DEBUG)
+# Set up logging (LOG_LEVEL=DEBUG for debugging; DEBUG output from the HTTP
+# client libraries is costly in production)
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
 class Base(DeclarativeBase):
     pass
@@ -29,10 +30,75 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure file uploads
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['UPLOAD_FOLDER'] = os.environ.get("UPLOAD_FOLDER", 'uploads')
+# Original files are only kept when PERSIST_UPLOADS is set; text is parsed from memory
+app.config['PERSIST_UPLOADS'] = os.environ.get("PERSIST_UPLOADS", "False").lower() == "true"
+app.config['UPLOAD_RETENTION_DAYS'] = float(os.environ.get("UPLOAD_RETENTION_DAYS", "30"))
 
-# Create uploads directory if it doesn't exist
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+# Raw XP events older than this are summarized into daily rollups (`flask rollup-xp`)
+app.config['XP_EVENT_RETENTION_DAYS'] = int(os.environ.get("XP_EVENT_RETENTION_DAYS", "30"))
+
+# Job listings: page size, and how long clients/CDNs may reuse /api/jobs responses
+app.config['JOBS_PAGE_SIZE'] = int(os.environ.get("JOBS_PAGE_SIZE", "20"))
+app.config['JOBS_PAGE_SIZE_MAX'] = int(os.environ.get("JOBS_PAGE_SIZE_MAX", "100"))
+app.config['JOBS_CACHE_MAX_AGE'] = int(os.environ.get("JOBS_CACHE_MAX_AGE", "60"))
+
+# Configure bulk job ingestion (POST /api/jobs/ingest is disabled unless INGEST_TOKEN is set)
+app.config['INGEST_TOKEN'] = os.environ.get("INGEST_TOKEN")
+app.config['INGEST_BATCH_SIZE'] = int(os.environ.get("INGEST_BATCH_SIZE", "500"))
+
+# Configure HTTP batch scoring (POST /api/batch-score is disabled unless BATCH_SCORE_TOKEN is set)
+app.config['BATCH_SCORE_TOKEN'] = os.environ.get("BATCH_SCORE_TOKEN")
+app.config['BATCH_SCORE_MAX_FILES'] = int(os.environ.get("BATCH_SCORE_MAX_FILES", "200"))
+app.config['BATCH_SCORE_MAX_FILE_SIZE'] = int(os.environ.get("BATCH_SCORE_MAX_FILE_SIZE", str(5 * 1024 * 1024)))
+app.config['BATCH_SCORE_MAX_TOTAL_SIZE'] = int(os.environ.get("BATCH_SCORE_MAX_TOTAL_SIZE", str(200 * 1024 * 1024)))
+app.config['BATCH_SCORE_PARSE_PROCESSES'] = int(os.environ.get("BATCH_SCORE_PARSE_PROCESSES", "2"))
+
+# Configure job matching concurrency
+app.config['MATCH_MAX_WORKERS'] = int(os.environ.get("MATCH_MAX_WORKERS", "8"))
+app.config['MATCH_CALL_TIMEOUT'] = float(os.environ.get("MATCH_CALL_TIMEOUT", "30"))
+app.config['MATCH_TOP_K'] = int(os.environ.get("MATCH_TOP_K", "10"))
+app.config['MATCH_TOP_K_MAX'] = int(os.environ.get("MATCH_TOP_K_MAX", "50"))
+# Jobs scored per prompt (1 = one call per job) and the job-text token budget of each prompt
+app.config['MATCH_BATCH_SIZE'] = int(os.environ.get("MATCH_BATCH_SIZE", "5"))
+app.config['MATCH_BATCH_TOKEN_BUDGET'] = int(os.environ.get("MATCH_BATCH_TOKEN_BUDGET", "6000"))
+
+# Configure the background analysis queue (0 workers = run `flask analysis-worker` separately)
+app.config['ANALYSIS_WORKERS'] = int(os.environ.get("ANALYSIS_WORKERS", "2"))
+app.config['ANALYSIS_POLL_INTERVAL'] = float(os.environ.get("ANALYSIS_POLL_INTERVAL", "2"))
+# Seconds before a 'running' task counts as abandoned and is re-claimed; keep it well above the worst
+# case LLM time, OPENAI_TIMEOUT x (OPENAI_MAX_RETRIES + 1) plus backoff (about 420s with the defaults)
+app.config['ANALYSIS_TASK_TIMEOUT'] = int(os.environ.get("ANALYSIS_TASK_TIMEOUT", "900"))
+# Run queued analyses inside the /analyze request instead (for hosts without long-lived workers)
+app.config['ANALYSIS_INLINE'] = os.environ.get("ANALYSIS_INLINE", "False").lower() == "true"
+# Stream analyses to the results page in-request; off by default, as it holds a web worker per analysis
+app.config['ANALYSIS_STREAM'] = os.environ.get("ANALYSIS_STREAM", "False").lower() == "true"
+# Resume/job features recomputed per idle worker poll after FEATURES_VERSION changes (0 = only via the CLI)
+app.config['FEATURE_REFRESH_BATCH'] = int(os.environ.get("FEATURE_REFRESH_BATCH", "50"))
+
+# Configure the analysis result cache (set ANALYSIS_CACHE_PATH="" to run memory-only)
+app.config['ANALYSIS_CACHE_SIZE'] = int(os.environ.get("ANALYSIS_CACHE_SIZE", "1024"))
+app.config['ANALYSIS_CACHE_TTL'] = float(os.environ.get("ANALYSIS_CACHE_TTL", "86400"))
+app.config['ANALYSIS_CACHE_PERSIST_TTL'] = float(os.environ.get("ANALYSIS_CACHE_PERSIST_TTL", str(7 * 86400)))
+app.config['ANALYSIS_CACHE_PATH'] = os.environ.get(
+    "ANALYSIS_CACHE_PATH", os.path.join(app.instance_path, 'analysis_cache.db')
+)
+
+# Configure the OpenAI client: quotas, retries and the circuit breaker that
+# switches to local scoring when the error rate spikes
+app.config['OPENAI_BASE_URL'] = os.environ.get("OPENAI_BASE_URL") or None  # e.g. a local fake server
+app.config['OPENAI_RPM'] = float(os.environ.get("OPENAI_RPM", "500"))
+app.config['OPENAI_TPM'] = float(os.environ.get("OPENAI_TPM", "30000"))
+app.config['OPENAI_MAX_RETRIES'] = int(os.environ.get("OPENAI_MAX_RETRIES", "4"))
+app.config['OPENAI_TIMEOUT'] = float(os.environ.get("OPENAI_TIMEOUT", "60"))
+app.config['OPENAI_MAX_CONNECTIONS'] = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "20"))
+app.config['OPENAI_BREAKER_ERROR_RATE'] = float(os.environ.get("OPENAI_BREAKER_ERROR_RATE", "0.5"))
+app.config['OPENAI_BREAKER_MIN_CALLS'] = int(os.environ.get("OPENAI_BREAKER_MIN_CALLS", "10"))
+app.config['OPENAI_BREAKER_COOLDOWN'] = float(os.environ.get("OPENAI_BREAKER_COOLDOWN", "30"))
+
+# Token budgets for resume / job text embedded in prompts (0 = normalize only, no truncation)
+app.config['PROMPT_RESUME_TOKEN_BUDGET'] = int(os.environ.get("PROMPT_RESUME_TOKEN_BUDGET", "3000"))
+app.config['PROMPT_JOB_TOKEN_BUDGET'] = int(os.environ.get("PROMPT_JOB_TOKEN_BUDGET", "1500"))
 
 # Configure the database
 db_url = os.environ.get("DATABASE_URL")
@@ -59,15 +125,23 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
 # Initialize the app with the extension
 db.init_app(app)
 
-with app.app_context():
-    try:
-        # Import models to ensure tables are created
-        import models  # noqa: F401
-        db.create_all()
-    except Exception as e:
-        # Log database initialization error but don't crash the app
-        logging.error(f"Database initialization error: {str(e)}")
-        # In production, this might be okay if database exists
+# Bring the schema up to date on startup unless AUTO_MIGRATE is off; serverless
+# deployments turn it off and run `flask --app main db-upgrade` once per deploy
+app.config['AUTO_MIGRATE'] = os.environ.get("AUTO_MIGRATE", "True").lower() == "true"
+
+import models  # noqa: F401, E402
+
+if app.config['AUTO_MIGRATE']:
+    with app.app_context():
+        try:
+            # Creates a fresh database, or applies pending migrations
+            from migrations import upgrade_database
+            upgrade_database()
+        except Exception as e:
+            # Log database initialization error but don't crash the app
+            logging.error(f"Database initialization error: {str(e)}")
+            # In production, this might be okay if database exists
 
 # Import routes after app initialization
 from routes import *  # noqa: F401, E402
+import commands  # noqa: F401, E402
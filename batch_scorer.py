@@ -0,0 +1,334 @@
+"""
+Batch Scorer - Score many resumes against one or more job descriptions
+"""
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from document_parser import DocumentParser
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDS = ['resume', 'job', 'match_score', 'recommendation', 'matching_keywords', 'gap_analysis', 'error']
+
+class ArchiveLimitError(ValueError):
+    """A resume archive is unreadable or exceeds the configured limits"""
+
+def iter_resume_files(source, max_files: int = None, max_file_size: int = None,
+                      max_total_size: int = None) -> Iterator[Tuple[str, bytes]]:
+    """Yield (name, bytes) for every supported resume in a directory or zip archive
+
+    source may be a directory path, a zip path, or a binary stream of a zip.
+    For zips, the limits are checked against the archive's directory before
+    anything is decompressed, and reads stop at max_file_size even if an
+    entry understates its size.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        return _iter_directory(source)
+    # Opened and checked here, not on first iteration, so callers can reject the upload before any work
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile as e:
+        raise ArchiveLimitError(f"Not a zip archive: {str(e)}") from e
+    entries = [info for info in archive.infolist()
+               if not info.is_dir() and DocumentParser.is_supported_format(info.filename)]
+    try:
+        if max_files is not None and len(entries) > max_files:
+            raise ArchiveLimitError(f"Archive has {len(entries)} resumes; the limit is {max_files}")
+        if max_file_size is not None:
+            oversized = next((info for info in entries if info.file_size > max_file_size), None)
+            if oversized is not None:
+                raise ArchiveLimitError(f"{oversized.filename} is larger than {max_file_size} bytes")
+        if max_total_size is not None and sum(info.file_size for info in entries) > max_total_size:
+            raise ArchiveLimitError(f"Archive expands to more than {max_total_size} bytes")
+    except ArchiveLimitError:
+        archive.close()
+        raise
+    return _iter_archive(archive, entries, max_file_size)
+
+def _iter_directory(path: str) -> Iterator[Tuple[str, bytes]]:
+    for root, _dirs, files in os.walk(path):
+        for filename in sorted(files):
+            if DocumentParser.is_supported_format(filename):
+                file_path = os.path.join(root, filename)
+                with open(file_path, 'rb') as file:
+                    yield os.path.relpath(file_path, path), file.read()
+
+def _iter_archive(archive: zipfile.ZipFile, entries: List[zipfile.ZipInfo],
+                  max_file_size: int = None) -> Iterator[Tuple[str, bytes]]:
+    with archive:
+        for info in entries:
+            with archive.open(info) as entry:
+                data = entry.read() if max_file_size is None else entry.read(max_file_size + 1)
+            if max_file_size is not None and len(data) > max_file_size:
+                raise ArchiveLimitError(f"{info.filename} is larger than {max_file_size} bytes")
+            yield info.filename, data
+
+def load_job_descriptions(paths: Iterable[str]) -> List[Dict]:
+    """Load jobs from text files (one job each) or JSON/JSONL files of job objects"""
+    jobs = []
+    for path in paths:
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, encoding='utf-8') as file:
+            if extension == '.jsonl':
+                entries = [json.loads(line) for line in file if line.strip()]
+            elif extension == '.json':
+                loaded = json.load(file)
+                entries = loaded if isinstance(loaded, list) else [loaded]
+            else:
+                entries = [{'title': os.path.splitext(os.path.basename(path))[0], 'description': file.read()}]
+        jobs.extend(normalize_job(entry) for entry in entries)
+    return jobs
+
+def normalize_job(entry) -> Dict:
+    """Coerce a job given as text or a dict into {'name', 'text'}"""
+    if isinstance(entry, str):
+        return {'name': entry.strip().splitlines()[0][:80] if entry.strip() else 'job', 'text': entry}
+    title = entry.get('title', '')
+    text = "\n".join(part for part in (title, entry.get('description', ''), entry.get('requirements', '')) if part)
+    return {'name': entry.get('name') or title or 'job', 'text': text}
+
+def _parse_resume(name: str, data: bytes) -> Tuple[str, Optional[str], Optional[str]]:
+    """Parse one resume; runs inside a worker process. Returns (name, text, error)"""
+    try:
+        text = DocumentParser.parse_document(data, os.path.splitext(name)[1])
+        if not text.strip():
+            return name, None, 'No text could be extracted'
+        return name, text, None
+    except Exception as e:
+        return name, None, str(e)
+
+class BatchScorer:
+    """Parses resumes in a process pool and scores them with bounded concurrency
+
+    Pass a long-lived parse_pool (see shared_parse_pool) to reuse its worker
+    processes across runs; otherwise each run starts and stops its own.
+    """
+
+    def __init__(self, analyzer, max_workers: int = 8, parse_processes: int = None, use_local: bool = False,
+                 parse_pool: ProcessPoolExecutor = None):
+        self.analyzer = analyzer
+        self.max_workers = max(1, max_workers)
+        self.parse_processes = parse_processes or min(4, os.cpu_count() or 1)
+        self.use_local = use_local
+        self.parse_pool = parse_pool
+
+    def _parse_all(self, files: Iterable[Tuple[str, bytes]]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        if self.parse_pool is not None:
+            yield from self._parse_in(self.parse_pool, files)
+            return
+        if self.parse_processes <= 1:
+            for name, data in files:
+                yield _parse_resume(name, data)
+            return
+        try:
+            pool = ProcessPoolExecutor(max_workers=self.parse_processes, mp_context=multiprocessing.get_context('spawn'))
+        except Exception as e:
+            logger.warning(f"Batch parse pool unavailable, parsing serially: {str(e)}")
+            for name, data in files:
+                yield _parse_resume(name, data)
+            return
+        with pool:
+            yield from self._parse_in(pool, files)
+
+    def _parse_in(self, pool: ProcessPoolExecutor,
+                  files: Iterable[Tuple[str, bytes]]) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+        # Bounded submission keeps at most a few batches of raw bytes in memory
+        pending = set()
+        try:
+            for name, data in files:
+                pending.add(pool.submit(_parse_resume, name, data))
+                if len(pending) >= self.parse_processes * 4:
+                    done = next(as_completed(pending))
+                    pending.discard(done)
+                    yield done.result()
+            for future in as_completed(pending):
+                pending.discard(future)
+                yield future.result()
+        finally:
+            # A shared pool outlives this run, so drop work a disconnected client left queued
+            for future in pending:
+                future.cancel()
+
+    def _score_resume(self, name: str, text: str, jobs: List[Dict]) -> List[Dict]:
+        records = []
+        for job in jobs:
+            try:
+                if self.use_local:
+                    result = self.analyzer.local_scorer.match(text, job['text'])
+                else:
+                    result = self.analyzer.calculate_job_match_score(text, job['text'])
+                records.append({
+                    'resume': name,
+                    'job': job['name'],
+                    'match_score': result.get('match_score', 0),
+                    'recommendation': result.get('recommendation', 'Unknown'),
+                    'matching_keywords': result.get('matching_keywords', []),
+                    'gap_analysis': result.get('gap_analysis', []),
+                    'error': None
+                })
+            except Exception as e:
+                logger.error(f"Error scoring {name} against {job['name']}: {str(e)}")
+                records.append(self._error_record(name, job['name'], str(e)))
+        return records
+
+    @staticmethod
+    def _error_record(resume_name: str, job_name: Optional[str], error: str) -> Dict:
+        return {
+            'resume': resume_name,
+            'job': job_name,
+            'match_score': 0,
+            'recommendation': 'Error',
+            'matching_keywords': [],
+            'gap_analysis': [],
+            'error': error
+        }
+
+    def score(self, files: Iterable[Tuple[str, bytes]], jobs: List[Dict], skip: Set[str] = None,
+              progress: Callable[[int], None] = None) -> Iterator[List[Dict]]:
+        """Yield the match records of each resume as soon as it is scored
+
+        Resumes whose names are in skip (already written by an earlier run) are
+        not parsed or scored again.
+        """
+        skip = skip or set()
+        files = ((name, data) for name, data in files if name not in skip)
+        completed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch-score") as executor:
+            pending = set()
+            for name, text, error in self._parse_all(files):
+                if error:
+                    completed += 1
+                    if progress:
+                        progress(completed)
+                    yield [self._error_record(name, None, error)]
+                    continue
+                pending.add(executor.submit(self._score_resume, name, text, jobs))
+                # Cap in-flight resumes so parsed text doesn't pile up in memory
+                while len(pending) >= self.max_workers * 2:
+                    done = next(as_completed(pending))
+                    pending.discard(done)
+                    completed += 1
+                    if progress:
+                        progress(completed)
+                    yield done.result()
+            for future in as_completed(pending):
+                completed += 1
+                if progress:
+                    progress(completed)
+                yield future.result()
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+def shared_parse_pool(processes: int = None) -> ProcessPoolExecutor:
+    """The process-wide parse pool, created on first use; its workers start lazily on first submit"""
+    global _shared_pool
+    with _shared_pool_lock:
+        # A worker that died (e.g. OOM-killed) breaks the pool for good, so replace it
+        if _shared_pool is None or getattr(_shared_pool, '_broken', False):
+            # Spawned like DocumentParser's pool: web processes run threads, which fork does not copy safely
+            _shared_pool = ProcessPoolExecutor(max_workers=processes or min(4, os.cpu_count() or 1),
+                                               mp_context=multiprocessing.get_context('spawn'))
+        return _shared_pool
+
+def _complete_csv_resumes(output_path: str, job_count: int = None) -> Set[str]:
+    """Resumes with all their rows in a CSV output; the rows of one cut off by a crash are removed
+
+    Each resume's rows are written and flushed together, so only the last
+    resume in the file can be partial: it is kept when it has a row per job
+    (or the single row of a parse error) and its last row is not torn.
+    """
+    with open(output_path, newline='', encoding='utf-8') as file:
+        content = file.read()
+    consumed = 0
+
+    def tracked_lines():
+        nonlocal consumed
+        for line in io.StringIO(content, newline=''):
+            consumed += len(line)
+            yield line
+
+    reader = csv.reader(tracked_lines())
+    header = next(reader, None)
+    # Offset up to which the file holds the header and complete resumes only
+    keep = consumed if header == CSV_FIELDS else 0
+    done = set()
+    last_rows = []
+    for row in reader:
+        if last_rows and row[:1] != last_rows[0][:1]:
+            # A new resume starts, so the one before it was written in full
+            done.add(last_rows[0][0])
+            keep = group_end
+            last_rows = []
+        last_rows.append(row)
+        group_end = consumed
+    if last_rows and keep:
+        whole = content.endswith("\n") and all(len(row) == len(CSV_FIELDS) for row in last_rows)
+        parse_error = len(last_rows) == 1 and whole and last_rows[0][1] == ''
+        if whole and (job_count is None or len(last_rows) == job_count or parse_error):
+            done.add(last_rows[0][0])
+            keep = group_end
+    if keep < len(content):
+        logger.warning(f"Dropping partly written rows at the end of {output_path}")
+        with open(output_path, 'w', newline='', encoding='utf-8') as file:
+            file.write(content[:keep])
+    return done
+
+def completed_resumes(output_path: str, output_format: str, job_count: int = None) -> Set[str]:
+    """Names of resumes already present in an output file, for resuming after a crash
+
+    job_count is the number of jobs each resume is scored against; a CSV
+    resume with fewer rows was cut off, so its rows are dropped and it is
+    scored again.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    if output_format == 'csv':
+        return _complete_csv_resumes(output_path, job_count)
+    done = set()
+    with open(output_path, newline='', encoding='utf-8') as file:
+        for line in file:
+            try:
+                done.add(json.loads(line)['resume'])
+            except (ValueError, KeyError):
+                # A torn final line from a crash is rewritten on resume
+                continue
+    return done
+
+def write_results(records: Iterator[List[Dict]], output_path: str, output_format: str = 'jsonl') -> int:
+    """Append each resume's records to output_path, flushing per resume; returns resumes written"""
+    new_file = not os.path.exists(output_path) or os.path.getsize(output_path) == 0
+    torn_line = False
+    if not new_file:
+        with open(output_path, 'rb') as existing:
+            existing.seek(-1, os.SEEK_END)
+            torn_line = existing.read(1) != b"\n"
+    written = 0
+    with open(output_path, 'a', newline='', encoding='utf-8') as file:
+        if torn_line:
+            file.write("\n")
+        writer = None
+        if output_format == 'csv':
+            writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+            if new_file:
+                writer.writeheader()
+        for resume_records in records:
+            if output_format == 'csv':
+                for record in resume_records:
+                    row = dict(record)
+                    row['matching_keywords'] = '; '.join(record['matching_keywords'])
+                    row['gap_analysis'] = '; '.join(record['gap_analysis'])
+                    writer.writerow(row)
+            else:
+                file.write(json.dumps({'resume': resume_records[0]['resume'], 'matches': resume_records}) + "\n")
+            file.flush()
+            written += 1
+    return written
@@ -0,0 +1,149 @@
+"""
+A local fake of the OpenAI chat completions endpoint for exercising retries,
+rate limiting and the circuit breaker without spending quota.
+
+Usage: python benchmarks/fake_openai.py [--port 8089] [--latency 0.2] [--error-rate 0.1] [--rate-limit-rate 0.1]
+Then run the app with OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANALYSIS = {
+    "overall_score": 78,
+    "summary": "Solid technical resume with clear experience; quantify more achievements.",
+    "skills_match_score": 74, "experience_match_score": 80, "education_match_score": 70,
+    "content_quality_score": 76, "structure_score": 82, "completeness_score": 75,
+    "strengths": ["Relevant technical stack", "Clear work history"],
+    "weaknesses": ["Few quantified results"],
+    "missing_skills": ["Kubernetes"], "missing_sections": [],
+    "recommendations": ["Add metrics to each role", "List certifications"],
+    "keywords_found": ["python", "aws"], "keywords_missing": ["kubernetes"],
+    "ats_compatibility": 81
+}
+SKILLS = {
+    "technical_skills": ["Python", "SQL", "AWS"], "soft_skills": ["Communication"],
+    "certifications": [], "tools_and_technologies": ["Docker", "Git"]
+}
+
+def match_result(prompt):
+    # Deterministic but job-dependent scores, so rankings are stable
+    score = 40 + sum(map(ord, prompt)) % 55
+    return {
+        "match_score": score, "skill_overlap": score, "experience_relevance": score - 5,
+        "education_fit": 70, "cultural_fit_indicators": 65,
+        "matching_keywords": ["python"], "gap_analysis": ["kubernetes"],
+        "recommendation": "Good Match" if score >= 70 else "Potential Match"
+    }
+
+def review_result(prompt):
+    # Combined review: one object per requested top-level section
+    sections = {"analysis": ANALYSIS, "skills": SKILLS, "match": match_result(prompt)}
+    return {name: result for name, result in sections.items() if f'"{name}": {{' in prompt}
+
+def batch_match_result(prompt):
+    # Batched match: one entry per "JOB n:" block, scored as if sent alone
+    jobs = re.split(r"\n\nJOB \d+:\n", prompt.split("\n\nPlease provide")[0])[1:]
+    return {"matches": [dict(match_result(job), job=number) for number, job in enumerate(jobs, 1)]}
+
+def respond_to(prompt):
+    if '"matches": [' in prompt:
+        return batch_match_result(prompt)
+    if re.search(r'"(analysis|skills|match)": \{', prompt):
+        return review_result(prompt)
+    if '"match_score"' in prompt:
+        return match_result(prompt)
+    if '"technical_skills"' in prompt and '"overall_score"' not in prompt:
+        return SKILLS
+    return ANALYSIS
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    options = None
+    counters = {'requests': 0, 'errors': 0, 'rate_limited': 0}
+    lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not re.search(r"/chat/completions$", self.path):
+            return self._send_json(404, {"error": {"message": "not found"}})
+        with self.lock:
+            self.counters['requests'] += 1
+        time.sleep(self.options.latency)
+
+        roll = random.random()
+        if roll < self.options.rate_limit_rate:
+            with self.lock:
+                self.counters['rate_limited'] += 1
+            return self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                                   {"Retry-After": str(self.options.retry_after)})
+        if roll < self.options.rate_limit_rate + self.options.error_rate:
+            with self.lock:
+                self.counters['errors'] += 1
+            return self._send_json(500, {"error": {"message": "The server had an error", "type": "server_error"}})
+
+        prompt = "\n".join(message.get("content", "") for message in body.get("messages", []))
+        content = json.dumps(respond_to(prompt))
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                 "total_tokens": (len(prompt) + len(content)) // 4}
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        if body.get("stream"):
+            return self._stream(completion_id, body.get("model"), content)
+        self._send_json(200, {
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model"), "usage": usage,
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}]
+        })
+
+    def _stream(self, completion_id, model, content):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for start in range(0, len(content), 24):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": {"content": content[start:start + 24]},
+                                                  "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.options.latency / 20)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def do_GET(self):
+        # GET /stats reports what the server has seen
+        self._send_json(200, dict(self.counters))
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI chat completions server")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    FakeOpenAIHandler.options = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", FakeOpenAIHandler.options.port), FakeOpenAIHandler)
+    print(f"Fake OpenAI listening on http://127.0.0.1:{FakeOpenAIHandler.options.port}/v1")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark PDF text extraction throughput on synthetic multi-page PDFs.
+
+Usage: python benchmarks/pdf_extraction.py [page counts...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_parser import DocumentParser  # noqa: E402
+
+LINES_PER_PAGE = 45
+
+def build_pdf(page_count: int) -> bytes:
+    """Build a minimal text-only PDF with page_count pages"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in once page object ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    page_ids = []
+    for page in range(page_count):
+        lines = [
+            f"({'Page %d line %d: Senior Python engineer, AWS, Docker, led a team of 5' % (page + 1, line)}) Tj T*"
+            for line in range(LINES_PER_PAGE)
+        ]
+        stream = ("BT /F1 10 Tf 14 TL 40 800 Td " + " ".join(lines) + " ET").encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % page_count
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(output)
+
+def run(page_counts):
+    print(f"{'pages':>6} {'mode':>9} {'seconds':>9} {'pages/s':>9} {'chars':>9}")
+    for page_count in page_counts:
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as handle:
+            handle.write(build_pdf(page_count))
+            path = handle.name
+        try:
+            for mode, threshold in (('serial', 10 ** 9), ('parallel', 1)):
+                DocumentParser.PARALLEL_PAGE_THRESHOLD = threshold
+                if mode == 'parallel':
+                    # Warm the pool so worker start-up is not counted
+                    DocumentParser.extract_text_from_pdf(path, max_pages=0, max_chars=0, timeout=0)
+                start = time.perf_counter()
+                text = DocumentParser.extract_text_from_pdf(path, max_pages=0, max_chars=0, timeout=0)
+                elapsed = time.perf_counter() - start
+                print(f"{page_count:>6} {mode:>9} {elapsed:>9.3f} {page_count / elapsed:>9.1f} {len(text):>9}")
+        finally:
+            os.remove(path)
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or [10, 50, 200])
@@ -0,0 +1,123 @@
+"""
+Benchmark the gamification lookups on a seeded SQLite database, with and without
+the lookup indexes from migration 3, and print each query plan.
+
+Usage: python benchmarks/query_plans.py [--achievements 1000000] [--users 10000] [--runs 200]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(prefix="query-plans-"), "bench.db")
+os.environ.setdefault("SESSION_SECRET", "benchmark")
+os.environ["ANALYSIS_WORKERS"] = "0"
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402  (creates the schema through the migrations)
+from gamification import DEFAULT_BADGES  # noqa: E402
+
+INDEXES = [
+    "ix_user_badge_user_id_badge_id",
+    "ix_achievement_user_id_created_date",
+    "ix_resume_user_id",
+    "ix_analysis_resume_id",
+]
+
+QUERIES = {
+    "badge already awarded": (
+        "SELECT id FROM user_badge WHERE user_id = :user AND badge_id = :badge LIMIT 1"
+    ),
+    "recent XP history": (
+        "SELECT id, xp_earned, created_date FROM achievement WHERE user_id = :user "
+        "ORDER BY created_date DESC LIMIT 20"
+    ),
+    "achievement count": "SELECT count(*) FROM achievement WHERE user_id = :user",
+    "user's resumes": "SELECT id, filename FROM resume WHERE user_id = :user",
+    "resume's analyses": "SELECT id, overall_score FROM analysis WHERE resume_id = :resume",
+}
+
+def seed(conn, users, achievements):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    conn.executemany(
+        "INSERT INTO user (id, session_id, total_xp, career_level) VALUES (?, ?, 0, 1)",
+        ((user, f"session-{user}") for user in range(1, users + 1))
+    )
+    conn.executemany(
+        "INSERT INTO badge (id, name, description, icon, category, rarity, xp_value) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((index + 1, badge['name'], badge['description'], badge['icon'], badge['category'],
+          badge['rarity'], badge['xp_value']) for index, badge in enumerate(DEFAULT_BADGES))
+    )
+    conn.executemany(
+        "INSERT INTO user_badge (user_id, badge_id, earned_date) VALUES (?, ?, ?)",
+        ((user, badge, now) for user in range(1, users + 1)
+         for badge in rng.sample(range(1, len(DEFAULT_BADGES) + 1), 4))
+    )
+    conn.executemany(
+        "INSERT INTO resume (id, user_id, filename, original_filename, content) VALUES (?, ?, ?, ?, '')",
+        ((resume, (resume + 1) // 2, f"resume-{resume}.pdf", "resume.pdf") for resume in range(1, users * 2 + 1))
+    )
+    conn.executemany(
+        "INSERT INTO analysis (resume_id, overall_score) VALUES (?, ?)",
+        ((resume, rng.uniform(40, 95)) for resume in range(1, users * 2 + 1) for _ in range(3))
+    )
+    conn.executemany(
+        "INSERT INTO achievement (user_id, achievement_type, xp_earned, created_date) VALUES (?, 'xp_gained', ?, ?)",
+        ((rng.randint(1, users), rng.choice((10, 25, 50)), now - timedelta(minutes=rng.randint(0, 525600)))
+         for _ in range(achievements))
+    )
+    conn.commit()
+
+def measure(conn, users, runs):
+    rng = random.Random(7)
+    results = {}
+    for label, sql in QUERIES.items():
+        params = [{'user': rng.randint(1, users), 'badge': rng.randint(1, len(DEFAULT_BADGES)),
+                   'resume': rng.randint(1, users * 2)} for _ in range(runs)]
+        plan = " | ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params[0]))
+        start = time.perf_counter()
+        for values in params:
+            conn.execute(sql, values).fetchall()
+        results[label] = ((time.perf_counter() - start) / runs * 1000, plan)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--achievements", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    start = time.perf_counter()
+    seed(conn, args.users, args.achievements)
+    conn.execute("ANALYZE")
+    print(f"Seeded {args.achievements} achievements for {args.users} users in {time.perf_counter() - start:.1f}s ({DB_PATH})")
+
+    indexed = measure(conn, args.users, args.runs)
+    for name in INDEXES:
+        conn.execute(f"DROP INDEX {name}")
+    conn.close()
+    # A fresh connection so no statement prepared against the indexes is reused
+    conn = sqlite3.connect(DB_PATH)
+    unindexed = measure(conn, args.users, args.runs)
+
+    print(f"\n{'query':<24}{'no index ms':>14}{'indexed ms':>14}{'speedup':>10}")
+    for label in QUERIES:
+        slow, fast = unindexed[label][0], indexed[label][0]
+        print(f"{label:<24}{slow:>14.3f}{fast:>14.3f}{slow / max(fast, 1e-9):>9.0f}x")
+    print("\nQuery plans (indexed):")
+    for label in QUERIES:
+        print(f"  {label}: {indexed[label][1]}")
+    print("Query plans (no index):")
+    for label in QUERIES:
+        print(f"  {label}: {unindexed[label][1]}")
+
+if __name__ == "__main__":
+    main()
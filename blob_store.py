@@ -0,0 +1,85 @@
+"""
+Blob Store - Optional storage for original uploaded files with a retention policy
+"""
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+class LocalBlobStore:
+    """Stores blobs as files under a root directory and deletes ones past their retention"""
+
+    def __init__(self, root: str, retention_days: float = 30, gc_interval: float = 3600):
+        self.root = root
+        self.retention_seconds = retention_days * 86400
+        self.gc_interval = gc_interval
+        self._last_gc = 0.0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # Keys are generated server-side, but never let one escape the root
+        return os.path.join(self.root, os.path.basename(key))
+
+    def put(self, key: str, data) -> None:
+        with open(self._path(key), 'wb') as file:
+            file.write(data)
+        self._maybe_gc()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def gc(self) -> int:
+        """Delete blobs older than the retention period; returns the number removed"""
+        if self.retention_seconds <= 0:
+            return 0
+        cutoff = time.time() - self.retention_seconds
+        removed = 0
+        for entry in os.scandir(self.root):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info(f"Removed {removed} expired uploads from {self.root}")
+        return removed
+
+    def _maybe_gc(self) -> None:
+        # Opportunistic collection, at most once per gc_interval per process
+        with self._lock:
+            if time.time() - self._last_gc < self.gc_interval:
+                return
+            self._last_gc = time.time()
+        try:
+            self.gc()
+        except Exception as e:
+            logger.error(f"Error collecting expired uploads: {str(e)}")
+
+def create_blob_store(config) -> Optional[LocalBlobStore]:
+    """Build the upload blob store from Flask app config, or None when persistence is off"""
+    if not config.get('PERSIST_UPLOADS'):
+        return None
+    try:
+        return LocalBlobStore(
+            config['UPLOAD_FOLDER'],
+            retention_days=config.get('UPLOAD_RETENTION_DAYS', 30)
+        )
+    except OSError as e:
+        # Read-only filesystems (e.g. serverless) can't keep originals
+        logger.warning(f"Upload persistence disabled: {str(e)}")
+        return None
@@ -0,0 +1,120 @@
+"""
+CLI commands - run with `flask --app main <command>`
+"""
+import click
+
+from batch_scorer import BatchScorer, completed_resumes, iter_resume_files, load_job_descriptions, write_results
+
+from app import app, db
+from migrations import current_version, upgrade_database
+from routes import analysis_queue, analyzer, blob_store, gamification
+from job_features import upsert_job_features
+from local_scorer import FEATURES_VERSION
+from job_ingest import infer_format, ingest_jobs, iter_job_records
+from resume_features import upsert_resume_features
+from seeding import seed_database
+
+@app.cli.command('analysis-worker')
+def analysis_worker():
+    """Process queued resume analyses until interrupted"""
+    click.echo("Analysis worker started, waiting for tasks...")
+    try:
+        analysis_queue.work()
+    except KeyboardInterrupt:
+        click.echo("Analysis worker stopped")
+
+@app.cli.command('db-upgrade')
+def db_upgrade():
+    """Apply pending schema migrations"""
+    applied = upgrade_database()
+    click.echo(f"Applied migrations: {', '.join(map(str, applied))}" if applied
+               else f"Database is up to date (version {current_version(db.engine)})")
+
+@app.cli.command('seed')
+def seed():
+    """Seed the badge catalog and, into an empty job table, the sample jobs (idempotent)"""
+    counts = seed_database(gamification)
+    click.echo(f"Badges: {counts['badges_inserted']} inserted, {counts['badges_updated']} updated; "
+               f"sample jobs inserted: {counts['jobs_inserted']}")
+
+@app.cli.command('ingest-jobs')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'feed_format', type=click.Choice(['jsonl', 'csv']),
+              help='Feed format; inferred from the file extension by default.')
+@click.option('--batch-size', default=app.config['INGEST_BATCH_SIZE'], show_default=True,
+              help='Records upserted per transaction.')
+def ingest_jobs_command(path, feed_format, batch_size):
+    """Upsert jobs from a JSONL or CSV feed, keyed by external_id"""
+    feed_format = feed_format or infer_format(path)
+    if feed_format is None:
+        raise click.UsageError("Cannot infer the feed format from the file name; pass --format")
+    with open(path, 'rb') as stream:
+        counts = ingest_jobs(iter_job_records(stream, feed_format), batch_size=batch_size)
+    for error in counts['errors']:
+        click.echo(f"Line {error['line']}: {error['error']}", err=True)
+    click.echo(f"Jobs: {counts['inserted']} inserted, {counts['updated']} updated, {counts['skipped']} skipped")
+
+@app.cli.command('recompute-job-features')
+def recompute_job_features():
+    """Rebuild job match features that are missing or older than the current extractor version"""
+    recomputed = upsert_job_features(stale_only=True)
+    db.session.commit()
+    click.echo(f"Recomputed features for {recomputed} jobs (version {FEATURES_VERSION})")
+
+@app.cli.command('recompute-resume-features')
+def recompute_resume_features():
+    """Store resume scoring features that are missing or older than the current extractor version"""
+    recomputed = upsert_resume_features(stale_only=True)
+    db.session.commit()
+    click.echo(f"Recomputed features for {recomputed} resumes (version {FEATURES_VERSION})")
+
+@app.cli.command('seed-badges')
+def seed_badges():
+    """Insert or update the default badge catalog in one bulk upsert"""
+    inserted, updated = gamification.initialize_default_badges()
+    click.echo(f"Badges seeded: {inserted} inserted, {updated} updated")
+
+@app.cli.command('repair-user-stats')
+def repair_user_stats():
+    """Recompute every user's dashboard counters from resumes, analyses and badges"""
+    updated = gamification.recompute_user_stats()
+    click.echo(f"Recomputed stats for {updated} users")
+
+@app.cli.command('rollup-xp')
+@click.option('--retention-days', type=int, default=app.config['XP_EVENT_RETENTION_DAYS'], show_default=True,
+              help='Raw XP events older than this many days are rolled up and deleted.')
+def rollup_xp(retention_days):
+    """Summarize old XP events into per-user daily rollups"""
+    rollups, removed = gamification.rollup_xp_events(retention_days)
+    click.echo(f"Rolled {removed} XP events into {rollups} daily rollups")
+
+@app.cli.command('gc-uploads')
+def gc_uploads():
+    """Delete stored upload originals older than UPLOAD_RETENTION_DAYS"""
+    if blob_store is None:
+        click.echo("Upload persistence is disabled (PERSIST_UPLOADS is not set)")
+        return
+    removed = blob_store.gc()
+    click.echo(f"Removed {removed} expired uploads")
+
+@app.cli.command('batch-score')
+@click.argument('source')
+@click.option('--job', 'job_paths', multiple=True, required=True,
+              help='Job description file (text, or JSON/JSONL of job objects). Repeatable.')
+@click.option('--output', required=True, help='Output file; an existing file is resumed, not overwritten.')
+@click.option('--format', 'output_format', type=click.Choice(['jsonl', 'csv']), default='jsonl')
+@click.option('--workers', default=app.config['MATCH_MAX_WORKERS'], show_default=True,
+              help='Max resumes scored concurrently.')
+@click.option('--local', 'use_local', is_flag=True, help='Use the offline local scorer instead of the LLM.')
+def batch_score(source, job_paths, output, output_format, workers, use_local):
+    """Score every resume in SOURCE (directory or zip) against the given jobs"""
+    jobs = load_job_descriptions(job_paths)
+    done = completed_resumes(output, output_format, len(jobs))
+    if done:
+        click.echo(f"Resuming: {len(done)} resumes already in {output}")
+
+    scorer = BatchScorer(analyzer, max_workers=workers, use_local=use_local)
+    progress = lambda count: click.echo(f"\rScored {count} resumes", nl=False)
+    written = write_results(scorer.score(iter_resume_files(source), jobs, skip=done, progress=progress),
+                            output, output_format)
+    click.echo(f"\nWrote {written} resumes to {output}")
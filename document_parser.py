@@ -1,50 +1,235 @@
+import io
+import multiprocessing
 import os
+import threading
+import time
 import logging
-from typing import Optional
-import PyPDF2
-from docx import Document
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import BinaryIO, Iterator, List, Optional, Union
+
+# PyPDF2 and python-docx are imported on first use: they are only needed for
+# uploads, and importing them up front slows every cold start
 
 logger = logging.getLogger(__name__)
 
+class DocumentLimitError(Exception):
+    """Raised when a document exceeds the configured extraction budget"""
+
+# Separates PDF pages in extracted text, so per-page headers and footers can be
+# told apart from body lines (see text_compaction.strip_boilerplate)
+PAGE_BREAK = "\f"
+
+# A document source is a filesystem path, raw bytes, or a seekable binary stream
+DocumentSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+@contextmanager
+def _open_source(source: DocumentSource) -> Iterator[BinaryIO]:
+    """Yield a binary stream for source without copying in-memory data
+
+    Files opened here are closed afterwards; caller-owned streams are left open.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            yield file
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        # BytesIO over a memoryview shares the caller's buffer until written to
+        yield io.BytesIO(memoryview(source))
+    else:
+        source.seek(0)
+        yield source
+
+def _describe_source(source: DocumentSource) -> str:
+    return source if isinstance(source, str) else f"<{type(source).__name__}>"
+
+def _extract_page_range(source: Union[str, bytes], start: int, end: int) -> List[str]:
+    """Extract pages [start, end) of a PDF; runs inside a worker process"""
+    import PyPDF2
+    with _open_source(source) as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[index].extract_text() or "" for index in range(start, end)]
+
 class DocumentParser:
     """Parser for extracting text from PDF and DOCX files"""
     
+    # Extraction budgets (overridable via environment)
+    MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "50"))
+    MAX_CHARS = int(os.environ.get("DOCUMENT_MAX_CHARS", "200000"))
+    TIMEOUT = float(os.environ.get("PDF_EXTRACT_TIMEOUT", "20"))
+    
+    # PDFs with at least this many pages are split across a process pool
+    PARALLEL_PAGE_THRESHOLD = int(os.environ.get("PDF_PARALLEL_PAGES", "16"))
+    # 0 extracts in-process, where TIMEOUT is only checked between pages
+    PROCESS_WORKERS = int(os.environ.get("PDF_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+    
+    _process_pool = None
+    _pool_lock = threading.Lock()
+    
+    @classmethod
+    def _get_process_pool(cls) -> Optional[ProcessPoolExecutor]:
+        with cls._pool_lock:
+            # A pool whose worker died or was terminated is replaced, not reused
+            if cls._process_pool is not None and getattr(cls._process_pool, '_broken', False):
+                cls._process_pool = None
+            # Code already running in a worker process (e.g. batch parsing) extracts in place
+            # rather than starting a pool of its own
+            if (cls._process_pool is None and cls.PROCESS_WORKERS > 0
+                    and multiprocessing.parent_process() is None):
+                try:
+                    # Spawned, not forked: forking a process that runs request and worker
+                    # threads can copy locks held by other threads into the child
+                    cls._process_pool = ProcessPoolExecutor(max_workers=cls.PROCESS_WORKERS,
+                                                            mp_context=multiprocessing.get_context('spawn'))
+                except Exception as e:
+                    # Some serverless runtimes lack the primitives multiprocessing needs
+                    logger.warning(f"PDF process pool unavailable, extracting serially: {str(e)}")
+                    cls.PROCESS_WORKERS = 0
+            return cls._process_pool
+    
+    @classmethod
+    def _terminate_process_pool(cls, pool: ProcessPoolExecutor) -> None:
+        """Kill a pool's workers, e.g. ones stuck on a pathological page; the next PDF gets a fresh pool"""
+        with cls._pool_lock:
+            if cls._process_pool is pool:
+                cls._process_pool = None
+        # ProcessPoolExecutor has no public way to stop running tasks before Python 3.14
+        for process in list((getattr(pool, '_processes', None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+    
     @staticmethod
-    def extract_text_from_pdf(file_path: str) -> str:
-        """Extract text from PDF file"""
+    def iter_pdf_pages(pdf_reader, max_pages: int = None, deadline: float = None) -> Iterator[str]:
+        """Yield page texts lazily, enforcing page count and time budgets
+
+        The deadline is checked between pages, so a single page that never
+        finishes is not interrupted; extract_text_from_pdf uses the process
+        pool instead whenever one is available.
+        """
+        page_count = len(pdf_reader.pages)
+        if max_pages and page_count > max_pages:
+            raise DocumentLimitError(f"PDF has {page_count} pages; the limit is {max_pages}")
+        for index in range(page_count):
+            if deadline and time.monotonic() > deadline:
+                raise DocumentLimitError(f"PDF text extraction timed out after {index} of {page_count} pages")
+            yield pdf_reader.pages[index].extract_text() or ""
+    
+    @classmethod
+    def _extract_pages_in_pool(cls, source: DocumentSource, page_count: int, deadline: float,
+                               chunk_count: int) -> List[str]:
+        """Extract pages in chunk_count pool tasks, killing the workers if the deadline passes"""
+        pool = cls._get_process_pool()
+        if pool is None:
+            raise BrokenProcessPool("PDF process pool unavailable")
+        if not isinstance(source, (str, bytes)):
+            # Worker processes need a picklable source
+            if isinstance(source, (bytearray, memoryview)):
+                source = bytes(source)
+            else:
+                source.seek(0)
+                source = source.read()
+        chunk_size = max(1, -(-page_count // chunk_count))
+        try:
+            futures = [
+                pool.submit(_extract_page_range, source, start, min(start + chunk_size, page_count))
+                for start in range(0, page_count, chunk_size)
+            ]
+        except RuntimeError as e:
+            # Shut down by another request's timeout since _get_process_pool returned it
+            raise BrokenProcessPool(str(e)) from e
+        pages = []
         try:
-            text = ""
-            with open(file_path, 'rb') as file:
+            for future in futures:
+                pages.extend(future.result(timeout=max(0, deadline - time.monotonic())))
+        except FutureTimeoutError:
+            # cancel() cannot stop a chunk that is already running, so stop its process
+            cls._terminate_process_pool(pool)
+            raise DocumentLimitError(f"PDF text extraction of {page_count} pages timed out")
+        return pages
+    
+    @staticmethod
+    def _join_within_budget(pages, max_chars: int = None, separator: str = "\n") -> str:
+        """Join page texts once, failing as soon as the character budget is exceeded"""
+        parts = []
+        total = 0
+        for page_text in pages:
+            total += len(page_text) + len(separator)
+            if max_chars and total > max_chars:
+                raise DocumentLimitError(f"Document text exceeds the {max_chars} character limit")
+            parts.append(page_text)
+        return separator.join(parts).strip()
+    
+    @staticmethod
+    def extract_text_from_pdf(source: DocumentSource, max_pages: int = None, max_chars: int = None, timeout: float = None) -> str:
+        """Extract text from a PDF path, bytes or binary stream"""
+        max_pages = DocumentParser.MAX_PAGES if max_pages is None else max_pages
+        max_chars = DocumentParser.MAX_CHARS if max_chars is None else max_chars
+        timeout = DocumentParser.TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            import PyPDF2
+            with _open_source(source) as file:
                 pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text.strip()
+                page_count = len(pdf_reader.pages)
+                parallel = page_count >= DocumentParser.PARALLEL_PAGE_THRESHOLD
+                
+                # Short PDFs under a timeout also go to the pool, as a single task: only a
+                # worker process can be stopped while it is stuck inside one page
+                if ((parallel or deadline)
+                        and (not max_pages or page_count <= max_pages)
+                        and DocumentParser._get_process_pool() is not None):
+                    chunk_count = DocumentParser.PROCESS_WORKERS if parallel else 1
+                    try:
+                        pages = DocumentParser._extract_pages_in_pool(
+                            source, page_count, deadline or time.monotonic() + 3600, chunk_count
+                        )
+                    except BrokenProcessPool:
+                        # Terminated for another request's timeout; retry once on a fresh pool.
+                        # A worker that crashed on this PDF fails it again rather than taking
+                        # down this process in a serial retry
+                        pages = DocumentParser._extract_pages_in_pool(
+                            source, page_count, deadline or time.monotonic() + 3600, chunk_count
+                        )
+                else:
+                    pages = DocumentParser.iter_pdf_pages(pdf_reader, max_pages, deadline)
+                # Pages end on a line break, then PAGE_BREAK
+                return DocumentParser._join_within_budget(pages, max_chars, "\n" + PAGE_BREAK)
+        except DocumentLimitError:
+            raise
         except Exception as e:
-            logger.error(f"Error extracting text from PDF {file_path}: {str(e)}")
+            logger.error(f"Error extracting text from PDF {_describe_source(source)}: {str(e)}")
             raise Exception(f"Failed to parse PDF file: {str(e)}")
     
     @staticmethod
-    def extract_text_from_docx(file_path: str) -> str:
-        """Extract text from DOCX file"""
+    def extract_text_from_docx(source: DocumentSource, max_chars: int = None) -> str:
+        """Extract text from a DOCX path, bytes or binary stream"""
+        max_chars = DocumentParser.MAX_CHARS if max_chars is None else max_chars
         try:
-            doc = Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            from docx import Document
+            with _open_source(source) as file:
+                doc = Document(file)
+            return DocumentParser._join_within_budget(
+                (paragraph.text for paragraph in doc.paragraphs), max_chars
+            )
+        except DocumentLimitError:
+            raise
         except Exception as e:
-            logger.error(f"Error extracting text from DOCX {file_path}: {str(e)}")
+            logger.error(f"Error extracting text from DOCX {_describe_source(source)}: {str(e)}")
             raise Exception(f"Failed to parse DOCX file: {str(e)}")
     
     @staticmethod
-    def parse_document(file_path: str, file_extension: str) -> str:
-        """Parse document based on file extension"""
+    def parse_document(source: DocumentSource, file_extension: str) -> str:
+        """Parse document based on file extension
+
+        source may be a file path, raw bytes/memoryview, or a seekable binary
+        stream such as an upload's werkzeug stream.
+        """
         file_extension = file_extension.lower()
         
         if file_extension == '.pdf':
-            return DocumentParser.extract_text_from_pdf(file_path)
+            return DocumentParser.extract_text_from_pdf(source)
         elif file_extension in ['.docx', '.doc']:
-            return DocumentParser.extract_text_from_docx(file_path)
+            return DocumentParser.extract_text_from_docx(source)
         else:
             raise ValueError(f"Unsupported file format: {file_extension}")
     
@@ -1,10 +1,167 @@
 """
 Gamification Service - Handles all game mechanics, progression, badges, and achievements
 """
-from models import User, Badge, UserBadge, Challenge, UserChallenge, Achievement, Analysis
+from models import User, Badge, UserBadge, Challenge, UserChallenge, Achievement, Analysis, Resume, XpDailyRollup
 from app import db
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from contextlib import contextmanager
+from sqlalchemy import and_, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 import json
+import threading
+import time
+
+DEFAULT_BADGES = [
+    {
+        'name': 'welcome_aboard',
+        'description': 'Welcome to your career journey!',
+        'icon': 'fas fa-rocket',
+        'category': 'milestone',
+        'rarity': 'common',
+        'xp_value': 10
+    },
+    {
+        'name': 'first_resume',
+        'description': 'Uploaded your first resume',
+        'icon': 'fas fa-file-alt',
+        'category': 'achievement',
+        'rarity': 'common',
+        'xp_value': 25
+    },
+    {
+        'name': 'first_analysis',
+        'description': 'Completed your first AI analysis',
+        'icon': 'fas fa-brain',
+        'category': 'achievement',
+        'rarity': 'common',
+        'xp_value': 50
+    },
+    {
+        'name': 'skilled_professional',
+        'description': 'Achieved 70+ resume score',
+        'icon': 'fas fa-award',
+        'category': 'skill',
+        'rarity': 'rare',
+        'xp_value': 75
+    },
+    {
+        'name': 'high_achiever',
+        'description': 'Achieved 80+ resume score',
+        'icon': 'fas fa-trophy',
+        'category': 'skill',
+        'rarity': 'epic',
+        'xp_value': 100
+    },
+    {
+        'name': 'perfectionist',
+        'description': 'Achieved 90+ resume score',
+        'icon': 'fas fa-crown',
+        'category': 'skill',
+        'rarity': 'legendary',
+        'xp_value': 150
+    },
+    {
+        'name': 'week_warrior',
+        'description': '7-day login streak',
+        'icon': 'fas fa-fire',
+        'category': 'streak',
+        'rarity': 'rare',
+        'xp_value': 50
+    },
+    {
+        'name': 'month_master',
+        'description': '30-day login streak',
+        'icon': 'fas fa-calendar-check',
+        'category': 'streak',
+        'rarity': 'epic',
+        'xp_value': 200
+    },
+    {
+        'name': 'level_5_rookie',
+        'description': 'Reached Level 5',
+        'icon': 'fas fa-star',
+        'category': 'milestone',
+        'rarity': 'common',
+        'xp_value': 25
+    },
+    {
+        'name': 'level_10_rising_star',
+        'description': 'Reached Level 10',
+        'icon': 'fas fa-star-half-alt',
+        'category': 'milestone',
+        'rarity': 'rare',
+        'xp_value': 50
+    },
+    {
+        'name': 'level_25_professional',
+        'description': 'Reached Level 25',
+        'icon': 'fas fa-user-tie',
+        'category': 'milestone',
+        'rarity': 'epic',
+        'xp_value': 100
+    },
+    {
+        'name': 'resume_collector',
+        'description': 'Uploaded 5 different resumes',
+        'icon': 'fas fa-folder-open',
+        'category': 'achievement',
+        'rarity': 'rare',
+        'xp_value': 75
+    }
+]
+
+def user_stats_update():
+    """UPDATE statement that recomputes every user's dashboard counters from the source tables"""
+    return update(User).values(
+        resume_count=select(func.count(Resume.id)).where(Resume.user_id == User.id).scalar_subquery(),
+        analysis_count=select(func.count(Analysis.id))
+            .join(Resume, Analysis.resume_id == Resume.id)
+            .where(Resume.user_id == User.id).scalar_subquery(),
+        badge_count=select(func.count(UserBadge.id)).where(UserBadge.user_id == User.id).scalar_subquery(),
+        best_score=select(func.coalesce(func.max(Analysis.overall_score), 0))
+            .join(Resume, Analysis.resume_id == Resume.id)
+            .where(Resume.user_id == User.id).scalar_subquery(),
+        last_analysis_date=select(func.max(Analysis.analysis_date))
+            .join(Resume, Analysis.resume_id == Resume.id)
+            .where(Resume.user_id == User.id).scalar_subquery()
+    )
+
+class BadgeCatalog:
+    """Process-level cache of the Badge table (name -> id/xp/rarity)
+    
+    Loaded with a single query and reloaded after ttl seconds or when
+    invalidate() is called (e.g. after seeding), so awarding a badge needs no
+    Badge lookup query.
+    """
+    
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._badges = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        rows = db.session.query(Badge.id, Badge.name, Badge.xp_value, Badge.rarity, Badge.category).all()
+        return {
+            row.name: {'id': row.id, 'name': row.name, 'xp_value': row.xp_value or 0,
+                       'rarity': row.rarity, 'category': row.category}
+            for row in rows
+        }
+    
+    def get(self, name):
+        """Badge info dict for name, or None if no such badge exists"""
+        with self._lock:
+            if self._badges is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._badges = self._load()
+                self._loaded_at = time.monotonic()
+            return self._badges.get(name)
+    
+    def invalidate(self):
+        with self._lock:
+            self._badges = None
+
+badge_catalog = BadgeCatalog()
 
 class GamificationService:
     
@@ -19,22 +176,38 @@ class GamificationService:
     XP_DAILY_LOGIN = 10
     XP_STREAK_BONUS = 5
     
-    def __init__(self):
-        self._badges_initialized = False
+    @contextmanager
+    def unit_of_work(self):
+        """Group all gamification writes for one user action into a single transaction
+        
+        XP, badges and achievement log entries only add/flush rows; the outermost
+        unit of work commits once on exit (or rolls back on error). Nesting is
+        tracked on the scoped session, so it is safe across worker threads.
+        """
+        info = db.session.info
+        depth = info.get('gamification_uow_depth', 0)
+        info['gamification_uow_depth'] = depth + 1
+        try:
+            yield
+            if depth == 0:
+                db.session.commit()
+        except Exception:
+            if depth == 0:
+                db.session.rollback()
+            raise
+        finally:
+            info['gamification_uow_depth'] = depth
     
     def get_or_create_user(self, session_id):
-        """Get or create user based on session ID"""
-        if not self._badges_initialized:
-            self.initialize_default_badges()
-            self._badges_initialized = True
-            
+        """Get or create user based on session ID (badges must be seeded, see seeding.Seeder)"""
         user = User.query.filter_by(session_id=session_id).first()
         if not user:
-            user = User(session_id=session_id)
-            db.session.add(user)
-            db.session.commit()
-            # Award welcome badge
-            self.award_badge(user, 'welcome_aboard')
+            with self.unit_of_work():
+                user = User(session_id=session_id)
+                db.session.add(user)
+                db.session.flush()
+                # Award welcome badge
+                self.award_badge(user, 'welcome_aboard')
         return user
     
     def calculate_level(self, total_xp):
@@ -51,7 +224,7 @@ class GamificationService:
         return current_level * self.XP_PER_LEVEL
     
     def award_xp(self, user, xp_amount, reason="General"):
-        """Award XP to user and check for level up"""
+        """Award XP to user and check for level up (committed by the enclosing unit of work)"""
         old_level = user.career_level
         user.total_xp += xp_amount
         new_level = self.calculate_level(user.total_xp)
@@ -69,7 +242,6 @@ class GamificationService:
             self.check_level_milestones(user, new_level)
         
         user.last_activity = datetime.utcnow()
-        db.session.commit()
         
         # Log achievement
         achievement = Achievement(
@@ -79,29 +251,32 @@ class GamificationService:
             xp_earned=xp_amount
         )
         db.session.add(achievement)
-        db.session.commit()
         
         return level_up_data
     
     def award_badge(self, user, badge_name):
-        """Award a badge to user if they don't already have it"""
-        badge = Badge.query.filter_by(name=badge_name).first()
+        """Award a badge to user if they don't already have it (committed by the enclosing unit of work)"""
+        badge = badge_catalog.get(badge_name)
         if not badge:
             return False
             
         # Check if user already has this badge
-        existing = UserBadge.query.filter_by(user_id=user.id, badge_id=badge.id).first()
+        existing = db.session.query(UserBadge.id).filter_by(user_id=user.id, badge_id=badge['id']).first()
         if existing:
             return False
         
-        # Award the badge
-        user_badge = UserBadge(user_id=user.id, badge_id=badge.id)
-        db.session.add(user_badge)
+        # Award the badge; a concurrent award of the same badge hits the unique
+        # (user_id, badge_id) index and is dropped without failing the transaction
+        try:
+            with db.session.begin_nested():
+                db.session.add(UserBadge(user_id=user.id, badge_id=badge['id']))
+        except IntegrityError:
+            return False
+        self._update_counters(user.id, badge_count=User.badge_count + 1)
         
         # Award XP for the badge
-        self.award_xp(user, badge.xp_value, f"Badge: {badge.name}")
+        self.award_xp(user, badge['xp_value'], f"Badge: {badge['name']}")
         
-        db.session.commit()
         return True
     
     def check_achievements(self, user, context_data=None):
@@ -111,7 +286,7 @@ class GamificationService:
         if context_data:
             # Resume upload achievements
             if context_data.get('action') == 'resume_upload':
-                resume_count = len(user.resumes)
+                resume_count = user.resume_count
                 if resume_count == 1:
                     if self.award_badge(user, 'first_resume'):
                         achievements_awarded.append('first_resume')
@@ -122,7 +297,7 @@ class GamificationService:
             # Analysis achievements
             elif context_data.get('action') == 'analysis_complete':
                 score = context_data.get('score', 0)
-                analyses_count = len(user.resumes[0].analyses) if user.resumes else 0
+                analyses_count = user.analysis_count
                 
                 if analyses_count == 1:
                     if self.award_badge(user, 'first_analysis'):
@@ -174,16 +349,16 @@ class GamificationService:
             # Streak broken
             user.current_streak = 1
         
-        # Award streak badges
-        if user.current_streak == 7:
-            self.award_badge(user, 'week_warrior')
-        elif user.current_streak == 30:
-            self.award_badge(user, 'month_master')
-        elif user.current_streak == 100:
-            self.award_badge(user, 'streak_legend')
-        
-        user.last_activity = datetime.utcnow()
-        db.session.commit()
+        with self.unit_of_work():
+            # Award streak badges
+            if user.current_streak == 7:
+                self.award_badge(user, 'week_warrior')
+            elif user.current_streak == 30:
+                self.award_badge(user, 'month_master')
+            elif user.current_streak == 100:
+                self.award_badge(user, 'streak_legend')
+            
+            user.last_activity = datetime.utcnow()
         
         return user.current_streak
     
@@ -204,11 +379,124 @@ class GamificationService:
             'progress_percentage': min(100, (xp_progress / self.XP_PER_LEVEL) * 100),
             'current_streak': user.current_streak,
             'longest_streak': user.longest_streak,
-            'badges_count': len(user.user_badges),
-            'resumes_count': len(user.resumes),
+            'badges_count': user.badge_count,
+            'resumes_count': user.resume_count,
+            'analyses_count': user.analysis_count,
+            'best_score': user.best_score,
+            'last_analysis_date': user.last_analysis_date,
             'level_title': self.get_level_title(current_level)
         }
     
+    def _update_counters(self, user_id, **values):
+        """Apply counter changes as one atomic UPDATE of the user's row
+        
+        Values are SQL expressions (e.g. User.badge_count + 1) so concurrent
+        writers never lose an increment; loaded User objects are synchronized.
+        """
+        db.session.execute(update(User).where(User.id == user_id).values(**values))
+    
+    def record_resume_upload(self, user):
+        """Count a newly uploaded resume (call inside the upload's unit of work)"""
+        self._update_counters(user.id, resume_count=User.resume_count + 1)
+    
+    def record_analysis(self, user_id, score, analysis_date=None):
+        """Count a completed analysis and keep the user's best score and last analysis date"""
+        self._update_counters(
+            user_id,
+            analysis_count=User.analysis_count + 1,
+            best_score=case((User.best_score < score, score), else_=User.best_score),
+            last_analysis_date=analysis_date or datetime.utcnow()
+        )
+    
+    def recompute_user_stats(self):
+        """Rebuild every user's counters from the source tables in one bulk UPDATE"""
+        result = db.session.execute(user_stats_update().execution_options(synchronize_session=False))
+        db.session.commit()
+        return result.rowcount
+    
+    def get_recent_badges(self, user, limit=3):
+        """Most recently earned badges, with each Badge loaded in the same query"""
+        return UserBadge.query.options(joinedload(UserBadge.badge)) \
+            .filter(UserBadge.user_id == user.id) \
+            .order_by(UserBadge.earned_date.desc()) \
+            .limit(limit).all()
+    
+    @staticmethod
+    def _daily_xp(query_filter):
+        """(user_id, day, xp, events) totals of raw Achievement rows matching query_filter"""
+        day = func.date(Achievement.created_date)
+        rows = db.session.query(
+            Achievement.user_id, day, func.sum(Achievement.xp_earned), func.count(Achievement.id)
+        ).filter(query_filter).group_by(Achievement.user_id, day).all()
+        # SQLite returns date() as a string, PostgreSQL as a date
+        return [(user_id, date.fromisoformat(str(day_value)), xp or 0, events)
+                for user_id, day_value, xp, events in rows]
+    
+    def rollup_xp_events(self, retention_days=30):
+        """Fold raw XP events older than retention_days into daily rollups and delete them
+        
+        Only whole days before the cutoff are rolled up, in one transaction, so a
+        day's total is either entirely raw events or entirely in its rollup row.
+        Returns (rollup rows written, events removed).
+        """
+        cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=retention_days), datetime.min.time())
+        old_events = Achievement.created_date < cutoff
+        try:
+            totals = self._daily_xp(old_events)
+            if not totals:
+                return 0, 0
+            
+            existing = {
+                (rollup.user_id, rollup.day): rollup
+                for rollup in XpDailyRollup.query.filter(
+                    XpDailyRollup.user_id.in_({user_id for user_id, _day, _xp, _events in totals}),
+                    XpDailyRollup.day.in_({day for _user_id, day, _xp, _events in totals})
+                )
+            }
+            inserts = []
+            for user_id, day, xp, events in totals:
+                rollup = existing.get((user_id, day))
+                if rollup:
+                    # Late-arriving events for a day that was already rolled up
+                    rollup.xp_earned += xp
+                    rollup.event_count += events
+                else:
+                    inserts.append({'user_id': user_id, 'day': day, 'xp_earned': xp, 'event_count': events})
+            if inserts:
+                db.session.execute(insert(XpDailyRollup), inserts)
+            
+            removed = db.session.execute(
+                delete(Achievement).where(old_events).execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            return len(totals), removed
+        except Exception:
+            db.session.rollback()
+            raise
+    
+    def get_xp_history(self, user, days=30):
+        """Daily XP for the last `days` days, merging rollups with still-raw events"""
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        history = {}
+        rollups = db.session.query(XpDailyRollup.day, XpDailyRollup.xp_earned, XpDailyRollup.event_count) \
+            .filter(XpDailyRollup.user_id == user.id, XpDailyRollup.day >= since)
+        for day, xp, events in rollups:
+            history[day] = [xp, events]
+        
+        raw = self._daily_xp(and_(
+            Achievement.user_id == user.id,
+            Achievement.created_date >= datetime.combine(since, datetime.min.time())
+        ))
+        for _user_id, day, xp, events in raw:
+            totals = history.setdefault(day, [0, 0])
+            totals[0] += xp
+            totals[1] += events
+        
+        return [
+            {'date': day.isoformat(), 'xp': xp, 'events': events}
+            for day, (xp, events) in sorted(history.items())
+        ]
+    
     def get_level_title(self, level):
         """Get title based on level"""
         if level < 10:
@@ -235,114 +523,32 @@ class GamificationService:
             return "Resume Grandmaster"
     
     def initialize_default_badges(self):
-        """Initialize default badges if they don't exist"""
-        default_badges = [
-            {
-                'name': 'welcome_aboard',
-                'description': 'Welcome to your career journey!',
-                'icon': 'fas fa-rocket',
-                'category': 'milestone',
-                'rarity': 'common',
-                'xp_value': 10
-            },
-            {
-                'name': 'first_resume',
-                'description': 'Uploaded your first resume',
-                'icon': 'fas fa-file-alt',
-                'category': 'achievement',
-                'rarity': 'common',
-                'xp_value': 25
-            },
-            {
-                'name': 'first_analysis',
-                'description': 'Completed your first AI analysis',
-                'icon': 'fas fa-brain',
-                'category': 'achievement',
-                'rarity': 'common',
-                'xp_value': 50
-            },
-            {
-                'name': 'skilled_professional',
-                'description': 'Achieved 70+ resume score',
-                'icon': 'fas fa-award',
-                'category': 'skill',
-                'rarity': 'rare',
-                'xp_value': 75
-            },
-            {
-                'name': 'high_achiever',
-                'description': 'Achieved 80+ resume score',
-                'icon': 'fas fa-trophy',
-                'category': 'skill',
-                'rarity': 'epic',
-                'xp_value': 100
-            },
-            {
-                'name': 'perfectionist',
-                'description': 'Achieved 90+ resume score',
-                'icon': 'fas fa-crown',
-                'category': 'skill',
-                'rarity': 'legendary',
-                'xp_value': 150
-            },
-            {
-                'name': 'week_warrior',
-                'description': '7-day login streak',
-                'icon': 'fas fa-fire',
-                'category': 'streak',
-                'rarity': 'rare',
-                'xp_value': 50
-            },
-            {
-                'name': 'month_master',
-                'description': '30-day login streak',
-                'icon': 'fas fa-calendar-check',
-                'category': 'streak',
-                'rarity': 'epic',
-                'xp_value': 200
-            },
-            {
-                'name': 'level_5_rookie',
-                'description': 'Reached Level 5',
-                'icon': 'fas fa-star',
-                'category': 'milestone',
-                'rarity': 'common',
-                'xp_value': 25
-            },
-            {
-                'name': 'level_10_rising_star',
-                'description': 'Reached Level 10',
-                'icon': 'fas fa-star-half-alt',
-                'category': 'milestone',
-                'rarity': 'rare',
-                'xp_value': 50
-            },
-            {
-                'name': 'level_25_professional',
-                'description': 'Reached Level 25',
-                'icon': 'fas fa-user-tie',
-                'category': 'milestone',
-                'rarity': 'epic',
-                'xp_value': 100
-            },
-            {
-                'name': 'resume_collector',
-                'description': 'Uploaded 5 different resumes',
-                'icon': 'fas fa-folder-open',
-                'category': 'achievement',
-                'rarity': 'rare',
-                'xp_value': 75
-            }
-        ]
+        """Seed default badges with one bulk upsert (one SELECT plus at most one INSERT and one UPDATE)"""
+        existing = {
+            row.name: row
+            for row in db.session.query(
+                Badge.id, Badge.name, Badge.description, Badge.icon,
+                Badge.category, Badge.rarity, Badge.xp_value
+            ).filter(Badge.name.in_([badge['name'] for badge in DEFAULT_BADGES]))
+        }
         
-        for badge_data in default_badges:
-            existing = Badge.query.filter_by(name=badge_data['name']).first()
-            if not existing:
-                badge = Badge(**badge_data)
-                db.session.add(badge)
+        inserts = [badge for badge in DEFAULT_BADGES if badge['name'] not in existing]
+        updates = [
+            dict(badge, id=existing[badge['name']].id)
+            for badge in DEFAULT_BADGES
+            if badge['name'] in existing
+            and any(getattr(existing[badge['name']], field) != value for field, value in badge.items())
+        ]
         
         try:
+            if inserts:
+                db.session.execute(insert(Badge), inserts)
+            if updates:
+                db.session.execute(update(Badge), updates)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
-            print(f"Error initializing badges: {e}")
\ No newline at end of file
+            print(f"Error initializing badges: {e}")
+        
+        badge_catalog.invalidate()
+        return len(inserts), len(updates)
@@ -0,0 +1,95 @@
+"""
+Job Features - Matching features computed once per job and stored in job_features
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Iterable
+
+from sqlalchemy import delete, insert, select
+
+from app import db
+from job_matcher import JobMatcher
+from local_scorer import FEATURES_VERSION, TextProfile
+from models import Job, JobFeatures
+
+logger = logging.getLogger(__name__)
+
+class _JobText:
+    # Adapts a row to JobMatcher.build_job_text, so features see exactly the matched text
+    def __init__(self, row):
+        self.title, self.description, self.requirements = row.title, row.description, row.requirements
+
+def compute_job_features(job) -> Dict:
+    """Features of one job (anything with title/description/requirements)"""
+    profile = TextProfile(JobMatcher.build_job_text(job))
+    return {
+        'version': FEATURES_VERSION,
+        'technical_skills': sorted(profile.technical_skills),
+        'soft_skills': sorted(profile.soft_skills),
+        'certifications': sorted(profile.certifications),
+        'years_experience': profile.years_experience,
+        'education_level': profile.education_level,
+        'term_counts': dict(profile.term_counts),
+        'computed_date': datetime.utcnow()
+    }
+
+def upsert_job_features(job_ids: Iterable[int] = None, connection=None, stale_only: bool = False,
+                        batch_size: int = 500, limit: int = None) -> int:
+    """Compute and store features for job_ids, or for every job missing (or, with stale_only, outdated) ones
+
+    limit caps how many jobs one call processes. Returns the number processed.
+    """
+    conn = connection or db.session
+    job, features = Job.__table__, JobFeatures.__table__
+    query = select(job.c.id, job.c.title, job.c.description, job.c.requirements).order_by(job.c.id)
+    if job_ids is not None:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        query = query.where(job.c.id.in_(job_ids))
+    elif stale_only:
+        query = query.where(~job.c.id.in_(select(features.c.job_id).where(features.c.version == FEATURES_VERSION)))
+    else:
+        query = query.where(~job.c.id.in_(select(features.c.job_id)))
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    processed = 0
+    batch = []
+    for row in conn.execute(query):
+        batch.append(dict(compute_job_features(_JobText(row)), job_id=row.id))
+        if len(batch) >= batch_size:
+            processed += _write_features(conn, batch)
+            batch = []
+    if batch:
+        processed += _write_features(conn, batch)
+    return processed
+
+def _write_features(conn, batch) -> int:
+    # Delete-then-insert is a portable upsert for a table keyed only by job_id
+    features = JobFeatures.__table__
+    conn.execute(delete(features).where(features.c.job_id.in_([row['job_id'] for row in batch])))
+    conn.execute(insert(features), batch)
+    return len(batch)
+
+def job_profile(features: JobFeatures) -> TextProfile:
+    """Scorer profile for a job from its stored features"""
+    # Every upsert rewrites computed_date, so a re-ingested job never reuses its old cached vector
+    return TextProfile.from_features(
+        key=f"job:{features.job_id}:v{features.version}:{features.computed_date.isoformat()}",
+        term_counts=features.term_counts,
+        technical_skills=features.technical_skills,
+        soft_skills=features.soft_skills,
+        certifications=features.certifications,
+        years_experience=features.years_experience,
+        education_level=features.education_level
+    )
+
+def load_job_profiles(job_ids: Iterable[int]) -> Dict[int, TextProfile]:
+    """Profiles for the given jobs that have stored features, keyed by job id"""
+    job_ids = list(job_ids)
+    if not job_ids:
+        return {}
+    rows = JobFeatures.query.filter(JobFeatures.job_id.in_(job_ids)).all()
+    return {row.job_id: job_profile(row) for row in rows}
@@ -0,0 +1,146 @@
+"""
+Job Ingest - Bulk upsert of JSONL/CSV job feeds, keyed by the feed's external_id
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select, update
+
+from app import db
+from job_features import upsert_job_features
+from job_search import index_job_keywords
+from models import Job, job_summary
+
+logger = logging.getLogger(__name__)
+
+INGEST_FORMATS = ('jsonl', 'csv')
+REQUIRED_FIELDS = ('external_id', 'title', 'company', 'description')
+MAX_REPORTED_ERRORS = 20
+
+class JobIngestError(ValueError):
+    """A job feed or one of its records could not be read"""
+
+def infer_format(filename: str) -> Optional[str]:
+    """Feed format from a file extension (.jsonl/.ndjson or .csv), None if unknown"""
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    return {'jsonl': 'jsonl', 'ndjson': 'jsonl', 'csv': 'csv'}.get(extension)
+
+def iter_job_records(stream, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """Stream (line, record, error) from a binary JSONL or CSV feed, one record at a time"""
+    if fmt not in INGEST_FORMATS:
+        # Raised here, not on first iteration, so callers fail before any work
+        raise JobIngestError(f"Unknown feed format {fmt!r}; expected one of {', '.join(INGEST_FORMATS)}")
+    return _iter_records(stream, fmt)
+
+def _iter_records(stream, fmt: str) -> Iterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line_number, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {str(e)}"
+            continue
+        if isinstance(record, dict):
+            yield line_number, record, None
+        else:
+            yield line_number, None, "Expected a JSON object"
+
+def _text(value, max_length: int = None) -> str:
+    text = "" if value is None else str(value).strip()
+    return text[:max_length] if max_length else text
+
+def normalize_job_record(record: Dict) -> Dict:
+    """Validate a feed record and map it onto Job columns"""
+    job = {
+        'external_id': _text(record.get('external_id')),
+        'title': _text(record.get('title'), Job.title.type.length),
+        'company': _text(record.get('company'), Job.company.type.length),
+        'description': _text(record.get('description')),
+        'requirements': _text(record.get('requirements')),
+        'location': _text(record.get('location'), Job.location.type.length) or None
+    }
+    missing = [field for field in REQUIRED_FIELDS if not job[field]]
+    if missing:
+        raise JobIngestError(f"Missing required fields: {', '.join(missing)}")
+    if len(job['external_id']) > Job.external_id.type.length:
+        raise JobIngestError(f"external_id is longer than {Job.external_id.type.length} characters")
+    posted_date = _text(record.get('posted_date'))
+    if posted_date:
+        try:
+            job['posted_date'] = datetime.fromisoformat(posted_date)
+        except ValueError as e:
+            raise JobIngestError(f"posted_date must be an ISO date: {posted_date}") from e
+    return job
+
+def _upsert_batch(batch: List[Dict]) -> Tuple[int, int]:
+    """Insert or update one batch of normalized jobs and refresh their derived rows; returns (inserted, updated)"""
+    by_external_id = {job['external_id']: job for job in batch}  # last record wins
+    existing = dict(db.session.execute(
+        select(Job.external_id, Job.id).where(Job.external_id.in_(by_external_id))
+    ).all())
+
+    new_jobs = [dict(job, posted_date=job.get('posted_date') or datetime.utcnow())
+                for external_id, job in by_external_id.items() if external_id not in existing]
+    changed_jobs = [dict(job, id=existing[external_id], summary=job_summary(job['description']))
+                    for external_id, job in by_external_id.items() if external_id in existing]
+    if new_jobs:
+        db.session.execute(insert(Job), new_jobs)
+    if changed_jobs:
+        db.session.execute(update(Job), changed_jobs)
+
+    job_ids = db.session.execute(select(Job.id).where(Job.external_id.in_(by_external_id))).scalars().all()
+    index_job_keywords(job_ids)
+    upsert_job_features(job_ids)
+    db.session.commit()
+    return len(new_jobs), len(changed_jobs)
+
+def ingest_jobs(records: Iterable[Tuple[int, Optional[Dict], Optional[str]]], batch_size: int = 500) -> Dict:
+    """Upsert jobs from iter_job_records output, committing every batch_size records
+
+    Invalid records are skipped and reported (the first MAX_REPORTED_ERRORS
+    of them); keyword rows and match features are rebuilt for every job
+    written, so ingested jobs are searchable and matchable immediately.
+    """
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+    batch = []
+
+    def flush():
+        try:
+            inserted, updated = _upsert_batch(batch)
+        except Exception:
+            db.session.rollback()
+            raise
+        counts['inserted'] += inserted
+        counts['updated'] += updated
+        batch.clear()
+
+    for line_number, record, error in records:
+        if error is None:
+            try:
+                batch.append(normalize_job_record(record))
+            except JobIngestError as e:
+                error = str(e)
+        if error is not None:
+            counts['skipped'] += 1
+            if len(counts['errors']) < MAX_REPORTED_ERRORS:
+                counts['errors'].append({'line': line_number, 'error': error})
+            continue
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    logger.info(f"Ingested jobs: {counts['inserted']} inserted, {counts['updated']} updated, "
+                f"{counts['skipped']} skipped")
+    return counts
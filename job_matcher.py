@@ -0,0 +1,88 @@
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+class JobMatcher:
+    """Scores a resume against many jobs concurrently with bounded in-flight calls
+
+    Each call (or chunk) gets call_timeout seconds; one that runs longer is
+    cancelled and its jobs are scored locally. With batch_size > 1 the resume is sent once per chunk of up to batch_size
+    jobs (and batch_token_budget job tokens) instead of once per job.
+    """
+
+    def __init__(self, analyzer, max_workers: int = 8, call_timeout: float = 30.0,
+                 batch_size: int = 1, batch_token_budget: int = 6000):
+        self.analyzer = analyzer
+        self.max_workers = max(1, max_workers)
+        self.call_timeout = call_timeout
+        self.batch_size = max(1, batch_size)
+        self.batch_token_budget = batch_token_budget
+
+    @staticmethod
+    def build_job_text(job) -> str:
+        """Build the job description text sent to the analyzer"""
+        return f"{job.title}\n{job.description}\n{job.requirements}"
+
+    @staticmethod
+    def _error_match(job, similarities: Dict[int, float] = None) -> Dict:
+        """Fallback match entry used when scoring a job fails or times out"""
+        return {
+            'job': job,
+            'match_score': 0,
+            'recommendation': 'Error',
+            'matching_keywords': [],
+            'gap_analysis': ['Unable to analyze match'],
+            'similarity': (similarities or {}).get(job.id)
+        }
+
+    @staticmethod
+    def _match_entry(job, match_result: Dict, similarities: Dict[int, float] = None) -> Dict:
+        return {
+            'job': job,
+            'match_score': match_result.get('match_score', 0),
+            'recommendation': match_result.get('recommendation', 'Unknown'),
+            'matching_keywords': match_result.get('matching_keywords', []),
+            'gap_analysis': match_result.get('gap_analysis', []),
+            'similarity': (similarities or {}).get(job.id)
+        }
+
+    def _match_on_analyzer(self, resume_text: str, jobs: List, similarities: Dict[int, float] = None,
+                           profiles: Dict = None, resume_profile=None) -> List[Dict]:
+        """Score all jobs on the analyzer's event loop, one call per job or per chunk of batch_size jobs"""
+        # Job texts are built here, on the request thread, so the event loop
+        # never touches ORM instances bound to the request's session.
+        job_texts = [self.build_job_text(job) for job in jobs]
+        job_profiles = [profiles.get(job.id) for job in jobs]
+        try:
+            if self.batch_size > 1:
+                results = self.analyzer.match_jobs_batch(
+                    resume_text, job_texts, self.batch_size, self.batch_token_budget,
+                    job_profiles, resume_profile, chunk_timeout=self.call_timeout
+                )
+            else:
+                results = self.analyzer.match_jobs(
+                    resume_text, job_texts, job_profiles, resume_profile,
+                    call_timeout=self.call_timeout, max_concurrency=self.max_workers
+                )
+        except Exception as e:
+            logger.error(f"Error matching jobs: {str(e)}")
+            return [self._error_match(job, similarities) for job in jobs]
+        return [self._match_entry(job, result, similarities) for job, result in zip(jobs, results)]
+
+    def match_all(self, resume_text: str, jobs: List, similarities: Dict[int, float] = None,
+                  profiles: Dict = None, resume_profile=None) -> List[Dict]:
+        """Score resume against all jobs in parallel and return matches sorted by score
+
+        similarities optionally maps job id to the first-stage retrieval score,
+        which is passed through on each match as 'similarity'. profiles
+        optionally maps job id to its precomputed TextProfile (job_features.py),
+        and resume_profile is the resume's (resume_features.py).
+        """
+        if not jobs:
+            return []
+        job_matches = self._match_on_analyzer(resume_text, jobs, similarities, profiles or {}, resume_profile)
+
+        # Sort by match score
+        job_matches.sort(key=lambda x: x['match_score'], reverse=True)
+        return job_matches
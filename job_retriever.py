@@ -0,0 +1,137 @@
+import heapq
+import logging
+import math
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select
+
+from app import db
+from local_scorer import TfidfIndex
+from models import JobFeatures
+
+logger = logging.getLogger(__name__)
+
+class JobRetriever:
+    """First-stage candidate retrieval over the job catalog using an inverted TF-IDF index
+
+    Document frequencies and idf come from a TfidfIndex, normally the local
+    scorer's job_index, which sync keeps up to date; this class adds the
+    postings and norms needed to rank the whole catalog against a query.
+    """
+
+    def __init__(self, index: TfidfIndex = None, sync_overlap: timedelta = timedelta(minutes=5),
+                 sync_batch: int = 500):
+        self.index = index or TfidfIndex()
+        self._postings = defaultdict(dict)  # term -> {job_id: sublinear tf}
+        self._doc_terms = {}                # job_id -> list of terms
+        self._norms = {}
+        self._norms_dirty = False
+        self._norms_version = None          # index.version the norms were computed at
+        self._indexed_at = {}               # job_id -> computed_date of the indexed features
+        self._synced_through = None         # newest JobFeatures.computed_date indexed
+        self.sync_overlap = sync_overlap
+        self.sync_batch = sync_batch
+        self._lock = threading.Lock()       # guards the index state read by top_k_terms
+        self._sync_lock = threading.Lock()  # one sync at a time, so each row is loaded once
+
+    @property
+    def size(self) -> int:
+        return len(self._doc_terms)
+
+    def add_terms(self, job_id: int, counts: Dict[str, int]) -> None:
+        """Index one job from its term counts, replacing any earlier version"""
+        with self._lock:
+            self._add_locked(job_id, counts)
+
+    def _add_locked(self, job_id: int, counts: Dict[str, int]) -> None:
+        if job_id in self._doc_terms:
+            self._remove_locked(job_id)
+        for term, count in counts.items():
+            self._postings[term][job_id] = 1 + math.log(count)
+        self._doc_terms[job_id] = list(counts)
+        self._norms_dirty = True
+        self.index.add_terms(job_id, counts)
+
+    def _remove_locked(self, job_id: int) -> None:
+        for term in self._doc_terms.pop(job_id, []):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(job_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._norms.pop(job_id, None)
+        self._norms_dirty = True
+
+    def sync(self) -> int:
+        """Index jobs whose features were computed since the last sync; returns how many
+
+        Reads the precomputed term counts in job_features rather than job
+        text, so the catalog is read in full once per process and
+        incrementally afterwards; re-ingested jobs are re-indexed in place.
+        computed_date is stamped before the writing transaction commits, so
+        rows can appear with a date older than the newest one already seen:
+        each sync rechecks the last sync_overlap before that date and loads
+        only rows whose date differs from what was indexed. Rows are read
+        outside the index lock and applied under it in one step, so
+        concurrent top_k_terms calls never see a partly applied sync.
+        """
+        with self._sync_lock:
+            if self._synced_through is None:
+                rows = JobFeatures.query.all()
+            else:
+                stamps = db.session.execute(
+                    select(JobFeatures.job_id, JobFeatures.computed_date)
+                    .where(JobFeatures.computed_date > self._synced_through - self.sync_overlap)
+                ).all()
+                changed = [job_id for job_id, computed_date in stamps if self._indexed_at.get(job_id) != computed_date]
+                rows = []
+                for start in range(0, len(changed), self.sync_batch):
+                    rows.extend(JobFeatures.query.filter(JobFeatures.job_id.in_(changed[start:start + self.sync_batch])))
+            if not rows:
+                return 0
+            with self._lock:
+                for row in rows:
+                    self._add_locked(row.job_id, row.term_counts)
+                    self._indexed_at[row.job_id] = row.computed_date
+                    if self._synced_through is None or row.computed_date > self._synced_through:
+                        self._synced_through = row.computed_date
+            logger.info(f"Indexed {len(rows)} new or updated jobs for retrieval ({self.size} total)")
+            return len(rows)
+
+    def _refresh_norms_locked(self) -> None:
+        # Stale after a job here changes, or after idf does
+        if not self._norms_dirty and self._norms_version == self.index.version:
+            return
+        squared = defaultdict(float)
+        for term, postings in self._postings.items():
+            idf = self.index.idf(term)
+            for job_id, tf in postings.items():
+                squared[job_id] += (tf * idf) ** 2
+        self._norms = {job_id: math.sqrt(total) for job_id, total in squared.items()}
+        self._norms_dirty = False
+        self._norms_version = self.index.version
+
+    def top_k_terms(self, query: Dict[str, int], k: int) -> List[Tuple[int, float]]:
+        """Return up to k (job_id, cosine similarity) pairs for a resume's term counts, best first"""
+        with self._lock:
+            self._refresh_norms_locked()
+            # Unit-length query vector over the terms any job has
+            query_vector = self.index.vectorize({term: count for term, count in query.items() if term in self._postings})
+            if not query_vector:
+                return []
+
+            scores: Dict[int, float] = defaultdict(float)
+            for term, weight in query_vector.items():
+                idf = self.index.idf(term)
+                for job_id, tf in self._postings[term].items():
+                    scores[job_id] += weight * tf * idf
+
+            ranked = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                (job_id, score / self._norms[job_id])
+                for job_id, score in ranked
+                if self._norms.get(job_id)
+            ]
@@ -0,0 +1,126 @@
+"""
+Job Search - Filtered, keyset-paginated job listings and the keyword index behind them
+"""
+import base64
+import hashlib
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.orm import load_only
+
+from app import db
+from local_scorer import tokenize
+from models import Job, JobFeatures, JobKeyword
+
+logger = logging.getLogger(__name__)
+
+KEYWORD_MAX_CHARS = 64
+FILTER_FIELDS = ('q', 'company', 'location', 'posted_after', 'posted_before')
+
+class JobSearchError(ValueError):
+    """A filter or cursor in the request could not be parsed"""
+
+def job_keywords(title: str, company: str, location: str, description: str, requirements: str) -> List[str]:
+    """Distinct search tokens for a job's text"""
+    text = " ".join(part or "" for part in (title, company, location, description, requirements))
+    return sorted({token[:KEYWORD_MAX_CHARS] for token in tokenize(text)})
+
+def index_job_keywords(job_ids: Iterable[int] = None, connection=None, batch_size: int = 500) -> int:
+    """(Re)build keyword rows for job_ids, or for every job without any; returns jobs indexed"""
+    conn = connection or db.session
+    job = Job.__table__
+    query = select(job.c.id, job.c.title, job.c.company, job.c.location, job.c.description, job.c.requirements)
+    if job_ids is not None:
+        job_ids = list(job_ids)
+        if not job_ids:
+            return 0
+        conn.execute(delete(JobKeyword.__table__).where(JobKeyword.__table__.c.job_id.in_(job_ids)))
+        query = query.where(job.c.id.in_(job_ids))
+    else:
+        query = query.where(~job.c.id.in_(select(JobKeyword.__table__.c.job_id)))
+
+    indexed = 0
+    rows = []
+    for row in conn.execute(query.order_by(job.c.id)):
+        rows.extend({'job_id': row.id, 'keyword': keyword}
+                    for keyword in job_keywords(row.title, row.company, row.location, row.description, row.requirements))
+        indexed += 1
+        if len(rows) >= batch_size:
+            conn.execute(insert(JobKeyword.__table__), rows)
+            rows = []
+    if rows:
+        conn.execute(insert(JobKeyword.__table__), rows)
+    return indexed
+
+def encode_cursor(job: Job) -> str:
+    return base64.urlsafe_b64encode(f"{job.posted_date.isoformat()}|{job.id}".encode()).decode().rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        posted, job_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(posted), int(job_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise JobSearchError(f"Invalid cursor: {cursor}") from e
+
+def parse_filters(args) -> Dict:
+    """Read the listing filters from request args, dropping empty ones"""
+    filters = {name: (args.get(name) or '').strip() for name in FILTER_FIELDS}
+    filters = {name: value for name, value in filters.items() if value}
+    for name in ('posted_after', 'posted_before'):
+        if name in filters:
+            try:
+                date.fromisoformat(filters[name])
+            except ValueError as e:
+                raise JobSearchError(f"{name} must be a YYYY-MM-DD date") from e
+    return filters
+
+def _filtered(query, filters: Dict):
+    if filters.get('company'):
+        query = query.filter(func.lower(Job.company) == filters['company'].lower())
+    if filters.get('location'):
+        query = query.filter(Job.location.ilike(f"%{filters['location']}%"))
+    if filters.get('posted_after'):
+        query = query.filter(Job.posted_date >= datetime.fromisoformat(filters['posted_after']))
+    if filters.get('posted_before'):
+        # Inclusive of the whole posted_before day
+        query = query.filter(Job.posted_date < datetime.fromisoformat(filters['posted_before']) + timedelta(days=1))
+    for term in sorted(set(tokenize(filters.get('q', '')))):
+        query = query.filter(Job.id.in_(
+            select(JobKeyword.job_id).where(JobKeyword.keyword == term[:KEYWORD_MAX_CHARS])
+        ))
+    return query
+
+def search_jobs(filters: Dict, after: Optional[str] = None, limit: int = 20) -> Tuple[List[Job], Optional[str]]:
+    """One page of jobs, newest first, loading only the list-view columns
+
+    Returns (jobs, next_cursor); next_cursor is None on the last page.
+    """
+    query = _filtered(Job.query, filters).options(
+        load_only(Job.id, Job.title, Job.company, Job.location, Job.summary, Job.posted_date)
+    )
+    if after:
+        posted_date, job_id = decode_cursor(after)
+        query = query.filter(or_(Job.posted_date < posted_date,
+                                 and_(Job.posted_date == posted_date, Job.id < job_id)))
+    jobs = query.order_by(Job.posted_date.desc(), Job.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(jobs[limit - 1]) if len(jobs) > limit else None
+    return jobs[:limit], next_cursor
+
+def listing_validators() -> Tuple[str, Optional[datetime]]:
+    """(ETag, Last-Modified) for job listings
+
+    Built from the newest posted_date, the job count and the newest feature
+    computation, which re-ingesting an existing job also advances.
+    """
+    newest, count, recomputed = db.session.query(
+        func.max(Job.posted_date), func.count(Job.id),
+        select(func.max(JobFeatures.computed_date)).scalar_subquery()
+    ).one()
+    stamps = [stamp for stamp in (newest, recomputed) if stamp]
+    etag = hashlib.sha256("|".join(
+        (newest.isoformat() if newest else '', str(count), recomputed.isoformat() if recomputed else '')
+    ).encode()).hexdigest()[:32]
+    return etag, max(stamps).replace(microsecond=0) if stamps else None
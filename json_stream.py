@@ -0,0 +1,66 @@
+import json
+from typing import Iterator, Tuple
+
+class IncrementalJSONObjectParser:
+    """Incrementally parses a streamed JSON object, emitting each top-level field once it is complete"""
+
+    def __init__(self):
+        self._buffer = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member = []
+        self._done = False
+
+    def feed(self, chunk: str) -> Iterator[Tuple[str, object]]:
+        """Consume a chunk of model output and yield (key, value) for fields completed by it"""
+        for char in chunk:
+            if self._done:
+                break
+
+            if self._depth == 0:
+                # Skip anything before the opening brace
+                if char == '{':
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                self._member.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+
+            if self._depth == 1 and char == ',':
+                field = self._flush()
+                if field:
+                    yield field
+            elif self._depth == 0:
+                # Closing brace of the top-level object
+                self._done = True
+                field = self._flush()
+                if field:
+                    yield field
+            else:
+                self._member.append(char)
+
+    def _flush(self):
+        member = "".join(self._member).strip()
+        self._member = []
+        if not member:
+            return None
+        try:
+            parsed = json.loads("{" + member + "}")
+        except ValueError:
+            return None
+        return next(iter(parsed.items()), None)
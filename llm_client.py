@@ -0,0 +1,344 @@
+"""
+LLM Client - Shared async OpenAI client with rate limiting, retries and a circuit breaker
+"""
+import asyncio
+import concurrent.futures
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from text_compaction import estimate_tokens
+
+# openai (and httpx under it) is imported on first call rather than at import
+# time; it accounts for a large share of the app's cold start
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+class LLMError(Exception):
+    """An LLM call failed; callers fall back to local scoring"""
+
+class LLMUnavailableError(LLMError):
+    """The circuit breaker is open, so no call was attempted"""
+
+class LLMRateLimitError(LLMError):
+    """Still rate limited (429) after all retries"""
+
+class LLMResponseError(LLMError):
+    """The model returned something that isn't the expected JSON"""
+
+class TokenBucket:
+    """Async token bucket refilled continuously at per_minute / 60 per second
+
+    A per_minute of 0 disables the limit. Waiters are served in FIFO order.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = None
+        self._lock_loop = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        if self.capacity <= 0:
+            return
+        # A request larger than the whole bucket waits for a full bucket rather than forever
+        amount = min(amount, self.capacity)
+        loop = asyncio.get_running_loop()
+        if self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, delta: float) -> None:
+        """Charge (or refund) the difference between estimated and actual usage"""
+        if self.capacity <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+class CircuitBreaker:
+    """Opens when the error rate over a sliding window spikes, then lets one trial call through after a cooldown"""
+
+    def __init__(self, error_rate: float = 0.5, min_calls: int = 10, window: float = 60, cooldown: float = 30):
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self._outcomes = deque()
+        self._opened_at = None
+        self._trial_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            return 'half_open' if time.monotonic() - self._opened_at >= self.cooldown else 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.cooldown:
+                return False
+            # A trial that never reported back (e.g. cancelled) doesn't block forever
+            if self._trial_started is not None and now - self._trial_started < self.cooldown:
+                return False
+            self._trial_started = now
+            return True
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if self._opened_at is not None:
+                if self._trial_started is None:
+                    return
+                # Outcome of the half-open trial decides whether to close again
+                self._trial_started = None
+                if success:
+                    self._opened_at = None
+                    self._outcomes.clear()
+                else:
+                    self._opened_at = now
+                return
+
+            self._outcomes.append((now, success))
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            failures = sum(1 for _at, ok in self._outcomes if not ok)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+                logger.warning(f"LLM circuit breaker opened: {failures}/{len(self._outcomes)} calls failed")
+                self._opened_at = now
+
+class AsyncLLMClient:
+    """Chat completions over one pooled AsyncOpenAI client per event loop
+
+    Every call passes the circuit breaker, waits for request and token budget
+    (RPM/TPM quotas), and is retried with jittered exponential backoff on 429,
+    5xx and connection errors, honoring the server's Retry-After.
+    """
+
+    # Completion tokens assumed per call when charging the token bucket up front
+    COMPLETION_TOKEN_ESTIMATE = 800
+    PLACEHOLDER_KEY = "your-openai-api-key"
+
+    def __init__(self, api_key: str = None, base_url: str = None,
+                 requests_per_minute: float = 500, tokens_per_minute: float = 30000,
+                 max_retries: int = 4, timeout: float = 60, max_connections: int = 20,
+                 backoff_base: float = 0.5, backoff_max: float = 30, breaker: CircuitBreaker = None):
+        self.api_key = api_key
+        self.base_url = base_url or None
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.breaker = breaker or CircuitBreaker()
+        self._clients = {}
+
+    @classmethod
+    def from_config(cls, config) -> 'AsyncLLMClient':
+        """Build the client from Flask app config"""
+        return cls(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            base_url=config.get('OPENAI_BASE_URL'),
+            requests_per_minute=config.get('OPENAI_RPM', 500),
+            tokens_per_minute=config.get('OPENAI_TPM', 30000),
+            max_retries=config.get('OPENAI_MAX_RETRIES', 4),
+            timeout=config.get('OPENAI_TIMEOUT', 60),
+            max_connections=config.get('OPENAI_MAX_CONNECTIONS', 20),
+            breaker=CircuitBreaker(
+                error_rate=config.get('OPENAI_BREAKER_ERROR_RATE', 0.5),
+                min_calls=config.get('OPENAI_BREAKER_MIN_CALLS', 10),
+                cooldown=config.get('OPENAI_BREAKER_COOLDOWN', 30)
+            )
+        )
+
+    @property
+    def enabled(self) -> bool:
+        """True when a usable API key is set, or a custom (e.g. local) server is configured"""
+        if self.base_url:
+            return True
+        return bool(self.api_key) and self.api_key != self.PLACEHOLDER_KEY and len(self.api_key) >= 20
+
+    def _client(self) -> 'AsyncOpenAI':
+        # httpx connection pools belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+            client = AsyncOpenAI(
+                api_key=self.api_key or "unused",
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,  # retries are handled here, with the rate limiter in the loop
+                http_client=DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections)
+                )
+            )
+            self._clients = {loop: client}
+        return client
+
+    @classmethod
+    def estimate_tokens(cls, messages: List[Dict]) -> int:
+        """Rough prompt + completion token count"""
+        return sum(estimate_tokens(message['content']) for message in messages) + cls.COMPLETION_TOKEN_ESTIMATE
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        from openai import APIConnectionError, APIStatusError, RateLimitError
+        if isinstance(error, (RateLimitError, APIConnectionError)):
+            return True
+        return isinstance(error, APIStatusError) and (error.status_code >= 500 or error.status_code in (408, 409))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Server-provided Retry-After when present, otherwise full-jitter exponential backoff"""
+        response = getattr(error, 'response', None)
+        if response is not None:
+            for header, scale in (('retry-after-ms', 0.001), ('retry-after', 1.0)):
+                value = response.headers.get(header)
+                if value:
+                    try:
+                        return min(float(value) * scale, self.backoff_max)
+                    except ValueError:
+                        pass  # HTTP-date Retry-After values fall back to backoff
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _admit(self, estimated_tokens: int) -> None:
+        if not self.breaker.allow():
+            raise LLMUnavailableError("LLM circuit breaker is open")
+        await self.request_bucket.acquire(1)
+        await self.token_bucket.acquire(estimated_tokens)
+
+    async def _create(self, estimated_tokens: int, **params):
+        """Admit and issue one completions request, retrying transient failures"""
+        await self._admit(estimated_tokens)
+        attempt = 0
+        while True:
+            try:
+                return await self._client().chat.completions.create(**params)
+            except Exception as e:
+                if not self._retryable(e) or attempt >= self.max_retries:
+                    from openai import RateLimitError
+                    self.breaker.record(False)
+                    if isinstance(e, RateLimitError):
+                        raise LLMRateLimitError(f"Rate limited after {attempt + 1} attempts: {str(e)}") from e
+                    raise LLMError(f"LLM request failed: {str(e)}") from e
+                delay = self._retry_delay(e, attempt)
+                attempt += 1
+                logger.warning(f"LLM request failed ({str(e)}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                # Retries spend quota too
+                await self.request_bucket.acquire(1)
+
+    async def complete_json(self, model: str, messages: List[Dict], temperature: float = 0.3) -> Dict:
+        """Run a JSON-mode chat completion and return the parsed object"""
+        estimated = self.estimate_tokens(messages)
+        response = await self._create(
+            estimated, model=model, messages=messages,
+            response_format={"type": "json_object"}, temperature=temperature
+        )
+        if response.usage is not None:
+            self.token_bucket.adjust(response.usage.total_tokens - estimated)
+        try:
+            result = json.loads(response.choices[0].message.content)
+        except (ValueError, TypeError, IndexError) as e:
+            self.breaker.record(False)
+            raise LLMResponseError(f"Invalid JSON from model: {str(e)}") from e
+        self.breaker.record(True)
+        return result
+
+    async def stream_json(self, model: str, messages: List[Dict], temperature: float = 0.3) -> AsyncIterator[str]:
+        """Stream a JSON-mode chat completion, yielding content deltas
+
+        Only opening the stream is retried; a stream that breaks midway raises
+        LLMError so the caller can fill in what is missing.
+        """
+        response = await self._create(
+            self.estimate_tokens(messages), model=model, messages=messages,
+            response_format={"type": "json_object"}, temperature=temperature, stream=True
+        )
+        try:
+            async for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            self.breaker.record(False)
+            raise LLMError(f"LLM stream failed: {str(e)}") from e
+        finally:
+            await response.close()
+        self.breaker.record(True)
+
+    def stats(self) -> Dict:
+        return {
+            'breaker_state': self.breaker.state,
+            'request_tokens_available': round(self.request_bucket.tokens, 1),
+            'tpm_tokens_available': round(self.token_bucket.tokens, 1)
+        }
+
+class BackgroundLoop:
+    """An event loop on a daemon thread, so synchronous code can share one async client"""
+
+    def __init__(self):
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            # A forked worker inherits the loop object but not its thread
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                threading.Thread(target=self._loop.run_forever, name="llm-event-loop", daemon=True).start()
+            return self._loop
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and block for its result, cancelling it if timeout expires"""
+        future = asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # Cancels the task on the loop too, so its in-flight requests stop
+            future.cancel()
+            raise
+
+    def iterate(self, agen):
+        """Drive an async generator from synchronous code, one item at a time"""
+        loop = self._get_loop()
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(agen.__anext__(), loop).result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), loop).result()
+
+background_loop = BackgroundLoop()
@@ -0,0 +1,609 @@
+"""
+Local Scorer - Deterministic offline resume scoring used when the LLM is unavailable
+"""
+import math
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+# Curated skill lexicon: canonical name -> aliases (all matched case-insensitively)
+TECHNICAL_SKILLS = {
+    'python': [], 'java': [], 'javascript': ['js'], 'typescript': [], 'c++': ['cpp'],
+    'c#': ['csharp'], 'golang': [], 'rust': [], 'ruby': [], 'php': [], 'kotlin': [],
+    'swift': [], 'scala': [], 'sql': [], 'html': ['html5'], 'css': ['css3'],
+    'bash': ['shell scripting'], 'matlab': [],
+    'react': ['react.js', 'reactjs'], 'angular': ['angularjs'], 'vue': ['vue.js', 'vuejs'],
+    'node.js': ['nodejs', 'node'], 'django': [], 'flask': [], 'fastapi': [], 'spring': ['spring boot'],
+    '.net': ['dotnet', 'asp.net'], 'rails': ['ruby on rails'], 'graphql': [], 'rest api': ['rest apis', 'restful'],
+    'microservices': ['microservice', 'microservices architecture'],
+    'machine learning': ['ml'], 'deep learning': [], 'nlp': ['natural language processing'],
+    'computer vision': [], 'data analysis': ['data analytics'], 'data visualization': [],
+    'statistics': ['statistical analysis'], 'tensorflow': [], 'pytorch': [], 'scikit-learn': ['sklearn'],
+    'pandas': [], 'numpy': [], 'spark': ['apache spark', 'pyspark'], 'hadoop': [], 'tableau': [],
+    'power bi': ['powerbi'], 'excel': [],
+    'postgresql': ['postgres'], 'mysql': [], 'mongodb': [], 'redis': [], 'elasticsearch': [],
+    'aws': ['amazon web services'], 'azure': [], 'gcp': ['google cloud'], 'docker': [],
+    'kubernetes': ['k8s'], 'terraform': [], 'ci/cd': ['continuous integration'], 'jenkins': [],
+    'git': ['github', 'gitlab'], 'linux': [], 'cloud computing': [],
+    'agile': ['agile methodologies'], 'scrum': [], 'jira': [], 'product management': [],
+    'user research': [], 'product analytics': [], 'market analysis': [], 'seo': [], 'figma': [],
+}
+
+SOFT_SKILLS = {
+    'leadership': ['team leadership', 'led'], 'communication': [], 'problem solving': ['problem-solving'],
+    'teamwork': ['collaboration', 'collaborated', 'cross-functional'], 'mentoring': ['mentored'],
+    'project management': [], 'stakeholder management': ['stakeholders'],
+    'time management': [], 'critical thinking': [], 'presentation': ['presented'],
+}
+
+CERTIFICATIONS = {
+    'aws certified': [], 'pmp': [], 'cissp': [], 'ccna': [], 'cpa': [], 'cfa': [],
+    'scrum master': ['csm'], 'google analytics': [],
+}
+
+# Section heading aliases, matched against whole (short) lines
+SECTION_HEADINGS = {
+    'summary': ['summary', 'professional summary', 'profile', 'objective', 'about me', 'career objective'],
+    'experience': ['experience', 'work experience', 'professional experience', 'employment history',
+                   'work history', 'employment'],
+    'education': ['education', 'academic background', 'qualifications', 'education and training'],
+    'skills': ['skills', 'technical skills', 'core competencies', 'competencies', 'key skills'],
+    'projects': ['projects', 'personal projects', 'key projects'],
+    'certifications': ['certifications', 'certificates', 'licenses', 'licenses and certifications'],
+    'awards': ['awards', 'honors', 'achievements'],
+}
+
+ESSENTIAL_SECTIONS = ['summary', 'experience', 'education', 'skills']
+
+SECTION_LABELS = {
+    'summary': 'Professional summary',
+    'experience': 'Work experience',
+    'education': 'Education',
+    'skills': 'Skills',
+    'projects': 'Projects',
+    'certifications': 'Certifications',
+    'awards': 'Awards',
+}
+
+ACTION_VERBS = {
+    'achieved', 'built', 'created', 'delivered', 'designed', 'developed', 'drove', 'implemented',
+    'improved', 'increased', 'launched', 'led', 'managed', 'optimized', 'reduced', 'spearheaded',
+    'streamlined', 'architected', 'automated', 'deployed', 'established', 'mentored', 'owned',
+}
+
+# Degree levels, highest first
+EDUCATION_LEVELS = [
+    (4, ['phd', 'ph.d', 'doctorate']),
+    (3, ['master', 'masters', 'msc', 'm.sc', 'mba', 'ms']),
+    (2, ['bachelor', 'bachelors', 'bsc', 'b.sc', 'ba', 'bs', 'b.tech', 'btech', 'degree']),
+    (1, ['associate', 'diploma']),
+]
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is', 'it',
+    'its', 'of', 'on', 'or', 'our', 'that', 'the', 'to', 'was', 'we', 'were', 'will', 'with', 'you',
+    'your', 'this', 'their', 'they', 'i', 'my', 'me', 'into', 'who', 'all', 'also', 'can',
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-/]*")
+YEARS_RE = re.compile(r"(\d{1,2})\s*\+?\s*(?:years?|yrs?)")
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.]+")
+PHONE_RE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+QUANTIFIED_RE = re.compile(r"\d+(?:\.\d+)?\s*(?:%|percent|x\b|k\b|m\b)|\$\s*\d")
+BULLET_RE = re.compile(r"^\s*(?:[-*•▪●–]|\d+[.)])\s+", re.MULTILINE)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into tokens, dropping stopwords"""
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        token = token.rstrip('.-/')
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+class SkillAutomaton:
+    """Aho-Corasick automaton matching every lexicon phrase in a single pass"""
+
+    def __init__(self, lexicon: Dict[str, str]):
+        # lexicon maps lowercase phrase -> canonical skill name
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for phrase, canonical in lexicon.items():
+            self._add(phrase, canonical)
+        self._build_failure_links()
+
+    def _add(self, phrase: str, canonical: str) -> None:
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(phrase), canonical))
+
+    def _build_failure_links(self) -> None:
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def find(self, text: str) -> Set[str]:
+        """Return canonical skills found in already-lowercased text on word boundaries"""
+        found = set()
+        state = 0
+        length = len(text)
+        for index, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for phrase_length, canonical in self._output[state]:
+                start = index - phrase_length + 1
+                end = index + 1
+                if start > 0 and text[start - 1].isalnum():
+                    continue
+                # A trailing period is sentence punctuation, not part of the word
+                if end < length and (text[end].isalnum() or text[end] in '+#'):
+                    continue
+                found.add(canonical)
+        return found
+
+def _build_lexicon(*groups: Dict[str, List[str]]) -> Dict[str, str]:
+    lexicon = {}
+    for group in groups:
+        for canonical, aliases in group.items():
+            lexicon[canonical] = canonical
+            for alias in aliases:
+                lexicon[alias] = canonical
+    return lexicon
+
+TECHNICAL_AUTOMATON = SkillAutomaton(_build_lexicon(TECHNICAL_SKILLS))
+SOFT_AUTOMATON = SkillAutomaton(_build_lexicon(SOFT_SKILLS))
+CERTIFICATION_AUTOMATON = SkillAutomaton(_build_lexicon(CERTIFICATIONS))
+
+_HEADING_LOOKUP = {alias: section for section, aliases in SECTION_HEADINGS.items() for alias in aliases}
+
+def section_for_heading(line: str) -> Optional[str]:
+    """Canonical section name if line is a resume section heading, else None"""
+    stripped = line.strip()
+    if stripped and len(stripped) <= 40:
+        return _HEADING_LOOKUP.get(stripped.lower().strip(':').strip())
+    return None
+
+def detect_sections(text: str) -> Dict[str, str]:
+    """Split resume text into sections keyed by canonical section name"""
+    sections = {}
+    current = None
+    buffer = []
+    for line in text.splitlines():
+        heading = section_for_heading(line)
+        if heading:
+            if current:
+                sections[current] = "\n".join(buffer).strip()
+            current = heading
+            buffer = []
+        elif current:
+            buffer.append(line)
+    if current:
+        sections[current] = "\n".join(buffer).strip()
+    return sections
+
+def extract_years_experience(lowered_text: str) -> int:
+    """Largest 'N years' figure mentioned in the text, 0 if none"""
+    years = [int(match) for match in YEARS_RE.findall(lowered_text)]
+    return max(years) if years else 0
+
+def detect_education_level(tokens: Iterable[str]) -> int:
+    """Highest degree level mentioned (0 = none, 4 = PhD)"""
+    token_set = set(tokens)
+    for level, keywords in EDUCATION_LEVELS:
+        if token_set.intersection(keywords):
+            return level
+    return 0
+
+# Version of the extraction below; stored job/resume features from an older
+# version are recomputed. Bump it whenever the lexicons or extractors change.
+FEATURES_VERSION = 1
+
+class TextProfile:
+    """Everything the scorer needs from one document, computed in a single pass"""
+
+    __slots__ = ('key', 'text', 'lowered', 'tokens', 'term_counts', 'technical_skills', 'soft_skills',
+                 'certifications', 'sections', 'years_experience', 'education_level',
+                 'word_count', 'quantified', 'bullets', 'has_contact')
+
+    def __init__(self, text: str):
+        self.key = text  # identifies the document's cached TF-IDF vector
+        self.text = text
+        self.lowered = text.lower()
+        self.tokens = tokenize(self.lowered)
+        self.term_counts = Counter(self.tokens)
+        self.technical_skills = TECHNICAL_AUTOMATON.find(self.lowered)
+        self.soft_skills = SOFT_AUTOMATON.find(self.lowered)
+        self.certifications = CERTIFICATION_AUTOMATON.find(self.lowered)
+        self.sections = detect_sections(text)
+        self.years_experience = extract_years_experience(self.lowered)
+        self.education_level = detect_education_level(self.tokens)
+        self.word_count = len(text.split())
+        self.quantified = len(QUANTIFIED_RE.findall(self.lowered))
+        self.bullets = len(BULLET_RE.findall(text))
+        self.has_contact = bool(EMAIL_RE.search(text) or PHONE_RE.search(text))
+
+    @classmethod
+    def from_features(cls, key: str, term_counts: Dict[str, int], technical_skills: Iterable[str],
+                      soft_skills: Iterable[str], certifications: Iterable[str],
+                      years_experience: int, education_level: int, sections: Iterable[str] = (),
+                      word_count: int = 0, quantified: int = 0, bullets: int = 0,
+                      has_contact: bool = False) -> 'TextProfile':
+        """Rebuild a profile from precomputed features, without the source text
+
+        Section bodies are not kept, only which sections are present.
+        """
+        profile = cls.__new__(cls)
+        profile.key = key
+        profile.text = profile.lowered = ""
+        profile.tokens = []
+        profile.term_counts = Counter(term_counts)
+        profile.technical_skills = set(technical_skills)
+        profile.soft_skills = set(soft_skills)
+        profile.certifications = set(certifications)
+        profile.sections = dict.fromkeys(sections, "")
+        profile.years_experience = years_experience
+        profile.education_level = education_level
+        profile.word_count = word_count
+        profile.quantified = quantified
+        profile.bullets = bullets
+        profile.has_contact = has_contact
+        return profile
+
+@lru_cache(maxsize=256)
+def build_profile(text: str) -> TextProfile:
+    """Profile a document; cached so one resume scored against many jobs is tokenized once"""
+    return TextProfile(text or "")
+
+def as_profile(document: Union[str, TextProfile]) -> TextProfile:
+    """A precomputed profile as is, or text profiled through build_profile"""
+    return document if isinstance(document, TextProfile) else build_profile(document or "")
+
+class TfidfIndex:
+    """Document-frequency table plus cached, normalized TF-IDF vectors for indexed documents
+
+    version changes whenever the corpus statistics do, so holders of weights
+    derived from idf (e.g. JobRetriever's norms) know when to recompute them.
+    """
+
+    def __init__(self, max_vectors: int = 4096):
+        self.doc_freq = Counter()
+        self.max_vectors = max_vectors
+        self.version = 0
+        self._doc_terms = {}  # doc_id -> distinct terms counted in doc_freq
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def doc_count(self) -> int:
+        return len(self._doc_terms)
+
+    def add_terms(self, doc_id, terms: Iterable[str]) -> None:
+        """Add a document, given its distinct terms, to the corpus statistics, replacing any earlier version"""
+        terms = frozenset(terms)
+        with self._lock:
+            previous = self._doc_terms.get(doc_id)
+            if previous == terms:
+                return
+            if previous is not None:
+                self.doc_freq.subtract(previous)
+                for term in previous - terms:
+                    if self.doc_freq[term] <= 0:
+                        del self.doc_freq[term]
+            self.doc_freq.update(terms)
+            self._doc_terms[doc_id] = terms
+            self.version += 1
+            # IDF changed, so cached vectors are stale
+            self._vectors.clear()
+
+    def idf(self, term: str) -> float:
+        return math.log((1 + self.doc_count) / (1 + self.doc_freq.get(term, 0))) + 1
+
+    def vectorize(self, term_counts: Counter) -> Dict[str, float]:
+        """Sublinear TF-IDF vector normalized to unit length"""
+        vector = {term: (1 + math.log(count)) * self.idf(term) for term, count in term_counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if norm:
+            for term in vector:
+                vector[term] /= norm
+        return vector
+
+    def profile_vector(self, profile: TextProfile) -> Dict[str, float]:
+        """Vector for a job-side profile, cached by profile key"""
+        with self._lock:
+            vector = self._vectors.get(profile.key)
+            if vector is not None:
+                self._vectors.move_to_end(profile.key)
+                return vector
+        vector = self.vectorize(profile.term_counts)
+        with self._lock:
+            self._vectors[profile.key] = vector
+            while len(self._vectors) > self.max_vectors:
+                self._vectors.popitem(last=False)
+        return vector
+
+    @staticmethod
+    def cosine(left: Dict[str, float], right: Dict[str, float]) -> float:
+        if len(left) > len(right):
+            left, right = right, left
+        return sum(weight * right.get(term, 0.0) for term, weight in left.items())
+
+def _clamp(score: float) -> int:
+    return int(max(0, min(100, round(score))))
+
+class LocalScorer:
+    """Offline resume scorer producing the same JSON shapes as the LLM prompts"""
+
+    def __init__(self, job_index: Optional[TfidfIndex] = None):
+        self.job_index = job_index or TfidfIndex()
+
+    def index_job_profiles(self, profiles: Dict[int, TextProfile]) -> None:
+        """Add or update jobs in the corpus statistics from their precomputed profiles, keyed by job id"""
+        for job_id, profile in profiles.items():
+            self.job_index.add_terms(job_id, profile.term_counts)
+
+    # --- Resume-only scoring -------------------------------------------------
+
+    def _quality_scores(self, profile: TextProfile) -> Dict:
+        word_count = profile.word_count
+        found_essential = [section for section in ESSENTIAL_SECTIONS if section in profile.sections]
+        action_verbs = sum(profile.term_counts[verb] for verb in ACTION_VERBS)
+        quantified = profile.quantified
+        bullets = profile.bullets
+        has_contact = profile.has_contact
+
+        completeness = 40 + 12 * len(found_essential) + (12 if has_contact else 0)
+        if profile.certifications or 'certifications' in profile.sections:
+            completeness += 5
+
+        content_quality = 40
+        content_quality += min(action_verbs, 10) * 3
+        content_quality += min(quantified, 5) * 4
+        content_quality += min(len(profile.technical_skills), 10)
+        if word_count < 150:
+            content_quality -= 15
+        elif word_count > 1200:
+            content_quality -= 10
+
+        structure = 45 + 8 * min(len(profile.sections), 5) + min(bullets, 8) * 2
+
+        ats = 40 + 10 * len(found_essential) + min(len(profile.technical_skills), 10) * 2
+        if has_contact:
+            ats += 5
+
+        return {
+            'word_count': word_count,
+            'found_essential': found_essential,
+            'action_verbs': action_verbs,
+            'quantified': quantified,
+            'has_contact': has_contact,
+            'completeness_score': _clamp(completeness),
+            'content_quality_score': _clamp(content_quality),
+            'structure_score': _clamp(structure),
+            'ats_compatibility': _clamp(ats),
+        }
+
+    def _general_feedback(self, profile: TextProfile, quality: Dict) -> Dict:
+        strengths, weaknesses, recommendations = [], [], []
+        if 'experience' in profile.sections:
+            strengths.append("Clear work experience section")
+        if len(profile.technical_skills) >= 5:
+            strengths.append(f"Broad technical skill set ({len(profile.technical_skills)} skills identified)")
+        if quality['quantified'] >= 3:
+            strengths.append("Achievements are backed by measurable results")
+        if quality['action_verbs'] >= 5:
+            strengths.append("Strong use of action verbs")
+        if profile.education_level:
+            strengths.append("Education background provided")
+        if not strengths:
+            strengths.append("Readable plain-text content")
+
+        if quality['quantified'] < 3:
+            weaknesses.append("Few quantifiable achievements")
+            recommendations.append("Add specific metrics and numbers to achievements")
+        if quality['action_verbs'] < 5:
+            weaknesses.append("Experience descriptions lack strong action verbs")
+            recommendations.append("Start bullet points with action verbs such as 'led', 'built' or 'improved'")
+        if len(profile.technical_skills) < 5:
+            weaknesses.append("Limited technical keywords")
+            recommendations.append("Include more relevant technical keywords")
+        if not quality['has_contact']:
+            weaknesses.append("No contact details detected")
+            recommendations.append("Add an email address and phone number")
+        if quality['word_count'] < 150:
+            weaknesses.append("Resume is very short")
+            recommendations.append("Expand on responsibilities and outcomes for each role")
+        if 'summary' not in profile.sections:
+            recommendations.append("Consider adding a professional summary section")
+        if not recommendations:
+            recommendations.append("Tailor the resume keywords to each job you apply for")
+        return {'strengths': strengths, 'weaknesses': weaknesses, 'recommendations': recommendations}
+
+    def analyze(self, resume: Union[str, TextProfile], job_description: str = None) -> Dict:
+        """Score a resume (text or precomputed profile), optionally against a job description"""
+        profile = as_profile(resume)
+        quality = self._quality_scores(profile)
+        feedback = self._general_feedback(profile, quality)
+
+        if job_description:
+            return self._analyze_against_job(profile, build_profile(job_description), quality, feedback)
+
+        overall = _clamp(
+            0.35 * quality['content_quality_score']
+            + 0.25 * quality['structure_score']
+            + 0.25 * quality['completeness_score']
+            + 0.15 * quality['ats_compatibility']
+        )
+        missing_sections = [
+            SECTION_LABELS[section]
+            for section in ESSENTIAL_SECTIONS + ['certifications']
+            if section not in profile.sections
+        ]
+        return {
+            "overall_score": overall,
+            "content_quality_score": quality['content_quality_score'],
+            "structure_score": quality['structure_score'],
+            "completeness_score": quality['completeness_score'],
+            "strengths": feedback['strengths'],
+            "weaknesses": feedback['weaknesses'],
+            "recommendations": feedback['recommendations'],
+            "missing_sections": missing_sections,
+            "ats_compatibility": quality['ats_compatibility'],
+            "summary": f"Resume scores {overall}% overall based on structure, completeness and content quality."
+        }
+
+    # --- Resume vs job scoring -----------------------------------------------
+
+    def _match_components(self, resume: TextProfile, job: TextProfile) -> Dict:
+        similarity = TfidfIndex.cosine(
+            self.job_index.vectorize(resume.term_counts),
+            self.job_index.profile_vector(job)
+        )
+
+        required_skills = job.technical_skills
+        matched_skills = required_skills & resume.technical_skills
+        missing_skills = required_skills - resume.technical_skills
+        if required_skills:
+            skill_overlap = 100 * len(matched_skills) / len(required_skills)
+        else:
+            skill_overlap = 100 * min(1.0, similarity * 2)
+
+        if job.years_experience:
+            experience = 100 * min(1.0, resume.years_experience / job.years_experience)
+        else:
+            experience = 70 + min(resume.years_experience, 10) * 3
+        if 'experience' not in resume.sections and not resume.years_experience:
+            experience = min(experience, 40)
+
+        if job.education_level:
+            if resume.education_level >= job.education_level:
+                education = 100
+            else:
+                education = 100 - 25 * (job.education_level - resume.education_level)
+        else:
+            education = 80 if resume.education_level else 60
+
+        if job.soft_skills:
+            cultural = 50 + 50 * len(job.soft_skills & resume.soft_skills) / len(job.soft_skills)
+        else:
+            cultural = 60 + min(len(resume.soft_skills), 4) * 10
+
+        # Shared high-weight terms complement the lexicon for job-specific vocabulary
+        job_vector = self.job_index.profile_vector(job)
+        shared_terms = sorted(
+            (term for term in job_vector if term in resume.term_counts and not term.isdigit()),
+            key=lambda term: job_vector[term], reverse=True
+        )
+        missing_terms = sorted(
+            (term for term in job_vector if term not in resume.term_counts and not term.isdigit()),
+            key=lambda term: job_vector[term], reverse=True
+        )
+
+        return {
+            'similarity': similarity,
+            'matched_skills': sorted(matched_skills),
+            'missing_skills': sorted(missing_skills),
+            'skill_overlap': _clamp(skill_overlap),
+            'experience': _clamp(experience),
+            'education': _clamp(education),
+            'cultural': _clamp(cultural),
+            'shared_terms': shared_terms,
+            'missing_terms': missing_terms,
+        }
+
+    @staticmethod
+    def _combined_match_score(components: Dict) -> int:
+        return _clamp(
+            0.45 * components['skill_overlap']
+            + 0.25 * components['experience']
+            + 0.15 * components['education']
+            + 0.15 * 100 * min(1.0, components['similarity'] * 2)
+        )
+
+    def _analyze_against_job(self, resume: TextProfile, job: TextProfile, quality: Dict, feedback: Dict) -> Dict:
+        components = self._match_components(resume, job)
+        overall = self._combined_match_score(components)
+        keywords_found = components['matched_skills'] or components['shared_terms'][:10]
+        keywords_missing = components['missing_skills'] or components['missing_terms'][:10]
+        recommendations = list(feedback['recommendations'])
+        if components['missing_skills']:
+            recommendations.insert(0, f"Highlight experience with: {', '.join(components['missing_skills'][:5])}")
+        return {
+            "overall_score": overall,
+            "skills_match_score": components['skill_overlap'],
+            "experience_match_score": components['experience'],
+            "education_match_score": components['education'],
+            "strengths": feedback['strengths'],
+            "weaknesses": feedback['weaknesses'],
+            "missing_skills": components['missing_skills'],
+            "recommendations": recommendations,
+            "keywords_found": keywords_found,
+            "keywords_missing": keywords_missing[:10],
+            "ats_compatibility": quality['ats_compatibility'],
+            "summary": (
+                f"Resume shows {overall}% compatibility with this role, matching "
+                f"{len(components['matched_skills'])} of {len(components['matched_skills']) + len(components['missing_skills'])} "
+                f"required skills."
+            )
+        }
+
+    @staticmethod
+    def recommendation_label(score: int) -> str:
+        if score >= 80:
+            return "Strong Match"
+        if score >= 65:
+            return "Good Match"
+        if score >= 45:
+            return "Potential Match"
+        return "Poor Match"
+
+    def match(self, resume: Union[str, TextProfile], job_description: str) -> Dict:
+        """Score resume/job compatibility in the calculate_job_match_score shape"""
+        return self.match_profile(resume, build_profile(job_description or ""))
+
+    def match_profile(self, resume: Union[str, TextProfile], job: TextProfile) -> Dict:
+        """match() against an already-built (e.g. precomputed) job profile"""
+        components = self._match_components(as_profile(resume), job)
+        score = self._combined_match_score(components)
+        gap_analysis = [f"Missing required skill: {skill}" for skill in components['missing_skills']]
+        if components['experience'] < 70:
+            gap_analysis.append("Less experience than the role asks for")
+        if components['education'] < 100 and job.education_level:
+            gap_analysis.append("Education below the stated requirement")
+        return {
+            "match_score": score,
+            "skill_overlap": components['skill_overlap'],
+            "experience_relevance": components['experience'],
+            "education_fit": components['education'],
+            "cultural_fit_indicators": components['cultural'],
+            "matching_keywords": components['matched_skills'] or components['shared_terms'][:10],
+            "gap_analysis": gap_analysis,
+            "recommendation": self.recommendation_label(score)
+        }
+
+    def extract_skills(self, resume: Union[str, TextProfile]) -> Dict:
+        """Lexicon-based skills extraction in the extract_skills shape"""
+        profile = as_profile(resume)
+        return {
+            "technical_skills": sorted(profile.technical_skills),
+            "soft_skills": sorted(profile.soft_skills),
+            "certifications": sorted(profile.certifications),
+            "tools_and_technologies": []
+        }
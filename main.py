@@ -1,6 +1,10 @@
-from app import app
 import os
 
+# Spawned worker processes (PDF extraction, batch parsing) import this file
+# again as __mp_main__; only the real process builds the app
+if __name__ != '__mp_main__':
+    from app import app
+
 # For local development
 if __name__ == '__main__':
     # Use environment variable for debug to be safer in production
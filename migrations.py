@@ -0,0 +1,200 @@
+"""
+Schema migrations - versioned upgrades applied in order and recorded in schema_version
+"""
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, bindparam, func, inspect, select
+from sqlalchemy.schema import CreateColumn
+
+from analysis_cache import hash_text
+from app import db
+from gamification import user_stats_update
+from job_features import upsert_job_features
+from job_search import index_job_keywords
+from models import (Achievement, Analysis, Badge, Challenge, Job, JobFeatures, JobKeyword, Resume, ResumeFeatures, User,
+                    UserBadge, UserChallenge, XpDailyRollup, job_summary)
+
+logger = logging.getLogger(__name__)
+
+# Kept out of db.metadata so create_all() never owns the version table
+schema_version = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_date', DateTime, nullable=False)
+)
+
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register a migration; each runs in its own transaction, in version order"""
+    def register(function):
+        MIGRATIONS.append((version, description, function))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return function
+    return register
+
+def _column_names(conn, table_name):
+    return {column['name'] for column in inspect(conn).get_columns(table_name)}
+
+def _add_column(conn, column):
+    """ALTER TABLE ADD COLUMN from the model's definition, unless it already exists"""
+    if column.name in _column_names(conn, column.table.name):
+        return
+    table = conn.dialect.identifier_preparer.format_table(column.table)
+    conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {CreateColumn(column).compile(dialect=conn.dialect)}")
+
+def _create_index(conn, table, name):
+    """Create one of the model's declared indexes, unless it already exists"""
+    index = next(index for index in table.indexes if index.name == name)
+    index.create(conn, checkfirst=True)
+
+def _merge_duplicate_badges(conn):
+    """Point awards/challenges at the oldest badge of each name and drop the duplicates"""
+    badge, user_badge, challenge = Badge.__table__, UserBadge.__table__, Challenge.__table__
+    duplicate_names = conn.execute(
+        select(badge.c.name).group_by(badge.c.name).having(func.count() > 1)
+    ).scalars().all()
+    for name in duplicate_names:
+        ids = conn.execute(select(badge.c.id).where(badge.c.name == name).order_by(badge.c.id)).scalars().all()
+        keep, duplicates = ids[0], ids[1:]
+        conn.execute(user_badge.update().where(user_badge.c.badge_id.in_(duplicates)).values(badge_id=keep))
+        conn.execute(challenge.update().where(challenge.c.badge_reward_id.in_(duplicates)).values(badge_reward_id=keep))
+        conn.execute(badge.delete().where(badge.c.id.in_(duplicates)))
+
+def _delete_duplicate_user_badges(conn):
+    user_badge = UserBadge.__table__
+    first_awards = select(func.min(user_badge.c.id)).group_by(user_badge.c.user_id, user_badge.c.badge_id)
+    conn.execute(user_badge.delete().where(user_badge.c.id.not_in(first_awards.scalar_subquery())))
+
+def _backfill_content_hashes(conn, batch_size=200):
+    # Pre-hash uploads get content hashes so re-uploads of them are deduplicated;
+    # their raw bytes were never kept, so file_sha256 stays NULL
+    resume = Resume.__table__
+    update = resume.update().where(resume.c.id == bindparam('resume_id')).values(content_sha256=bindparam('content_hash'))
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(resume.c.id, resume.c.content)
+            .where(resume.c.content_sha256.is_(None), resume.c.id > last_id)
+            .order_by(resume.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return
+        conn.execute(update, [{'resume_id': row.id, 'content_hash': hash_text(row.content)} for row in rows])
+        last_id = rows[-1].id
+
+@migration(1, "Baseline schema")
+def create_baseline(conn):
+    # Creates only tables that don't exist yet; pre-migration databases keep theirs
+    db.metadata.create_all(conn, checkfirst=True)
+
+@migration(2, "Resume content hashes and user dashboard counters")
+def add_resume_hashes_and_user_counters(conn):
+    for column in (Resume.__table__.c.file_sha256, Resume.__table__.c.content_sha256):
+        _add_column(conn, column)
+    _create_index(conn, Resume.__table__, 'ix_resume_file_sha256')
+    _create_index(conn, Resume.__table__, 'ix_resume_content_sha256')
+    user = User.__table__
+    for column in (user.c.resume_count, user.c.analysis_count, user.c.badge_count,
+                   user.c.best_score, user.c.last_analysis_date):
+        _add_column(conn, column)
+    _backfill_content_hashes(conn)
+    # The counters are filled in by migration 3, once duplicate badge awards are gone
+
+@migration(3, "Indexes on foreign keys and lookup columns")
+def add_lookup_indexes(conn):
+    _merge_duplicate_badges(conn)
+    _delete_duplicate_user_badges(conn)
+    _create_index(conn, Badge.__table__, 'ix_badge_name')
+    _create_index(conn, UserBadge.__table__, 'ix_user_badge_user_id_badge_id')
+    _create_index(conn, Resume.__table__, 'ix_resume_user_id')
+    _create_index(conn, Analysis.__table__, 'ix_analysis_resume_id')
+    _create_index(conn, Analysis.__table__, 'ix_analysis_job_id')
+    _create_index(conn, Achievement.__table__, 'ix_achievement_user_id_created_date')
+    _create_index(conn, UserChallenge.__table__, 'ix_user_challenge_user_id_challenge_id')
+    # Same aggregate UPDATE as `flask repair-user-stats`: counters added in migration 2
+    # start from the deduplicated badges, analyses and resumes
+    conn.execute(user_stats_update())
+
+@migration(4, "Daily XP rollups")
+def add_xp_daily_rollups(conn):
+    XpDailyRollup.__table__.create(conn, checkfirst=True)
+
+def _backfill_job_summaries(conn, batch_size=500):
+    job = Job.__table__
+    rows = conn.execute(select(job.c.id, job.c.description).where(job.c.summary.is_(None))).all()
+    update = job.update().where(job.c.id == bindparam('job_id')).values(summary=bindparam('job_summary'))
+    for start in range(0, len(rows), batch_size):
+        conn.execute(update, [{'job_id': row.id, 'job_summary': job_summary(row.description)}
+                              for row in rows[start:start + batch_size]])
+
+@migration(5, "Job summaries, listing indexes and keyword search")
+def add_job_listing_search(conn):
+    job = Job.__table__
+    _add_column(conn, job.c.summary)
+    _backfill_job_summaries(conn)
+    # Keyset pagination orders by posted_date, which must be set
+    conn.execute(job.update().where(job.c.posted_date.is_(None)).values(posted_date=datetime.utcnow()))
+    _create_index(conn, job, 'ix_job_posted_date_id')
+    _create_index(conn, job, 'ix_job_company_lower')
+    JobKeyword.__table__.create(conn, checkfirst=True)
+    index_job_keywords(connection=conn)
+
+@migration(6, "Job external ids and precomputed match features")
+def add_job_ingestion(conn):
+    job = Job.__table__
+    _add_column(conn, job.c.external_id)
+    _create_index(conn, job, 'ix_job_external_id')
+    JobFeatures.__table__.create(conn, checkfirst=True)
+    upsert_job_features(connection=conn)
+
+@migration(7, "Precomputed resume features")
+def create_resume_features(conn):
+    # Not backfilled here: existing resumes are profiled from their text until
+    # idle workers or `flask recompute-resume-features` store their features
+    ResumeFeatures.__table__.create(conn, checkfirst=True)
+
+@migration(8, "Index job features by computed date")
+def index_job_features_computed_date(conn):
+    _create_index(conn, JobFeatures.__table__, 'ix_job_features_computed_date')
+
+def current_version(engine):
+    """Highest applied migration version (0 for an unversioned database)"""
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(schema_version.name):
+            return 0
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+def upgrade_database(engine=None):
+    """Apply pending migrations; returns the list of versions applied
+
+    A brand-new database gets the current schema from create_all() and is
+    stamped with every version, so only existing databases replay migrations.
+    """
+    engine = engine or db.engine
+    with engine.begin() as conn:
+        fresh = not inspect(conn).get_table_names()
+        schema_version.create(conn, checkfirst=True)
+        if fresh:
+            db.metadata.create_all(conn)
+            for version, description, _function in MIGRATIONS:
+                conn.execute(schema_version.insert().values(
+                    version=version, description=description, applied_date=datetime.utcnow()
+                ))
+            return [version for version, _description, _function in MIGRATIONS]
+
+    applied = []
+    current = current_version(engine)
+    for version, description, function in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        with engine.begin() as conn:
+            function(conn)
+            conn.execute(schema_version.insert().values(
+                version=version, description=description, applied_date=datetime.utcnow()
+            ))
+        applied.append(version)
+    return applied
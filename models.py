@@ -1,6 +1,7 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import Text, DateTime, Float, Integer, Boolean, JSON
+from sqlalchemy import Text, Date, DateTime, Float, Integer, Boolean, JSON
+from sqlalchemy.orm import deferred
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -14,31 +15,99 @@ class User(db.Model):
     last_activity = db.Column(DateTime, default=datetime.utcnow)
     avatar_config = db.Column(JSON, default={})
     created_date = db.Column(DateTime, default=datetime.utcnow)
+    
+    # Denormalized dashboard counters, maintained by GamificationService in the
+    # same transaction as the writes they count (`flask repair-user-stats` rebuilds them)
+    resume_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    analysis_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    badge_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    best_score = db.Column(Float, default=0, server_default='0', nullable=False)
+    last_analysis_date = db.Column(DateTime)
 
 class Resume(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
-    content = db.Column(Text, nullable=False)
+    # Deferred: listing/counting resumes must not pull their full text
+    content = deferred(db.Column(Text, nullable=False))
+    file_sha256 = db.Column(db.String(64), index=True)  # hash of the raw uploaded bytes
+    content_sha256 = db.Column(db.String(64), index=True)  # hash of the normalized extracted text
     upload_date = db.Column(DateTime, default=datetime.utcnow)
     current_score = db.Column(Float, default=0)
     
     user = db.relationship('User', backref='resumes')
     
+class ResumeFeatures(db.Model):
+    """Scoring features extracted from a resume's text at upload (see resume_features.py)"""
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, index=True)
+    sections = db.Column(JSON, nullable=False)  # canonical names of the sections present
+    technical_skills = db.Column(JSON, nullable=False)
+    soft_skills = db.Column(JSON, nullable=False)
+    certifications = db.Column(JSON, nullable=False)
+    years_experience = db.Column(db.Integer, default=0, nullable=False)
+    education_level = db.Column(db.Integer, default=0, nullable=False)
+    word_count = db.Column(db.Integer, default=0, nullable=False)
+    quantified = db.Column(db.Integer, default=0, nullable=False)  # measurable achievements
+    bullets = db.Column(db.Integer, default=0, nullable=False)
+    has_contact = db.Column(Boolean, default=False, nullable=False)
+    term_counts = db.Column(JSON, nullable=False)  # token -> count, for TF-IDF vectors
+    computed_date = db.Column(DateTime, default=datetime.utcnow)
+
+JOB_SUMMARY_CHARS = 300
+
+def job_summary(description):
+    """First JOB_SUMMARY_CHARS of a description, cut at a word boundary"""
+    description = ' '.join((description or '').split())
+    if len(description) <= JOB_SUMMARY_CHARS:
+        return description
+    return description[:JOB_SUMMARY_CHARS].rsplit(' ', 1)[0] + '...'
+
 class Job(db.Model):
+    # Listing order and keyset pagination (posted_date DESC, id DESC), and the company filter
+    __table_args__ = (
+        db.Index('ix_job_posted_date_id', 'posted_date', 'id'),
+        db.Index('ix_job_company_lower', db.func.lower(db.text('company'))),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
+    # Identifier from the source feed; ingestion upserts on it (NULL for jobs added by hand)
+    external_id = db.Column(db.String(200), unique=True, index=True)
     title = db.Column(db.String(200), nullable=False)
     company = db.Column(db.String(200), nullable=False)
-    description = db.Column(Text, nullable=False)
-    requirements = db.Column(Text, nullable=False)
+    # Deferred: list views read summary instead of the full text columns
+    description = deferred(db.Column(Text, nullable=False), group='job_text')
+    requirements = deferred(db.Column(Text, nullable=False), group='job_text')
+    summary = db.Column(db.String(JOB_SUMMARY_CHARS + 3),
+                        default=lambda context: job_summary(context.get_current_parameters().get('description')))
     location = db.Column(db.String(100))
     posted_date = db.Column(DateTime, default=datetime.utcnow)
+
+class JobFeatures(db.Model):
+    """Matching features precomputed from a job's text when it is ingested (see job_features.py)"""
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    technical_skills = db.Column(JSON, nullable=False)
+    soft_skills = db.Column(JSON, nullable=False)
+    certifications = db.Column(JSON, nullable=False)
+    years_experience = db.Column(db.Integer, default=0, nullable=False)
+    education_level = db.Column(db.Integer, default=0, nullable=False)
+    term_counts = db.Column(JSON, nullable=False)  # token -> count, for TF-IDF vectors
+    computed_date = db.Column(DateTime, default=datetime.utcnow, index=True)
+
+class JobKeyword(db.Model):
+    """Inverted index of job text tokens, backing keyword search on /jobs"""
+    __table_args__ = (db.Index('ix_job_keyword_keyword_job_id', 'keyword', 'job_id', unique=True),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id', ondelete='CASCADE'), nullable=False, index=True)
+    keyword = db.Column(db.String(64), nullable=False)
     
 class Analysis(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), nullable=False)
-    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=True)
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), nullable=False, index=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), nullable=True, index=True)
     overall_score = db.Column(Float, nullable=False)
     skills_match_score = db.Column(Float)
     experience_match_score = db.Column(Float)
@@ -53,7 +122,7 @@ class Analysis(db.Model):
 
 class Badge(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, unique=True, index=True)
     description = db.Column(Text, nullable=False)
     icon = db.Column(db.String(100), nullable=False)
     category = db.Column(db.String(50), nullable=False)  # skill, achievement, milestone, special
@@ -63,6 +132,9 @@ class Badge(db.Model):
     created_date = db.Column(DateTime, default=datetime.utcnow)
 
 class UserBadge(db.Model):
+    # Unique so concurrent awards of the same badge can't both succeed
+    __table_args__ = (db.Index('ix_user_badge_user_id_badge_id', 'user_id', 'badge_id', unique=True),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     badge_id = db.Column(db.Integer, db.ForeignKey('badge.id'), nullable=False)
@@ -86,6 +158,8 @@ class Challenge(db.Model):
     badge_reward = db.relationship('Badge', backref='challenges')
 
 class UserChallenge(db.Model):
+    __table_args__ = (db.Index('ix_user_challenge_user_id_challenge_id', 'user_id', 'challenge_id'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     challenge_id = db.Column(db.Integer, db.ForeignKey('challenge.id'), nullable=False)
@@ -97,6 +171,9 @@ class UserChallenge(db.Model):
     challenge = db.relationship('Challenge', backref='user_challenges')
 
 class Achievement(db.Model):
+    # Serves both per-user lookups and per-user history ordered by date
+    __table_args__ = (db.Index('ix_achievement_user_id_created_date', 'user_id', 'created_date'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     achievement_type = db.Column(db.String(100), nullable=False)
@@ -105,3 +182,30 @@ class Achievement(db.Model):
     created_date = db.Column(DateTime, default=datetime.utcnow)
     
     user = db.relationship('User', backref='achievements')
+
+class XpDailyRollup(db.Model):
+    """Per-user, per-day XP totals summarized from Achievement rows past their retention"""
+    __table_args__ = (db.Index('ix_xp_daily_rollup_user_id_day', 'user_id', 'day', unique=True),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(Date, nullable=False)
+    xp_earned = db.Column(db.Integer, default=0, nullable=False)
+    event_count = db.Column(db.Integer, default=0, nullable=False)
+
+class AnalysisTask(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    resume_id = db.Column(db.Integer, db.ForeignKey('resume.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    job_description = db.Column(Text)
+    status = db.Column(db.String(20), default='pending', nullable=False, index=True)  # pending, running, completed, failed
+    attempts = db.Column(db.Integer, default=0)
+    analysis_id = db.Column(db.Integer, db.ForeignKey('analysis.id'), nullable=True)
+    result = db.Column(JSON)  # analysis_data, level_up_data, achievements
+    error = db.Column(Text)
+    created_date = db.Column(DateTime, default=datetime.utcnow)
+    started_date = db.Column(DateTime)
+    completed_date = db.Column(DateTime)
+    
+    resume = db.relationship('Resume', backref='analysis_tasks')
+    analysis = db.relationship('Analysis')
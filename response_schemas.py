@@ -0,0 +1,94 @@
+"""
+Response Schemas - JSON shapes requested from the model, and validation of what comes back
+"""
+from typing import Dict, List, Tuple
+
+# (field, type, description shown to the model); type is 'number', 'string' or 'list'
+Field = Tuple[str, str, str]
+
+SCORE = 'number (0-100)'
+
+ANALYSIS_JOB_FIELDS: List[Field] = [
+    ('overall_score', 'number', SCORE),
+    ('summary', 'string', '"brief summary of the analysis"'),
+    ('skills_match_score', 'number', SCORE),
+    ('experience_match_score', 'number', SCORE),
+    ('education_match_score', 'number', SCORE),
+    ('strengths', 'list', '["list of strengths"]'),
+    ('weaknesses', 'list', '["list of areas for improvement"]'),
+    ('missing_skills', 'list', '["list of skills missing from resume"]'),
+    ('recommendations', 'list', '["list of specific recommendations"]'),
+    ('keywords_found', 'list', '["list of relevant keywords found"]'),
+    ('keywords_missing', 'list', '["list of important keywords missing"]'),
+    ('ats_compatibility', 'number', SCORE),
+]
+
+ANALYSIS_GENERAL_FIELDS: List[Field] = [
+    ('overall_score', 'number', SCORE),
+    ('summary', 'string', '"brief summary of the analysis"'),
+    ('content_quality_score', 'number', SCORE),
+    ('structure_score', 'number', SCORE),
+    ('completeness_score', 'number', SCORE),
+    ('strengths', 'list', '["list of strengths"]'),
+    ('weaknesses', 'list', '["list of areas for improvement"]'),
+    ('recommendations', 'list', '["list of specific recommendations"]'),
+    ('missing_sections', 'list', '["list of missing resume sections"]'),
+    ('ats_compatibility', 'number', SCORE),
+]
+
+SKILLS_FIELDS: List[Field] = [
+    ('technical_skills', 'list', '["list of technical skills"]'),
+    ('soft_skills', 'list', '["list of soft skills"]'),
+    ('certifications', 'list', '["list of certifications"]'),
+    ('tools_and_technologies', 'list', '["list of tools and technologies"]'),
+]
+
+MATCH_FIELDS: List[Field] = [
+    ('match_score', 'number', SCORE),
+    ('skill_overlap', 'number', SCORE),
+    ('experience_relevance', 'number', SCORE),
+    ('education_fit', 'number', SCORE),
+    ('cultural_fit_indicators', 'number', SCORE),
+    ('matching_keywords', 'list', '["list of matching keywords"]'),
+    ('gap_analysis', 'list', '["list of gaps or missing requirements"]'),
+    ('recommendation', 'string', '"overall recommendation (Strong Match/Good Match/Potential Match/Poor Match)"'),
+]
+
+def render_schema(fields: List[Field], indent: int = 0) -> str:
+    """Render fields as the JSON-like schema text used in prompts"""
+    pad = " " * indent
+    lines = [f'{pad}    "{name}": {description}' for name, _kind, description in fields]
+    return "{\n" + ",\n".join(lines) + f"\n{pad}}}"
+
+def _coerce(value, kind):
+    """Return value as kind, or None if it can't be"""
+    if kind == 'number':
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, (int, float)):
+            return value
+        try:
+            return float(str(value).strip().rstrip('%'))
+        except ValueError:
+            return None
+    if kind == 'list':
+        if isinstance(value, str):
+            return [value] if value.strip() else []
+        if not isinstance(value, list):
+            return None
+        return [str(item) for item in value if isinstance(item, (str, int, float)) and not isinstance(item, bool)]
+    return value if isinstance(value, str) else None
+
+def validate_section(value, fields: List[Field]) -> Tuple[Dict, List[str]]:
+    """Coerce a model-returned section to its schema; returns (valid fields, names missing or invalid)"""
+    if not isinstance(value, dict):
+        return {}, [name for name, _kind, _description in fields]
+    valid = {}
+    missing = []
+    for name, kind, _description in fields:
+        coerced = _coerce(value.get(name), kind) if name in value else None
+        if coerced is None:
+            missing.append(name)
+        else:
+            valid[name] = coerced
+    return valid, missing
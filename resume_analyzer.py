@@ -1,204 +1,237 @@
-import json
+import asyncio
 import os
 import logging
-from typing import Dict, List, Optional
-from openai import OpenAI
+import textwrap
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from analysis_cache import make_cache_key
+from local_scorer import LocalScorer, TextProfile
+from json_stream import IncrementalJSONObjectParser
+from llm_client import AsyncLLMClient, LLMError, background_loop
+from response_schemas import (ANALYSIS_GENERAL_FIELDS, ANALYSIS_JOB_FIELDS, MATCH_FIELDS, SKILLS_FIELDS,
+                              render_schema, validate_section)
+from text_compaction import compact_text, estimate_tokens
 
 logger = logging.getLogger(__name__)
 
-class ResumeAnalyzer:
-    """AI-powered resume analyzer using OpenAI API"""
+class AsyncResumeAnalyzer:
+    """AI-powered resume analyzer using OpenAI API (async; see ResumeAnalyzer for sync callers)"""
+    
+    # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+    # do not change this unless explicitly requested by the user
+    MODEL = "gpt-4o"
+    
+    # Bump a prompt version whenever its prompt or output schema changes so
+    # cached results produced by the old prompt are no longer served.
+    PROMPT_VERSIONS = {
+        'analyze_resume': '3',
+        'extract_skills': '2',
+        'calculate_job_match_score': '2'
+    }
     
-    def __init__(self):
-        self.openai_client = OpenAI(
-            api_key=os.environ.get("OPENAI_API_KEY", "your-openai-api-key")
+    # Sections of a combined review, and the single-section method each one mirrors
+    REVIEW_SECTIONS = {
+        'analysis': 'analyze_resume',
+        'skills': 'extract_skills',
+        'match': 'calculate_job_match_score'
+    }
+    
+    def __init__(self, cache=None, local_scorer=None, client=None, resume_token_budget=3000, job_token_budget=1500):
+        self.client = client or AsyncLLMClient(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            base_url=os.environ.get("OPENAI_BASE_URL")
         )
+        self.cache = cache
+        self.local_scorer = local_scorer or LocalScorer()
+        self.resume_token_budget = resume_token_budget
+        self.job_token_budget = job_token_budget
+        self.compaction_stats = {'calls': 0, 'original_tokens': 0, 'prompt_tokens': 0}
+    
+    def _has_api_key(self) -> bool:
+        return self.client.enabled
+    
+    def _compact(self, method: str, resume_text: str, job_text: str = None) -> Tuple[str, Optional[str]]:
+        """Compact resume/job text to their token budgets and record the tokens saved"""
+        resume = compact_text(resume_text, self.resume_token_budget)
+        job = compact_text(job_text, self.job_token_budget) if job_text else None
+        original = resume.original_tokens + (job.original_tokens if job else 0)
+        compacted = resume.tokens + (job.tokens if job else 0)
+        
+        self.compaction_stats['calls'] += 1
+        self.compaction_stats['original_tokens'] += original
+        self.compaction_stats['prompt_tokens'] += compacted
+        logger.info(f"{method}: prompt text compacted from ~{original} to ~{compacted} tokens ({original - compacted} saved)")
+        return resume.text, job.text if job else None
+    
+    def stats(self) -> Dict:
+        stats = dict(self.compaction_stats)
+        stats['tokens_saved'] = stats['original_tokens'] - stats['prompt_tokens']
+        return stats
+    
+    def _cache_key(self, method: str, resume_text: str, job_text: str = None) -> str:
+        return make_cache_key(method, self.MODEL, self.PROMPT_VERSIONS[method], resume_text, job_text)
+    
+    # Cache tiers and local scoring block (SQLite I/O, CPU), so they run off the event loop
+    async def _cache_get(self, key: str) -> Optional[Dict]:
+        if self.cache is None:
+            return None
+        return await asyncio.to_thread(self.cache.get, key)
+    
+    async def _cache_set(self, key: str, result: Dict) -> None:
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.set, key, result)
+    
+    def _analysis_messages(self, resume_text: str, job_description: str = None) -> List[Dict]:
+        """Build the chat messages for a resume analysis"""
+        # Summary is requested early so streamed responses show useful text first
+        if job_description:
+            prompt = textwrap.dedent("""
+            Analyze the following resume against the job description and provide a comprehensive analysis.
+            
+            RESUME:
+            {resume_text}
+            
+            JOB DESCRIPTION:
+            {job_description}
+            
+            Please provide analysis in JSON format with the following structure:
+            {schema}
+            """).strip().format(job_description=job_description, resume_text=resume_text,
+                                 schema=render_schema(ANALYSIS_JOB_FIELDS))
+        else:
+            prompt = textwrap.dedent("""
+            Analyze the following resume and provide a comprehensive analysis focusing on overall quality, structure, and content.
+            
+            RESUME:
+            {resume_text}
+            
+            Please provide analysis in JSON format with the following structure:
+            {schema}
+            """).strip().format(resume_text=resume_text, schema=render_schema(ANALYSIS_GENERAL_FIELDS))
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert HR professional and resume analyst. Provide detailed, actionable feedback to help improve resumes and job match compatibility."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
     
-    def analyze_resume(self, resume_text: str, job_description: str = None) -> Dict:
-        """Analyze resume content and provide scoring and recommendations"""
+    async def analyze_resume(self, resume_text: str, job_description: str = None,
+                             resume_profile: TextProfile = None) -> Dict:
+        """Analyze resume content and provide scoring and recommendations
+        
+        resume_profile optionally carries the resume's precomputed features
+        (resume_features.py), used by the local scorer instead of resume_text.
+        """
         
         # Check if API key is available and valid
-        api_key = os.environ.get("OPENAI_API_KEY", "")
-        if not api_key or api_key == "your-openai-api-key" or len(api_key) < 20:
+        if not self._has_api_key():
             logger.warning("OpenAI API key not configured properly")
-            return self._get_mock_analysis(resume_text, job_description)
+            return await self._get_mock_analysis(resume_text, job_description, resume_profile)
+        
+        prompt_resume, prompt_job = self._compact('analyze_resume', resume_text, job_description)
+        cache_key = self._cache_key('analyze_resume', prompt_resume, prompt_job)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            # Prepare the analysis prompt
-            if job_description:
-                prompt = f"""
-                Analyze the following resume against the job description and provide a comprehensive analysis.
-                
-                RESUME:
-                {resume_text}
-                
-                JOB DESCRIPTION:
-                {job_description}
-                
-                Please provide analysis in JSON format with the following structure:
-                {{
-                    "overall_score": number (0-100),
-                    "skills_match_score": number (0-100),
-                    "experience_match_score": number (0-100),
-                    "education_match_score": number (0-100),
-                    "strengths": ["list of strengths"],
-                    "weaknesses": ["list of areas for improvement"],
-                    "missing_skills": ["list of skills missing from resume"],
-                    "recommendations": ["list of specific recommendations"],
-                    "keywords_found": ["list of relevant keywords found"],
-                    "keywords_missing": ["list of important keywords missing"],
-                    "ats_compatibility": number (0-100),
-                    "summary": "brief summary of the analysis"
-                }}
-                """
-            else:
-                prompt = f"""
-                Analyze the following resume and provide a comprehensive analysis focusing on overall quality, structure, and content.
-                
-                RESUME:
-                {resume_text}
-                
-                Please provide analysis in JSON format with the following structure:
-                {{
-                    "overall_score": number (0-100),
-                    "content_quality_score": number (0-100),
-                    "structure_score": number (0-100),
-                    "completeness_score": number (0-100),
-                    "strengths": ["list of strengths"],
-                    "weaknesses": ["list of areas for improvement"],
-                    "recommendations": ["list of specific recommendations"],
-                    "missing_sections": ["list of missing resume sections"],
-                    "ats_compatibility": number (0-100),
-                    "summary": "brief summary of the analysis"
-                }}
-                """
-            
-            # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            # do not change this unless explicitly requested by the user
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert HR professional and resume analyst. Provide detailed, actionable feedback to help improve resumes and job match compatibility."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3
+            result = await self.client.complete_json(
+                self.MODEL, self._analysis_messages(prompt_resume, prompt_job), temperature=0.3
             )
-            
-            result = json.loads(response.choices[0].message.content)
+            await self._cache_set(cache_key, result)
             return result
             
-        except Exception as e:
+        except LLMError as e:
             logger.error(f"Error analyzing resume: {str(e)}")
             # Fall back to mock analysis if API fails
-            return self._get_mock_analysis(resume_text, job_description)
+            return await self._get_mock_analysis(resume_text, job_description, resume_profile)
     
-    def _get_mock_analysis(self, resume_text: str, job_description: str = None) -> Dict:
-        """Provide a mock analysis when OpenAI API is unavailable"""
-        
-        # Basic text analysis for mock scoring
-        word_count = len(resume_text.split())
-        has_experience = any(keyword in resume_text.lower() for keyword in ['experience', 'worked', 'developed', 'managed', 'led'])
-        has_skills = any(keyword in resume_text.lower() for keyword in ['python', 'javascript', 'java', 'react', 'sql', 'aws'])
-        has_education = any(keyword in resume_text.lower() for keyword in ['degree', 'university', 'college', 'bachelor', 'master', 'phd'])
+    async def analyze_resume_stream(self, resume_text: str, job_description: str = None,
+                                    resume_profile: TextProfile = None) -> AsyncIterator[Tuple[str, object]]:
+        """Stream an analysis, yielding ('field', (name, value)) as fields complete and ('result', dict) last"""
+        result = None
+        if self._has_api_key():
+            prompt_resume, prompt_job = self._compact('analyze_resume', resume_text, job_description)
+            cache_key = self._cache_key('analyze_resume', prompt_resume, prompt_job)
+            result = await self._cache_get(cache_key)
+        else:
+            logger.warning("OpenAI API key not configured properly")
+            cache_key = None
+            result = await self._get_mock_analysis(resume_text, job_description, resume_profile)
         
-        # Calculate mock scores based on content
-        base_score = 60
-        if word_count > 200: base_score += 10
-        if has_experience: base_score += 15
-        if has_skills: base_score += 10
-        if has_education: base_score += 5
+        if result is not None:
+            for field in result.items():
+                yield 'field', field
+            yield 'result', result
+            return
         
-        overall_score = min(base_score, 95)  # Cap at 95 for mock
+        streamed = {}
+        try:
+            parser = IncrementalJSONObjectParser()
+            async for delta in self.client.stream_json(
+                self.MODEL, self._analysis_messages(prompt_resume, prompt_job), temperature=0.3
+            ):
+                for name, value in parser.feed(delta):
+                    streamed[name] = value
+                    yield 'field', (name, value)
+        except LLMError as e:
+            logger.error(f"Error streaming resume analysis: {str(e)}")
         
-        if job_description:
-            # Job-specific analysis
-            return {
-                "overall_score": overall_score,
-                "skills_match_score": overall_score - 5,
-                "experience_match_score": overall_score - 3,
-                "education_match_score": overall_score - 2,
-                "strengths": [
-                    "Resume contains relevant experience" if has_experience else "Clear presentation of background",
-                    "Technical skills mentioned" if has_skills else "Professional formatting",
-                    "Education background provided" if has_education else "Adequate length"
-                ],
-                "weaknesses": [
-                    "Could benefit from more specific achievements",
-                    "Consider adding quantifiable results"
-                ],
-                "missing_skills": [
-                    "Cloud computing experience",
-                    "Leadership examples"
-                ],
-                "recommendations": [
-                    "Add specific metrics and achievements",
-                    "Include more technical keywords",
-                    "Highlight relevant project outcomes"
-                ],
-                "keywords_found": ["experience", "skills"] if has_experience and has_skills else ["professional"],
-                "keywords_missing": ["leadership", "metrics", "achievements"],
-                "ats_compatibility": overall_score - 10,
-                "summary": f"Resume shows {overall_score}% compatibility. Consider enhancing with more specific achievements and metrics."
-            }
+        # A truncated or malformed stream is completed from the local analysis
+        # (re-sending the corrected fields) and, being a mix, never cached
+        result, missing = validate_section(streamed, self._section_fields('analysis', job_description))
+        if missing:
+            logger.warning(f"Streamed analysis fields filled locally: {missing}")
+            fallback = await self._get_mock_analysis(resume_text, job_description, resume_profile)
+            for name, value in fallback.items():
+                if name not in result:
+                    result[name] = value
+                    yield 'field', (name, value)
         else:
-            # General analysis
-            return {
-                "overall_score": overall_score,
-                "content_quality_score": overall_score - 3,
-                "structure_score": overall_score - 5,
-                "completeness_score": overall_score - 2,
-                "strengths": [
-                    "Professional presentation",
-                    "Relevant experience mentioned" if has_experience else "Clear structure",
-                    "Technical skills included" if has_skills else "Appropriate length"
-                ],
-                "weaknesses": [
-                    "Could include more quantifiable achievements",
-                    "Consider adding more specific details"
-                ],
-                "recommendations": [
-                    "Add specific metrics and numbers to achievements",
-                    "Include more action verbs in experience descriptions",
-                    "Consider adding a professional summary section"
-                ],
-                "missing_sections": [
-                    "Professional summary" if "summary" not in resume_text.lower() else None,
-                    "Certifications" if "certification" not in resume_text.lower() else None
-                ],
-                "ats_compatibility": overall_score - 8,
-                "summary": f"Resume scores {overall_score}% overall. Focus on adding specific achievements and improving ATS compatibility."
-            }
+            await self._cache_set(cache_key, result)
+        yield 'result', result
     
-    def extract_skills(self, resume_text: str) -> List[str]:
+    @staticmethod
+    def _local_resume(resume_text: str, resume_profile: TextProfile = None):
+        # The local scorer takes either; a precomputed profile skips re-profiling the text
+        return resume_profile if resume_profile is not None else resume_text
+    
+    async def _get_mock_analysis(self, resume_text: str, job_description: str = None,
+                                 resume_profile: TextProfile = None) -> Dict:
+        """Provide a local, deterministic analysis when OpenAI API is unavailable"""
+        return await asyncio.to_thread(
+            self.local_scorer.analyze, self._local_resume(resume_text, resume_profile), job_description
+        )
+    
+    async def extract_skills(self, resume_text: str, resume_profile: TextProfile = None) -> List[str]:
         """Extract skills from resume text"""
+        if not self._has_api_key():
+            return await asyncio.to_thread(self.local_scorer.extract_skills, self._local_resume(resume_text, resume_profile))
+        
+        prompt_resume, _ = self._compact('extract_skills', resume_text)
+        cache_key = self._cache_key('extract_skills', prompt_resume)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            prompt = f"""
+            prompt = textwrap.dedent("""
             Extract all technical skills, soft skills, and competencies from the following resume text.
             
             RESUME:
             {resume_text}
             
             Please provide the skills in JSON format:
-            {{
-                "technical_skills": ["list of technical skills"],
-                "soft_skills": ["list of soft skills"],
-                "certifications": ["list of certifications"],
-                "tools_and_technologies": ["list of tools and technologies"]
-            }}
-            """
+            {schema}
+            """).strip().format(resume_text=prompt_resume, schema=render_schema(SKILLS_FIELDS))
             
-            # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            # do not change this unless explicitly requested by the user
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            result = await self.client.complete_json(
+                self.MODEL,
+                [
                     {
                         "role": "system",
                         "content": "You are an expert at extracting and categorizing skills from resumes."
@@ -208,21 +241,41 @@ class ResumeAnalyzer:
                         "content": prompt
                     }
                 ],
-                response_format={"type": "json_object"},
                 temperature=0.1
             )
-            
-            result = json.loads(response.choices[0].message.content)
+            await self._cache_set(cache_key, result)
             return result
             
-        except Exception as e:
+        except LLMError as e:
             logger.error(f"Error extracting skills: {str(e)}")
-            return {"technical_skills": [], "soft_skills": [], "certifications": [], "tools_and_technologies": []}
+            return await asyncio.to_thread(self.local_scorer.extract_skills, self._local_resume(resume_text, resume_profile))
+    
+    async def _local_match(self, resume_text: str, job_description: str, job_profile: TextProfile = None,
+                           resume_profile: TextProfile = None) -> Dict:
+        """Local match score, from precomputed profiles where there are any"""
+        resume = self._local_resume(resume_text, resume_profile)
+        if job_profile is not None:
+            return await asyncio.to_thread(self.local_scorer.match_profile, resume, job_profile)
+        return await asyncio.to_thread(self.local_scorer.match, resume, job_description)
     
-    def calculate_job_match_score(self, resume_text: str, job_description: str) -> Dict:
-        """Calculate compatibility score between resume and job"""
+    async def calculate_job_match_score(self, resume_text: str, job_description: str,
+                                        job_profile: TextProfile = None, resume_profile: TextProfile = None) -> Dict:
+        """Calculate compatibility score between resume and job
+        
+        job_profile and resume_profile optionally carry precomputed features,
+        used by the local scorer instead of re-profiling the texts.
+        """
+        if not self._has_api_key():
+            return await self._local_match(resume_text, job_description, job_profile, resume_profile)
+        
+        prompt_resume, prompt_job = self._compact('calculate_job_match_score', resume_text, job_description)
+        cache_key = self._cache_key('calculate_job_match_score', prompt_resume, prompt_job)
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            prompt = f"""
+            prompt = textwrap.dedent("""
             Calculate the compatibility score between the following resume and job description.
             
             RESUME:
@@ -232,23 +285,13 @@ class ResumeAnalyzer:
             {job_description}
             
             Please provide the match analysis in JSON format:
-            {{
-                "match_score": number (0-100),
-                "skill_overlap": number (0-100),
-                "experience_relevance": number (0-100),
-                "education_fit": number (0-100),
-                "cultural_fit_indicators": number (0-100),
-                "matching_keywords": ["list of matching keywords"],
-                "gap_analysis": ["list of gaps or missing requirements"],
-                "recommendation": "overall recommendation (Strong Match/Good Match/Potential Match/Poor Match)"
-            }}
-            """
+            {schema}
+            """).strip().format(resume_text=prompt_resume, job_description=prompt_job,
+                                 schema=render_schema(MATCH_FIELDS))
             
-            # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            # do not change this unless explicitly requested by the user
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            result = await self.client.complete_json(
+                self.MODEL,
+                [
                     {
                         "role": "system",
                         "content": "You are an expert recruiter analyzing job-candidate compatibility."
@@ -258,16 +301,315 @@ class ResumeAnalyzer:
                         "content": prompt
                     }
                 ],
-                response_format={"type": "json_object"},
                 temperature=0.2
             )
-            
-            result = json.loads(response.choices[0].message.content)
+            await self._cache_set(cache_key, result)
             return result
             
-        except Exception as e:
+        except LLMError as e:
             logger.error(f"Error calculating job match: {str(e)}")
-            raise Exception(f"Failed to calculate job match score: {str(e)}")
+            # Fall back to local scoring if API fails
+            return await self._local_match(resume_text, job_description, job_profile, resume_profile)
+    
+    @staticmethod
+    def chunk_jobs(job_tokens: List[int], batch_size: int, token_budget: int) -> List[List[int]]:
+        """Group job indexes into chunks of at most batch_size jobs and token_budget job tokens
+        
+        A job larger than the budget still gets a chunk of its own.
+        """
+        chunks = []
+        current = []
+        used = 0
+        for index, tokens in enumerate(job_tokens):
+            if current and (len(current) >= batch_size or used + tokens > token_budget):
+                chunks.append(current)
+                current = []
+                used = 0
+            current.append(index)
+            used += tokens
+        if current:
+            chunks.append(current)
+        return chunks
+    
+    def _batch_match_messages(self, resume_text: str, job_texts: List[str]) -> List[Dict]:
+        """Build the chat messages for matching one resume against several jobs"""
+        jobs = "\n\n".join(f"JOB {number}:\n{text}" for number, text in enumerate(job_texts, 1))
+        fields = [('job', 'number', 'number (the JOB number)')] + MATCH_FIELDS
+        prompt = textwrap.dedent("""
+        Calculate the compatibility score between the following resume and each of the {count} job descriptions.
+        
+        RESUME:
+        {resume_text}
+        
+        {jobs}
+        
+        Please provide one match analysis per job, in job order, in JSON format:
+        {{
+            "matches": [
+                {schema}
+            ]
+        }}
+        """).strip().format(count=len(job_texts), resume_text=resume_text, jobs=jobs,
+                             schema=render_schema(fields, indent=8))
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert recruiter analyzing job-candidate compatibility."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    async def _match_chunk(self, resume_text: str, prompt_resume: str, job_descriptions: List[str],
+                           prompt_jobs: List[str], cache_keys: List[str], job_profiles: List[TextProfile],
+                           resume_profile: TextProfile = None) -> List[Dict]:
+        """Match one chunk in a single call; jobs whose entry is missing or invalid are retried one by one"""
+        matches = {}
+        try:
+            response = await self.client.complete_json(
+                self.MODEL, self._batch_match_messages(prompt_resume, prompt_jobs), temperature=0.2
+            )
+            entries = response.get('matches') if isinstance(response, dict) else None
+            for position, entry in enumerate(entries if isinstance(entries, list) else []):
+                number = entry.get('job') if isinstance(entry, dict) else None
+                # Trust the echoed job number when it is in range, else the entry's position
+                in_range = isinstance(number, (int, float)) and not isinstance(number, bool) and 1 <= number <= len(prompt_jobs)
+                index = int(number) - 1 if in_range else position
+                valid, missing = validate_section(entry, MATCH_FIELDS)
+                if not missing and index < len(prompt_jobs) and index not in matches:
+                    matches[index] = valid
+        except LLMError as e:
+            logger.error(f"Error in batched job match: {str(e)}")
+        
+        for index, match in matches.items():
+            await self._cache_set(cache_keys[index], match)
+        retry = [index for index in range(len(prompt_jobs)) if index not in matches]
+        if retry:
+            logger.warning(f"Batched job match returned {len(matches)}/{len(prompt_jobs)} valid results, matching the rest one by one")
+            results = await asyncio.gather(*(
+                self.calculate_job_match_score(resume_text, job_descriptions[index], job_profiles[index], resume_profile)
+                for index in retry
+            ))
+            matches.update(zip(retry, results))
+        return [matches[index] for index in range(len(prompt_jobs))]
+    
+    async def _match_chunk_or_local(self, chunk_timeout: Optional[float], resume_text: str, prompt_resume: str,
+                                    job_descriptions: List[str], prompt_jobs: List[str], cache_keys: List[str],
+                                    job_profiles: List[TextProfile], resume_profile: TextProfile = None) -> List[Dict]:
+        """_match_chunk within chunk_timeout seconds; on timeout the chunk is cancelled and scored locally"""
+        try:
+            return await asyncio.wait_for(
+                self._match_chunk(resume_text, prompt_resume, job_descriptions, prompt_jobs, cache_keys,
+                                  job_profiles, resume_profile),
+                chunk_timeout
+            )
+        except asyncio.TimeoutError:
+            logger.error(f"Batched job match timed out after {chunk_timeout}s, scoring {len(job_descriptions)} jobs locally")
+            return [await self._local_match(resume_text, job, profile, resume_profile)
+                    for job, profile in zip(job_descriptions, job_profiles)]
+    
+    async def _match_one_or_local(self, call_timeout: Optional[float], semaphore: asyncio.Semaphore,
+                                  resume_text: str, job_description: str, job_profile: TextProfile = None,
+                                  resume_profile: TextProfile = None) -> Dict:
+        """calculate_job_match_score within call_timeout seconds; on timeout the call is cancelled and scored locally"""
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(
+                    self.calculate_job_match_score(resume_text, job_description, job_profile, resume_profile),
+                    call_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.error(f"Job match timed out after {call_timeout}s, scoring the job locally")
+        return await self._local_match(resume_text, job_description, job_profile, resume_profile)
+    
+    async def match_jobs(self, resume_text: str, job_descriptions: List[str],
+                         job_profiles: List[TextProfile] = None, resume_profile: TextProfile = None,
+                         call_timeout: float = None, max_concurrency: int = 8) -> List[Dict]:
+        """Match a resume against several jobs with one call per job
+        
+        At most max_concurrency calls are in flight. Each call that runs past
+        call_timeout seconds is cancelled, so it stops holding rate-limit
+        tokens, and its job gets a local score. Results come back in
+        job_descriptions order.
+        """
+        job_profiles = job_profiles or [None] * len(job_descriptions)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        return list(await asyncio.gather(*(
+            self._match_one_or_local(call_timeout, semaphore, resume_text, job, profile, resume_profile)
+            for job, profile in zip(job_descriptions, job_profiles)
+        )))
+    
+    async def match_jobs_batch(self, resume_text: str, job_descriptions: List[str],
+                               batch_size: int = 5, token_budget: int = 6000,
+                               job_profiles: List[TextProfile] = None, resume_profile: TextProfile = None,
+                               chunk_timeout: float = None) -> List[Dict]:
+        """Match a resume against several jobs, sending the resume once per chunk of jobs
+        
+        Chunks hold at most batch_size jobs and token_budget job tokens.
+        Results come back in job_descriptions order, in the
+        calculate_job_match_score shape, and share its cache entries.
+        job_profiles, parallel to job_descriptions, may hold precomputed
+        profiles (or None) for the local scorer, as resume_profile may for
+        the resume. A chunk still running after chunk_timeout seconds is
+        cancelled and only its jobs get local scores.
+        """
+        job_profiles = job_profiles or [None] * len(job_descriptions)
+        if not self._has_api_key():
+            return [await self._local_match(resume_text, job, profile, resume_profile)
+                    for job, profile in zip(job_descriptions, job_profiles)]
+        
+        prompt_resume, _ = self._compact('match_jobs_batch', resume_text)
+        prompt_jobs = [compact_text(job, self.job_token_budget).text for job in job_descriptions]
+        cache_keys = [self._cache_key('calculate_job_match_score', prompt_resume, job) for job in prompt_jobs]
+        
+        results = [await self._cache_get(key) for key in cache_keys]
+        pending = [index for index, result in enumerate(results) if result is None]
+        chunks = self.chunk_jobs([estimate_tokens(prompt_jobs[index]) for index in pending], max(1, batch_size), token_budget)
+        chunks = [[pending[position] for position in chunk] for chunk in chunks]
+        
+        chunk_results = await asyncio.gather(*(
+            self._match_chunk_or_local(chunk_timeout, resume_text, prompt_resume,
+                                       [job_descriptions[index] for index in chunk],
+                                       [prompt_jobs[index] for index in chunk], [cache_keys[index] for index in chunk],
+                                       [job_profiles[index] for index in chunk], resume_profile)
+            for chunk in chunks
+        ))
+        for chunk, matches in zip(chunks, chunk_results):
+            for index, match in zip(chunk, matches):
+                results[index] = match
+        return results
+    
+    
+    @classmethod
+    def route_sections(cls, sections: List[str] = None, job_description: str = None) -> Tuple[str, ...]:
+        """Validate requested review sections; defaults to every section the inputs allow"""
+        if not sections:
+            return ('analysis', 'skills', 'match') if job_description else ('analysis', 'skills')
+        unknown = [name for name in sections if name not in cls.REVIEW_SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown review sections: {', '.join(unknown)}")
+        if 'match' in sections and not job_description:
+            raise ValueError("The match section needs a job description")
+        return tuple(name for name in cls.REVIEW_SECTIONS if name in sections)
+    
+    @staticmethod
+    def _section_fields(section: str, job_description: str = None):
+        if section == 'analysis':
+            return ANALYSIS_JOB_FIELDS if job_description else ANALYSIS_GENERAL_FIELDS
+        return SKILLS_FIELDS if section == 'skills' else MATCH_FIELDS
+    
+    def _section_cache_key(self, section: str, resume_text: str, job_text: str = None) -> str:
+        # Sections share cache entries with the single-section methods, which use the same schemas
+        method = self.REVIEW_SECTIONS[section]
+        return self._cache_key(method, resume_text, None if section == 'skills' else job_text)
+    
+    def _local_section(self, section: str, resume_text: str, job_description: str = None,
+                       resume_profile: TextProfile = None) -> Dict:
+        resume = self._local_resume(resume_text, resume_profile)
+        if section == 'analysis':
+            return self.local_scorer.analyze(resume, job_description)
+        if section == 'skills':
+            return self.local_scorer.extract_skills(resume)
+        return self.local_scorer.match(resume, job_description)
+    
+    def _review_messages(self, sections: Tuple[str, ...], resume_text: str, job_description: str = None) -> List[Dict]:
+        """Build the chat messages for a combined review of the given sections"""
+        schema = "{\n" + ",\n".join(
+            f'    "{section}": {render_schema(self._section_fields(section, job_description), indent=4)}'
+            for section in sections
+        ) + "\n}"
+        if job_description:
+            prompt = textwrap.dedent("""
+            Review the following resume against the job description.
+            
+            RESUME:
+            {resume_text}
+            
+            JOB DESCRIPTION:
+            {job_description}
+            
+            Please provide the review in JSON format with exactly these top-level sections:
+            {schema}
+            """).strip().format(resume_text=resume_text, job_description=job_description, schema=schema)
+        else:
+            prompt = textwrap.dedent("""
+            Review the following resume, focusing on overall quality, structure, content and skills.
+            
+            RESUME:
+            {resume_text}
+            
+            Please provide the review in JSON format with exactly these top-level sections:
+            {schema}
+            """).strip().format(resume_text=resume_text, schema=schema)
+        
+        return [
+            {
+                "role": "system",
+                "content": "You are an expert HR professional, resume analyst and recruiter. Provide detailed, actionable feedback and accurate skill extraction."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+    
+    async def review_resume(self, resume_text: str, job_description: str = None, sections: List[str] = None,
+                            resume_profile: TextProfile = None) -> Dict:
+        """Analysis, skills and job match in one model call, limited to the requested sections
+        
+        Returns {section: result, ..., 'fallbacks': {section: [fields]}} where
+        fallbacks lists the fields filled in by the local scorer because the
+        model left them out or returned the wrong type.
+        """
+        sections = self.route_sections(sections, job_description)
+        review = {}
+        fallbacks = {}
+        
+        if self._has_api_key():
+            prompt_resume, prompt_job = self._compact('review_resume', resume_text, job_description)
+            cache_keys = {section: self._section_cache_key(section, prompt_resume, prompt_job) for section in sections}
+            for section in sections:
+                cached = await self._cache_get(cache_keys[section])
+                if cached is not None:
+                    review[section] = cached
+            
+            pending = tuple(section for section in sections if section not in review)
+            response = {}
+            if pending:
+                try:
+                    response = await self.client.complete_json(
+                        self.MODEL, self._review_messages(pending, prompt_resume, prompt_job), temperature=0.2
+                    )
+                except LLMError as e:
+                    logger.error(f"Error reviewing resume: {str(e)}")
+                if not isinstance(response, dict):
+                    response = {}
+            
+            for section in pending:
+                valid, missing = validate_section(response.get(section), self._section_fields(section, job_description))
+                if missing:
+                    fallbacks[section] = missing
+                else:
+                    await self._cache_set(cache_keys[section], valid)
+                review[section] = valid
+        else:
+            logger.warning("OpenAI API key not configured properly")
+            for section in sections:
+                review[section] = {}
+                fallbacks[section] = [name for name, _kind, _description in self._section_fields(section, job_description)]
+        
+        for section, missing in fallbacks.items():
+            local = await asyncio.to_thread(self._local_section, section, resume_text, job_description, resume_profile)
+            for name in missing:
+                review[section][name] = local.get(name)
+        if fallbacks:
+            logger.info(f"Review fields filled locally: {fallbacks}")
+        
+        review['fallbacks'] = fallbacks
+        return review
     
     def generate_improvement_suggestions(self, analysis_result: Dict) -> List[str]:
         """Generate specific improvement suggestions based on analysis"""
@@ -283,3 +625,79 @@ class ResumeAnalyzer:
             suggestions.append("Improve ATS compatibility by using standard section headings and including more relevant keywords")
         
         return suggestions
+
+
+class ResumeAnalyzer:
+    """Synchronous façade over AsyncResumeAnalyzer for Flask views and worker threads
+    
+    Calls from every thread run on one background event loop, so they share the
+    pooled HTTP client, rate limits and circuit breaker.
+    """
+    
+    MODEL = AsyncResumeAnalyzer.MODEL
+    PROMPT_VERSIONS = AsyncResumeAnalyzer.PROMPT_VERSIONS
+    REVIEW_SECTIONS = AsyncResumeAnalyzer.REVIEW_SECTIONS
+    
+    def __init__(self, cache=None, local_scorer=None, client=None, resume_token_budget=3000, job_token_budget=1500):
+        self.async_analyzer = AsyncResumeAnalyzer(
+            cache=cache, local_scorer=local_scorer, client=client,
+            resume_token_budget=resume_token_budget, job_token_budget=job_token_budget
+        )
+    
+    @property
+    def cache(self):
+        return self.async_analyzer.cache
+    
+    @property
+    def local_scorer(self) -> LocalScorer:
+        return self.async_analyzer.local_scorer
+    
+    @property
+    def client(self) -> AsyncLLMClient:
+        return self.async_analyzer.client
+    
+    def analyze_resume(self, resume_text: str, job_description: str = None,
+                       resume_profile: TextProfile = None) -> Dict:
+        return background_loop.run(self.async_analyzer.analyze_resume(resume_text, job_description, resume_profile))
+    
+    def analyze_resume_stream(self, resume_text: str, job_description: str = None,
+                              resume_profile: TextProfile = None) -> Iterator[Tuple[str, object]]:
+        return background_loop.iterate(
+            self.async_analyzer.analyze_resume_stream(resume_text, job_description, resume_profile)
+        )
+    
+    def extract_skills(self, resume_text: str, resume_profile: TextProfile = None) -> List[str]:
+        return background_loop.run(self.async_analyzer.extract_skills(resume_text, resume_profile))
+    
+    def calculate_job_match_score(self, resume_text: str, job_description: str,
+                                  job_profile: TextProfile = None, resume_profile: TextProfile = None) -> Dict:
+        return background_loop.run(
+            self.async_analyzer.calculate_job_match_score(resume_text, job_description, job_profile, resume_profile)
+        )
+    
+    def generate_improvement_suggestions(self, analysis_result: Dict) -> List[str]:
+        return self.async_analyzer.generate_improvement_suggestions(analysis_result)
+    
+    def review_resume(self, resume_text: str, job_description: str = None, sections: List[str] = None,
+                      resume_profile: TextProfile = None) -> Dict:
+        return background_loop.run(
+            self.async_analyzer.review_resume(resume_text, job_description, sections, resume_profile)
+        )
+    
+    def match_jobs(self, resume_text: str, job_descriptions: List[str],
+                   job_profiles: List[TextProfile] = None, resume_profile: TextProfile = None,
+                   call_timeout: float = None, max_concurrency: int = 8) -> List[Dict]:
+        return background_loop.run(self.async_analyzer.match_jobs(
+            resume_text, job_descriptions, job_profiles, resume_profile, call_timeout, max_concurrency
+        ))
+    
+    def match_jobs_batch(self, resume_text: str, job_descriptions: List[str],
+                         batch_size: int = 5, token_budget: int = 6000,
+                         job_profiles: List[TextProfile] = None, resume_profile: TextProfile = None,
+                         chunk_timeout: float = None) -> List[Dict]:
+        return background_loop.run(self.async_analyzer.match_jobs_batch(
+            resume_text, job_descriptions, batch_size, token_budget, job_profiles, resume_profile, chunk_timeout
+        ))
+    
+    def stats(self) -> Dict:
+        return self.async_analyzer.stats()
@@ -0,0 +1,106 @@
+"""
+Resume Features - Scoring features extracted once per resume and stored in resume_features
+"""
+import logging
+from datetime import datetime
+from typing import Dict, Iterable
+
+from sqlalchemy import delete, insert, select
+
+from app import db
+from local_scorer import FEATURES_VERSION, TextProfile, build_profile
+from models import Resume, ResumeFeatures
+
+logger = logging.getLogger(__name__)
+
+def profile_features(profile: TextProfile) -> Dict:
+    """The stored form of a resume profile"""
+    return {
+        'version': FEATURES_VERSION,
+        'sections': sorted(profile.sections),
+        'technical_skills': sorted(profile.technical_skills),
+        'soft_skills': sorted(profile.soft_skills),
+        'certifications': sorted(profile.certifications),
+        'years_experience': profile.years_experience,
+        'education_level': profile.education_level,
+        'word_count': profile.word_count,
+        'quantified': profile.quantified,
+        'bullets': profile.bullets,
+        'has_contact': profile.has_contact,
+        'term_counts': dict(profile.term_counts),
+        'computed_date': datetime.utcnow()
+    }
+
+def add_resume_features(resume: Resume) -> ResumeFeatures:
+    """Add features for a newly flushed resume to the current session"""
+    # build_profile's cache means the first analysis of the upload reuses this profile
+    features = ResumeFeatures(resume_id=resume.id, **profile_features(build_profile(resume.content or "")))
+    db.session.add(features)
+    return features
+
+def upsert_resume_features(resume_ids: Iterable[int] = None, connection=None, stale_only: bool = False,
+                           batch_size: int = 100, limit: int = None) -> int:
+    """Compute and store features for resume_ids, or for every resume missing (or, with stale_only, outdated) ones
+
+    limit caps how many resumes one call processes. Returns the number processed.
+    """
+    conn = connection or db.session
+    resume, features = Resume.__table__, ResumeFeatures.__table__
+    query = select(resume.c.id, resume.c.content).order_by(resume.c.id)
+    if resume_ids is not None:
+        resume_ids = list(resume_ids)
+        if not resume_ids:
+            return 0
+        query = query.where(resume.c.id.in_(resume_ids))
+    elif stale_only:
+        query = query.where(~resume.c.id.in_(select(features.c.resume_id).where(features.c.version == FEATURES_VERSION)))
+    else:
+        query = query.where(~resume.c.id.in_(select(features.c.resume_id)))
+    if limit is not None:
+        query = query.limit(limit)
+
+    processed = 0
+    batch = []
+    for row in conn.execute(query):
+        # Profiled directly: build_profile's cache is for resumes being scored, not backfills
+        batch.append(dict(profile_features(TextProfile(row.content or "")), resume_id=row.id))
+        if len(batch) >= batch_size:
+            processed += _write_features(conn, batch)
+            batch = []
+    if batch:
+        processed += _write_features(conn, batch)
+    return processed
+
+def _write_features(conn, batch) -> int:
+    features = ResumeFeatures.__table__
+    conn.execute(delete(features).where(features.c.resume_id.in_([row['resume_id'] for row in batch])))
+    conn.execute(insert(features), batch)
+    return len(batch)
+
+def resume_profile(features: ResumeFeatures) -> TextProfile:
+    """Scorer profile for a resume from its stored features"""
+    return TextProfile.from_features(
+        key=f"resume:{features.resume_id}:v{features.version}",
+        term_counts=features.term_counts,
+        technical_skills=features.technical_skills,
+        soft_skills=features.soft_skills,
+        certifications=features.certifications,
+        years_experience=features.years_experience,
+        education_level=features.education_level,
+        sections=features.sections,
+        word_count=features.word_count,
+        quantified=features.quantified,
+        bullets=features.bullets,
+        has_contact=features.has_contact
+    )
+
+def load_resume_profile(resume: Resume) -> TextProfile:
+    """The resume's stored profile, or one built from its content while features are missing or outdated
+
+    The fallback is not written back here; stale rows are recomputed in the
+    background (see AnalysisTaskQueue.refresh_features).
+    """
+    features = db.session.get(ResumeFeatures, resume.id)
+    if features is not None and features.version == FEATURES_VERSION:
+        return resume_profile(features)
+    return build_profile(resume.content or "")
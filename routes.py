@@ -1,19 +1,58 @@
 import os
+import json
 import uuid
-from flask import render_template, request, redirect, url_for, flash, jsonify, session
+import hashlib
+import hmac
+from flask import render_template, request, redirect, url_for, flash, jsonify, session, abort, Response, stream_with_context
 from werkzeug.utils import secure_filename
+from sqlalchemy.orm import undefer, undefer_group
 from app import app, db
-from models import Resume, Job, Analysis, User
+from models import Resume, Job, AnalysisTask
 from document_parser import DocumentParser
 from resume_analyzer import ResumeAnalyzer
+from llm_client import AsyncLLMClient
 from gamification import GamificationService
+from job_matcher import JobMatcher
+from job_retriever import JobRetriever
+from analysis_cache import AnalysisCache, hash_text
+from task_queue import AnalysisTaskQueue
+from blob_store import create_blob_store
+from batch_scorer import ArchiveLimitError, BatchScorer, iter_resume_files, normalize_job, shared_parse_pool
+from seeding import Seeder
+from job_search import JobSearchError, listing_validators, parse_filters, search_jobs
+from job_features import load_job_profiles
+from resume_features import add_resume_features, load_resume_profile
+from job_ingest import JobIngestError, infer_format, ingest_jobs, iter_job_records
 import logging
 
 logger = logging.getLogger(__name__)
 
 # Initialize services
-analyzer = ResumeAnalyzer()
+analysis_cache = AnalysisCache.from_config(app.config)
+analyzer = ResumeAnalyzer(
+    cache=analysis_cache,
+    client=AsyncLLMClient.from_config(app.config),
+    resume_token_budget=app.config['PROMPT_RESUME_TOKEN_BUDGET'],
+    job_token_budget=app.config['PROMPT_JOB_TOKEN_BUDGET']
+)
 gamification = GamificationService()
+seeder = Seeder(gamification)
+blob_store = create_blob_store(app.config)
+job_matcher = JobMatcher(
+    analyzer,
+    max_workers=app.config['MATCH_MAX_WORKERS'],
+    call_timeout=app.config['MATCH_CALL_TIMEOUT'],
+    batch_size=app.config['MATCH_BATCH_SIZE'],
+    batch_token_budget=app.config['MATCH_BATCH_TOKEN_BUDGET']
+)
+# Shares the local scorer's corpus statistics, which its sync keeps current
+job_retriever = JobRetriever(analyzer.local_scorer.job_index)
+analysis_queue = AnalysisTaskQueue(
+    app, analyzer, gamification,
+    poll_interval=app.config['ANALYSIS_POLL_INTERVAL'],
+    stale_after=app.config['ANALYSIS_TASK_TIMEOUT'],
+    refresh_batch=app.config['FEATURE_REFRESH_BATCH']
+)
 
 def get_current_user():
     """Get or create current user based on session"""
@@ -22,49 +61,19 @@ def get_current_user():
     
     return gamification.get_or_create_user(session['user_session_id'])
 
-# Sample job data for demonstration
-SAMPLE_JOBS = [
-    {
-        "title": "Senior Software Engineer",
-        "company": "Tech Corp",
-        "description": "We are looking for a Senior Software Engineer to join our dynamic team. You will be responsible for developing scalable web applications and leading technical initiatives.",
-        "requirements": "5+ years of experience in Python, JavaScript, React, AWS, Docker, experience with microservices architecture, strong problem-solving skills, team leadership experience.",
-        "location": "San Francisco, CA"
-    },
-    {
-        "title": "Data Scientist",
-        "company": "Analytics Inc",
-        "description": "Join our data science team to build machine learning models and derive insights from large datasets to drive business decisions.",
-        "requirements": "PhD in Computer Science or related field, Python, R, SQL, machine learning frameworks (TensorFlow, PyTorch), statistical analysis, data visualization, 3+ years experience.",
-        "location": "Remote"
-    },
-    {
-        "title": "Product Manager",
-        "company": "Innovation Labs",
-        "description": "Lead product development from conception to launch, working closely with engineering, design, and marketing teams.",
-        "requirements": "MBA preferred, 4+ years product management experience, agile methodologies, user research, product analytics, cross-functional team leadership, market analysis.",
-        "location": "New York, NY"
-    }
-]
+@app.before_request
+def ensure_seeded():
+    """Seed badges and sample jobs once per process; a no-op flag check afterwards"""
+    seeder.ensure_seeded()
 
-def populate_sample_jobs():
-    """Populate database with sample jobs if empty"""
-    if Job.query.count() == 0:
-        for job_data in SAMPLE_JOBS:
-            job = Job(
-                title=job_data["title"],
-                company=job_data["company"],
-                description=job_data["description"],
-                requirements=job_data["requirements"],
-                location=job_data["location"]
-            )
-            db.session.add(job)
-        db.session.commit()
+@app.before_request
+def ensure_analysis_workers():
+    """Start in-process analysis workers with the first request served, so CLI commands never run them"""
+    analysis_queue.ensure_workers(app.config['ANALYSIS_WORKERS'])
 
 @app.route('/')
 def index():
     """Home page with gamification data"""
-    populate_sample_jobs()
     user = get_current_user()
     
     # Update daily streak
@@ -74,9 +83,7 @@ def index():
     user_stats = gamification.get_user_stats(user)
     
     # Get recent achievements
-    recent_badges = []
-    if user.user_badges:
-        recent_badges = sorted(user.user_badges, key=lambda x: x.earned_date, reverse=True)[:3]
+    recent_badges = gamification.get_recent_badges(user, limit=3)
     
     return render_template('index.html', 
                          user_stats=user_stats, 
@@ -106,39 +113,62 @@ def upload_resume():
             return redirect(request.url)
         
         # Generate unique filename
-        filename = str(uuid.uuid4()) + os.path.splitext(file.filename)[1]
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        
-        # Parse document
         file_extension = os.path.splitext(file.filename)[1]
-        content = DocumentParser.parse_document(file_path, file_extension)
+        filename = str(uuid.uuid4()) + file_extension
+        
+        # Byte-identical files reuse the earlier extraction instead of re-parsing
+        file_bytes = file.read()
+        file_sha256 = hashlib.sha256(file_bytes).hexdigest()
+        known = Resume.query.with_entities(Resume.content).filter_by(file_sha256=file_sha256).first()
+        
+        if known is not None:
+            content = known.content
+        else:
+            # Parse document straight from the upload, without a disk round trip
+            content = DocumentParser.parse_document(memoryview(file_bytes), file_extension)
         
         if not content.strip():
             flash('Could not extract text from the document. Please ensure the file is not corrupted.', 'error')
-            os.remove(file_path)
             return redirect(request.url)
         
         # Get current user for gamification
         user = get_current_user()
+        content_sha256 = hash_text(content)
+        
+        # Re-uploading a resume this user already has reuses that row, along with
+        # its analyses (text-identical content also hits the analysis cache)
+        existing = Resume.query.filter_by(user_id=user.id, content_sha256=content_sha256) \
+            .order_by(Resume.id.desc()).first()
+        if existing is not None:
+            session['resume_id'] = existing.id
+            flash('You already uploaded this resume, so we reused it.', 'info')
+            return redirect(url_for('analyze_resume'))
         
-        # Save to database
-        resume = Resume(
-            filename=filename,
-            original_filename=secure_filename(file.filename),
-            content=content,
-            user_id=user.id
-        )
-        db.session.add(resume)
-        db.session.commit()
+        if blob_store is not None:
+            blob_store.put(filename, file_bytes)
+        
+        # Save to database together with the upload's XP and badges in one transaction
+        with gamification.unit_of_work():
+            resume = Resume(
+                filename=filename,
+                original_filename=secure_filename(file.filename),
+                content=content,
+                file_sha256=file_sha256,
+                content_sha256=content_sha256,
+                user_id=user.id
+            )
+            db.session.add(resume)
+            db.session.flush()
+            add_resume_features(resume)
+            gamification.record_resume_upload(user)
+            
+            # Award XP and check achievements
+            level_up_data = gamification.award_xp(user, gamification.XP_RESUME_UPLOAD, "Resume Upload")
+            achievements = gamification.check_achievements(user, {'action': 'resume_upload'})
         
         # Store resume ID in session
         session['resume_id'] = resume.id
         
-        # Award XP and check achievements
-        level_up_data = gamification.award_xp(user, gamification.XP_RESUME_UPLOAD, "Resume Upload")
-        achievements = gamification.check_achievements(user, {'action': 'resume_upload'})
-        
         flash('Resume uploaded successfully!', 'success')
         return redirect(url_for('analyze_resume'))
         
@@ -160,7 +190,7 @@ def analyze_resume():
 
 @app.route('/analyze', methods=['POST'])
 def perform_analysis():
-    """Perform AI analysis of resume"""
+    """Queue AI analysis of resume and redirect to the polling results page"""
     try:
         resume_id = session.get('resume_id')
         if not resume_id:
@@ -170,97 +200,219 @@ def perform_analysis():
         resume = Resume.query.get_or_404(resume_id)
         job_description = request.form.get('job_description', '').strip()
         
-        # Perform AI analysis
-        if job_description:
-            analysis_result = analyzer.analyze_resume(resume.content, job_description)
-        else:
-            analysis_result = analyzer.analyze_resume(resume.content)
-        
-        # Get current user for gamification
+        # Get current user for gamification, which runs as part of the task
         user = get_current_user()
+        if app.config['ANALYSIS_INLINE']:
+            # No worker will pick the task up (e.g. serverless), so run it before redirecting
+            task = analysis_queue.start_task(resume.id, user.id, job_description)
+            analysis_queue.run_task(task.id, analysis_queue.IN_REQUEST_ATTEMPT)
+        else:
+            task = analysis_queue.enqueue(resume.id, user.id, job_description)
         
-        # Award XP based on score improvement and first analysis
-        score = analysis_result.get('overall_score', 0)
-        xp_amount = gamification.XP_FIRST_ANALYSIS
-        if resume.current_score > 0:
-            improvement = score - resume.current_score
-            if improvement > 0:
-                xp_amount += gamification.XP_SCORE_IMPROVEMENT(improvement)
-        
-        # Update resume score
-        resume.current_score = score
-        
-        # Save analysis to database
-        analysis = Analysis(
-            resume_id=resume.id,
-            overall_score=analysis_result.get('overall_score', 0),
-            skills_match_score=analysis_result.get('skills_match_score', analysis_result.get('content_quality_score', 0)),
-            experience_match_score=analysis_result.get('experience_match_score', analysis_result.get('structure_score', 0)),
-            education_match_score=analysis_result.get('education_match_score', analysis_result.get('completeness_score', 0)),
-            recommendations='\n'.join(analysis_result.get('recommendations', [])),
-            missing_skills='\n'.join(analysis_result.get('missing_skills', analysis_result.get('missing_sections', []))),
-            xp_awarded=xp_amount
-        )
-        db.session.add(analysis)
-        db.session.commit()
-        
-        # Award XP and check achievements
-        level_up_data = gamification.award_xp(user, xp_amount, "Resume Analysis")
-        achievements = gamification.check_achievements(user, {'action': 'analysis_complete', 'score': score})
-        
-        return render_template('results.html', resume=resume, analysis=analysis, analysis_data=analysis_result, 
-                             level_up_data=level_up_data, achievements=achievements)
+        return redirect(url_for('analysis_task', task_id=task.id))
         
     except Exception as e:
-        logger.error(f"Error performing analysis: {str(e)}")
+        logger.error(f"Error queuing analysis: {str(e)}")
         flash(f'Error analyzing resume: {str(e)}', 'error')
         return redirect(url_for('analyze_resume'))
 
+@app.route('/analyze/stream', methods=['POST'])
+def stream_analysis():
+    """Run AI analysis in-request, streaming fields to the browser as server-sent events"""
+    resume_id = session.get('resume_id')
+    if not resume_id:
+        return jsonify({'error': 'Please upload a resume first'}), 400
+    
+    resume = Resume.query.options(undefer(Resume.content)).get_or_404(resume_id)
+    job_description = request.form.get('job_description', '').strip()
+    user = get_current_user()
+    resume_profile = load_resume_profile(resume)
+    task = analysis_queue.start_task(resume.id, user.id, job_description)
+    results_url = url_for('analysis_task', task_id=task.id)
+    
+    def sse(event, data):
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    
+    def generate():
+        try:
+            for kind, payload in analyzer.analyze_resume_stream(resume.content, job_description or None, resume_profile):
+                if kind == 'field':
+                    name, value = payload
+                    yield sse('field', {'name': name, 'value': value})
+                else:
+                    # Final Analysis row is persisted only once the stream completes
+                    analysis_queue.complete_task(task.id, analysis_queue.IN_REQUEST_ATTEMPT, resume, user, payload)
+            yield sse('done', {'results_url': results_url})
+        except Exception as e:
+            logger.error(f"Error streaming analysis: {str(e)}")
+            analysis_queue.fail_task(task.id, analysis_queue.IN_REQUEST_ATTEMPT, e)
+            yield sse('failed', {'error': str(e), 'results_url': results_url})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Results-Url': results_url})
+
+def get_session_task(task_id):
+    """Load an analysis task owned by the current session's user"""
+    task = AnalysisTask.query.get_or_404(task_id)
+    user = get_current_user()
+    if task.user_id != user.id:
+        abort(404)
+    return task
+
+@app.route('/analysis/<int:task_id>')
+def analysis_task(task_id):
+    """Results page for a queued analysis; polls until the task finishes"""
+    task = get_session_task(task_id)
+    
+    if task.status == 'failed':
+        flash(f'Error analyzing resume: {task.error}', 'error')
+        return redirect(url_for('analyze_resume'))
+    
+    if task.status != 'completed':
+        return render_template('results.html', resume=task.resume, analysis=None, pending_task=task)
+    
+    result = task.result or {}
+    return render_template('results.html', resume=task.resume, analysis=task.analysis,
+                         analysis_data=result.get('analysis_data'),
+                         level_up_data=result.get('level_up_data'),
+                         achievements=result.get('achievements', []))
+
+@app.route('/api/analysis/<int:task_id>/status')
+def analysis_status(task_id):
+    """JSON status of a queued analysis"""
+    task = get_session_task(task_id)
+    return jsonify({
+        'id': task.id,
+        'status': task.status,
+        'analysis_id': task.analysis_id,
+        'error': task.error,
+        'results_url': url_for('analysis_task', task_id=task.id)
+    })
+
+@app.route('/api/review', methods=['POST'])
+def review_resume():
+    """Analysis, skills and job match for the session's resume in one model call
+    
+    Accepts sections (comma-separated: analysis, skills, match) to request
+    only what the caller needs, and job_description or job_id for matching.
+    """
+    resume_id = session.get('resume_id')
+    if not resume_id:
+        return jsonify({'error': 'Please upload a resume first'}), 400
+    
+    job_description = request.values.get('job_description', '').strip()
+    job_id = request.values.get('job_id', type=int)
+    if job_id and not job_description:
+        job_description = job_matcher.build_job_text(Job.query.get_or_404(job_id))
+    sections = [name.strip() for name in request.values.get('sections', '').split(',') if name.strip()]
+    
+    resume = Resume.query.options(undefer(Resume.content)).get_or_404(resume_id)
+    try:
+        return jsonify(analyzer.review_resume(resume.content, job_description or None, sections,
+                                              load_resume_profile(resume)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+def job_page_size():
+    return max(1, min(request.args.get('limit', app.config['JOBS_PAGE_SIZE'], type=int),
+                      app.config['JOBS_PAGE_SIZE_MAX']))
+
 @app.route('/jobs')
 def job_listings():
-    """Job listings page"""
-    populate_sample_jobs()
-    jobs = Job.query.all()
-    return render_template('jobs.html', jobs=jobs)
+    """Job listings page, newest first, filtered and paginated with ?after=<cursor>"""
+    try:
+        filters = parse_filters(request.args)
+        jobs, next_cursor = search_jobs(filters, request.args.get('after'), job_page_size())
+    except JobSearchError as e:
+        flash(str(e), 'error')
+        filters = {}
+        jobs, next_cursor = search_jobs(filters, limit=job_page_size())
+    return render_template('jobs.html', jobs=jobs, filters=filters, next_cursor=next_cursor,
+                         paginated=bool(request.args.get('after')))
+
+@app.route('/jobs/<int:job_id>')
+def job_detail(job_id):
+    """A single job with its full description and requirements"""
+    job = Job.query.options(undefer_group('job_text')).get_or_404(job_id)
+    return render_template('jobs.html', jobs=[job], job_detail=True)
+
+@app.route('/api/jobs')
+def job_listings_api():
+    """JSON job listings with the /jobs filters; cacheable via ETag/Last-Modified"""
+    etag, last_modified = listing_validators()
+    if request.if_none_match.contains_weak(etag) or (
+            last_modified and request.if_modified_since and not request.if_none_match
+            and last_modified <= request.if_modified_since.replace(tzinfo=None)):
+        response = Response(status=304)
+    else:
+        try:
+            filters = parse_filters(request.args)
+            jobs, next_cursor = search_jobs(filters, request.args.get('after'), job_page_size())
+        except JobSearchError as e:
+            return jsonify({'error': str(e)}), 400
+        response = jsonify({
+            'jobs': [{
+                'id': job.id,
+                'title': job.title,
+                'company': job.company,
+                'location': job.location,
+                'summary': job.summary,
+                'posted_date': job.posted_date.isoformat() if job.posted_date else None,
+                'url': url_for('job_detail', job_id=job.id)
+            } for job in jobs],
+            'next_cursor': next_cursor
+        })
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = app.config['JOBS_CACHE_MAX_AGE']
+    return response
+
+@app.route('/api/jobs/ingest', methods=['POST'])
+def ingest_jobs_api():
+    """Upsert a JSONL or CSV job feed uploaded as "jobs"; needs `Authorization: Bearer <INGEST_TOKEN>`"""
+    token = app.config['INGEST_TOKEN']
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return jsonify({'error': 'Invalid ingest token'}), 401
+    
+    feed = request.files.get('jobs')
+    if feed is None or feed.filename == '':
+        return jsonify({'error': 'Upload a JSONL or CSV job feed as "jobs"'}), 400
+    feed_format = request.args.get('format') or infer_format(feed.filename)
+    try:
+        counts = ingest_jobs(iter_job_records(feed.stream, feed_format),
+                             batch_size=app.config['INGEST_BATCH_SIZE'])
+    except JobIngestError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(counts)
 
 @app.route('/match-jobs')
 def match_jobs():
-    """Match current resume against all jobs"""
+    """Match current resume against the top-K retrieved jobs (?top_k=N)"""
     try:
         resume_id = session.get('resume_id')
         if not resume_id:
             flash('Please upload a resume first', 'error')
             return redirect(url_for('upload_page'))
         
-        resume = Resume.query.get_or_404(resume_id)
-        jobs = Job.query.all()
-        job_matches = []
+        resume = Resume.query.options(undefer(Resume.content)).get_or_404(resume_id)
+        resume_profile = load_resume_profile(resume)
+        top_k = request.args.get('top_k', app.config['MATCH_TOP_K'], type=int)
+        top_k = max(1, min(top_k, app.config['MATCH_TOP_K_MAX']))
         
-        for job in jobs:
-            try:
-                match_result = analyzer.calculate_job_match_score(
-                    resume.content, 
-                    f"{job.title}\n{job.description}\n{job.requirements}"
-                )
-                job_matches.append({
-                    'job': job,
-                    'match_score': match_result.get('match_score', 0),
-                    'recommendation': match_result.get('recommendation', 'Unknown'),
-                    'matching_keywords': match_result.get('matching_keywords', []),
-                    'gap_analysis': match_result.get('gap_analysis', [])
-                })
-            except Exception as e:
-                logger.error(f"Error matching job {job.id}: {str(e)}")
-                job_matches.append({
-                    'job': job,
-                    'match_score': 0,
-                    'recommendation': 'Error',
-                    'matching_keywords': [],
-                    'gap_analysis': ['Unable to analyze match']
-                })
+        # Stage 1: pick candidates locally; new or re-ingested jobs also update the local scorer's corpus
+        job_retriever.sync()
+        candidates = job_retriever.top_k_terms(resume_profile.term_counts, top_k)
+        similarities = {job_id: similarity for job_id, similarity in candidates}
+        jobs = (Job.query.options(undefer_group('job_text')).filter(Job.id.in_(similarities)).all()
+                if similarities else [])
         
-        # Sort by match score
-        job_matches.sort(key=lambda x: x['match_score'], reverse=True)
+        # Stage 2: rerank only the candidates with the analyzer, reusing precomputed features
+        job_matches = job_matcher.match_all(resume.content, jobs, similarities, load_job_profiles(similarities),
+                                            resume_profile)
         
         return render_template('jobs.html', jobs=jobs, job_matches=job_matches, resume=resume)
         
@@ -269,6 +421,62 @@ def match_jobs():
         flash(f'Error matching jobs: {str(e)}', 'error')
         return redirect(url_for('job_listings'))
 
+@app.route('/api/batch-score', methods=['POST'])
+def batch_score_api():
+    """Score a zip of resumes against job descriptions, streaming one JSON line per resume
+
+    Needs `Authorization: Bearer <BATCH_SCORE_TOKEN>`.
+    """
+    token = app.config['BATCH_SCORE_TOKEN']
+    if not token:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+        return jsonify({'error': 'Invalid batch score token'}), 401
+    
+    archive = request.files.get('resumes')
+    if archive is None or archive.filename == '':
+        return jsonify({'error': 'Upload a zip archive of resumes as "resumes"'}), 400
+    
+    payload = request.form.get('jobs')
+    try:
+        job_entries = json.loads(payload) if payload else request.form.getlist('job_description')
+    except ValueError:
+        return jsonify({'error': '"jobs" must be a JSON list of job descriptions'}), 400
+    jobs = [normalize_job(entry) for entry in job_entries if entry]
+    if not jobs:
+        return jsonify({'error': 'Provide at least one job description'}), 400
+    
+    use_local = request.form.get('local', '').lower() in ('1', 'true', 'yes')
+    try:
+        files = iter_resume_files(archive.stream, max_files=app.config['BATCH_SCORE_MAX_FILES'],
+                                  max_file_size=app.config['BATCH_SCORE_MAX_FILE_SIZE'],
+                                  max_total_size=app.config['BATCH_SCORE_MAX_TOTAL_SIZE'])
+    except ArchiveLimitError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # One parse pool per web worker, shared by every request instead of forked per request
+    processes = app.config['BATCH_SCORE_PARSE_PROCESSES']
+    scorer = BatchScorer(analyzer, max_workers=app.config['MATCH_MAX_WORKERS'], parse_processes=processes,
+                         use_local=use_local, parse_pool=shared_parse_pool(processes) if processes > 1 else None)
+    
+    def generate():
+        for resume_records in scorer.score(files, jobs):
+            yield json.dumps({'resume': resume_records[0]['resume'], 'matches': resume_records}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Analysis cache hit/miss counters, LLM client state and prompt tokens saved for this worker"""
+    return jsonify(dict(analysis_cache.stats(), llm=analyzer.client.stats(), prompt_compaction=analyzer.stats()))
+
+@app.route('/api/xp-history')
+def xp_history():
+    """Current user's XP per day (?days=, default 30, max 365)"""
+    days = max(1, min(request.args.get('days', 30, type=int), 365))
+    user = get_current_user()
+    return jsonify({'days': days, 'history': gamification.get_xp_history(user, days)})
+
 @app.route('/clear-session')
 def clear_session():
     """Clear session data"""
@@ -0,0 +1,266 @@
+"""
+Task Queue - Database-backed queue that runs resume analyses outside the request
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, and_, update
+from sqlalchemy.orm import undefer
+
+from app import db
+from job_features import upsert_job_features
+from models import Analysis, AnalysisTask, Resume, User
+from resume_features import load_resume_profile, upsert_resume_features
+
+logger = logging.getLogger(__name__)
+
+class TaskSupersededError(RuntimeError):
+    """The task was re-claimed or finished by another attempt while this one ran"""
+
+def save_analysis_result(resume, user, analysis_result, gamification):
+    """Persist an analysis result and award its XP/badges in one transaction
+
+    Returns (analysis, level_up_data, achievements).
+    """
+    with gamification.unit_of_work():
+        return _record_analysis(resume, user, analysis_result, gamification)
+
+def _record_analysis(resume, user, analysis_result, gamification):
+    # Award XP based on score improvement and first analysis
+    score = analysis_result.get('overall_score', 0)
+    xp_amount = gamification.XP_FIRST_ANALYSIS
+    if resume.current_score > 0:
+        improvement = score - resume.current_score
+        if improvement > 0:
+            xp_amount += gamification.XP_SCORE_IMPROVEMENT(improvement)
+
+    # Update resume score
+    resume.current_score = score
+
+    # Save analysis to database
+    analysis = Analysis(
+        resume_id=resume.id,
+        overall_score=analysis_result.get('overall_score', 0),
+        skills_match_score=analysis_result.get('skills_match_score', analysis_result.get('content_quality_score', 0)),
+        experience_match_score=analysis_result.get('experience_match_score', analysis_result.get('structure_score', 0)),
+        education_match_score=analysis_result.get('education_match_score', analysis_result.get('completeness_score', 0)),
+        recommendations='\n'.join(analysis_result.get('recommendations', [])),
+        missing_skills='\n'.join(analysis_result.get('missing_skills', analysis_result.get('missing_sections', []))),
+        xp_awarded=xp_amount
+    )
+    db.session.add(analysis)
+    db.session.flush()
+    if resume.user_id:
+        gamification.record_analysis(resume.user_id, score, analysis.analysis_date)
+
+    level_up_data = None
+    achievements = []
+    if user:
+        # Award XP and check achievements
+        level_up_data = gamification.award_xp(user, xp_amount, "Resume Analysis")
+        achievements = gamification.check_achievements(user, {'action': 'analysis_complete', 'score': score})
+
+    return analysis, level_up_data, achievements
+
+class AnalysisTaskQueue:
+    """Queue of AnalysisTask rows processed by worker threads or `flask analysis-worker` processes
+
+    Each claim bumps the task's attempts; an attempt only completes or fails
+    the task while it still owns it (status 'running' with its own attempts
+    value), so a slow attempt that was re-claimed cannot save or award twice.
+    """
+
+    # Tasks created by start_task are already claimed, as this attempt
+    IN_REQUEST_ATTEMPT = 1
+
+    def __init__(self, app, analyzer, gamification, poll_interval=2.0, stale_after=900, refresh_batch=50):
+        self.app = app
+        self.analyzer = analyzer
+        self.gamification = gamification
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.refresh_batch = refresh_batch
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def enqueue(self, resume_id, user_id=None, job_description=None):
+        """Create a pending task and wake a worker"""
+        task = AnalysisTask(
+            resume_id=resume_id,
+            user_id=user_id,
+            job_description=job_description or None
+        )
+        db.session.add(task)
+        db.session.commit()
+        self._wakeup.set()
+        return task
+
+    def claim_next(self):
+        """Atomically move the oldest runnable task to 'running' and return (task_id, attempt)
+
+        Tasks stuck in 'running' longer than stale_after seconds (e.g. the worker
+        died) are picked up again. The conditional UPDATE makes the claim safe
+        across threads and processes.
+        """
+        now = datetime.utcnow()
+        runnable = or_(
+            AnalysisTask.status == 'pending',
+            and_(AnalysisTask.status == 'running',
+                 AnalysisTask.started_date < now - timedelta(seconds=self.stale_after))
+        )
+        while True:
+            candidate = db.session.query(AnalysisTask.id, AnalysisTask.status, AnalysisTask.attempts) \
+                .filter(runnable).order_by(AnalysisTask.id).first()
+            if candidate is None:
+                return None
+            attempt = (candidate.attempts or 0) + 1
+            claimed = db.session.execute(
+                update(AnalysisTask)
+                .where(AnalysisTask.id == candidate.id, AnalysisTask.status == candidate.status,
+                       AnalysisTask.attempts == candidate.attempts, runnable)
+                .values(status='running', started_date=now, attempts=attempt)
+            )
+            db.session.commit()
+            if claimed.rowcount == 1:
+                return candidate.id, attempt
+
+    def run_task(self, task_id, attempt):
+        """Run one claimed task to completion, recording the outcome on the row"""
+        task = db.session.get(AnalysisTask, task_id)
+        try:
+            resume = db.session.get(Resume, task.resume_id, options=[undefer(Resume.content)])
+            user = db.session.get(User, task.user_id) if task.user_id else None
+            resume_profile = load_resume_profile(resume)
+
+            if task.job_description:
+                analysis_result = self.analyzer.analyze_resume(resume.content, task.job_description, resume_profile)
+            else:
+                analysis_result = self.analyzer.analyze_resume(resume.content, resume_profile=resume_profile)
+
+            self.complete_task(task_id, attempt, resume, user, analysis_result)
+        except Exception as e:
+            logger.error(f"Error performing analysis task {task_id}: {str(e)}")
+            self.fail_task(task_id, attempt, e)
+
+    def start_task(self, resume_id, user_id=None, job_description=None):
+        """Create a task already claimed by the caller as IN_REQUEST_ATTEMPT (used when running in-request)
+
+        If the caller never finishes it, the task goes stale and a worker reruns
+        it; the caller can then no longer complete it.
+        """
+        task = AnalysisTask(
+            resume_id=resume_id,
+            user_id=user_id,
+            job_description=job_description or None,
+            status='running',
+            started_date=datetime.utcnow(),
+            attempts=self.IN_REQUEST_ATTEMPT
+        )
+        db.session.add(task)
+        db.session.commit()
+        return task
+
+    def _finish(self, task_id, attempt, **values):
+        # Marks the task finished only while this attempt still owns it; on
+        # PostgreSQL the row stays locked until commit, so a competing attempt
+        # waits and then matches nothing
+        finished = db.session.execute(
+            update(AnalysisTask)
+            .where(AnalysisTask.id == task_id, AnalysisTask.status == 'running', AnalysisTask.attempts == attempt)
+            .values(completed_date=datetime.utcnow(), **values)
+        )
+        if finished.rowcount != 1:
+            raise TaskSupersededError(f"Analysis task {task_id} attempt {attempt} no longer owns the task")
+
+    def complete_task(self, task_id, attempt, resume, user, analysis_result):
+        """Persist the analysis, award gamification rewards and mark the task completed
+
+        Returns the task, or None (with nothing saved or awarded) if another
+        attempt has taken the task over.
+        """
+        try:
+            with self.gamification.unit_of_work():
+                self._finish(task_id, attempt, status='completed')
+                analysis, level_up_data, achievements = save_analysis_result(
+                    resume, user, analysis_result, self.gamification
+                )
+                task = db.session.get(AnalysisTask, task_id)
+                task.analysis_id = analysis.id
+                task.result = {
+                    'analysis_data': analysis_result,
+                    'level_up_data': level_up_data,
+                    'achievements': achievements
+                }
+        except TaskSupersededError as e:
+            logger.warning(f"Discarding analysis result: {str(e)}")
+            return None
+        return task
+
+    def fail_task(self, task_id, attempt, error):
+        db.session.rollback()
+        try:
+            self._finish(task_id, attempt, status='failed', error=str(error))
+            db.session.commit()
+        except TaskSupersededError as e:
+            db.session.rollback()
+            logger.warning(f"Not recording failure: {str(e)}")
+
+    def refresh_features(self):
+        """Recompute up to refresh_batch missing or outdated resume and job features
+
+        Runs when a worker finds no task, so features catch up in the
+        background after FEATURES_VERSION changes. Returns how many were
+        recomputed (0 while another thread of this process is refreshing).
+        """
+        if not self.refresh_batch or not self._refresh_lock.acquire(blocking=False):
+            return 0
+        try:
+            refreshed = upsert_resume_features(stale_only=True, limit=self.refresh_batch)
+            refreshed += upsert_job_features(stale_only=True, limit=self.refresh_batch)
+            db.session.commit()
+        finally:
+            self._refresh_lock.release()
+        if refreshed:
+            logger.info(f"Recomputed features for {refreshed} resumes and jobs")
+        return refreshed
+
+    def work(self, stop_event=None):
+        """Process tasks until stop_event is set, refreshing features or sleeping between empty polls"""
+        stop_event = stop_event or self._stop
+        while not stop_event.is_set():
+            with self.app.app_context():
+                try:
+                    claimed = self.claim_next()
+                    if claimed is not None:
+                        self.run_task(*claimed)
+                        continue
+                    if self.refresh_features():
+                        continue
+                except Exception as e:
+                    logger.error(f"Analysis worker error: {str(e)}")
+                    db.session.rollback()
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start_workers(self, count):
+        """Start in-process daemon worker threads"""
+        for index in range(count):
+            thread = threading.Thread(target=self.work, name=f"analysis-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def ensure_workers(self, count):
+        """Start count worker threads unless this process already runs them; cheap after the first call"""
+        if self._threads or count <= 0:
+            return
+        with self._start_lock:
+            if not self._threads:
+                self.start_workers(count)
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
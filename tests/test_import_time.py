@@ -0,0 +1,58 @@
+"""
+Cold-start import cost of the Vercel entry point (api/index.py), measured with
+`python -X importtime` in fresh interpreters
+"""
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily by the app; any of these at startup is a regression
+LAZY_MODULES = ("openai", "httpx", "PyPDF2", "docx")
+
+# The framework the app cannot start without, imported on its own as the yardstick
+FRAMEWORK_IMPORT = "import flask, flask_sqlalchemy, sqlalchemy.orm, werkzeug.middleware.proxy_fix"
+ENTRY_POINT_IMPORT = f"import sys; sys.path[:0] = [{ROOT!r}, {os.path.join(ROOT, 'api')!r}]; import index"
+
+# The entry point may cost at most this multiple of the framework import. It
+# was about 2.8x before heavy imports were deferred and is about 1.3x now;
+# a ratio holds across machines where an absolute budget does not.
+MAX_FRAMEWORK_RATIO = 2.0
+RUNS = 5
+
+LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+def import_once(code):
+    """Run code in a fresh interpreter; returns (total ms, top-level modules imported)"""
+    env = dict(os.environ, SESSION_SECRET="import-time", ANALYSIS_WORKERS="0", AUTO_MIGRATE="False",
+               DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='import-time-'), 'import.db')}")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            env=env, capture_output=True, text=True, check=True)
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            packages.add(match.group(4).split(".")[0])
+            if len(match.group(3)) == 1:
+                total_us += int(match.group(2))
+    return total_us / 1000, packages
+
+def fastest(code):
+    # The minimum over several runs filters out scheduling noise
+    return min(import_once(code)[0] for _ in range(RUNS))
+
+def test_heavy_dependencies_load_on_first_use():
+    _total, packages = import_once(ENTRY_POINT_IMPORT)
+    assert not packages & set(LAZY_MODULES)
+
+def test_entry_point_import_within_budget():
+    framework_ms = fastest(FRAMEWORK_IMPORT)
+    entry_point_ms = fastest(ENTRY_POINT_IMPORT)
+    assert entry_point_ms <= framework_ms * MAX_FRAMEWORK_RATIO, (
+        f"importing api/index.py took {entry_point_ms:.0f} ms, over {MAX_FRAMEWORK_RATIO}x "
+        f"the {framework_ms:.0f} ms framework import"
+    )
@@ -0,0 +1,82 @@
+"""
+SQL statements per dashboard request, counted with a before_cursor_execute listener
+"""
+import io
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+# The app configures itself from the environment at import time
+_db_dir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_db_dir, 'query_counts.db')}"
+os.environ["ANALYSIS_WORKERS"] = "0"
+os.environ["ANALYSIS_CACHE_PATH"] = ""
+os.environ["OPENAI_API_KEY"] = ""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event  # noqa: E402
+
+from main import app  # noqa: E402
+from app import db  # noqa: E402
+from models import User  # noqa: E402
+
+@contextmanager
+def recorded_statements():
+    """Collect the SQL of every statement executed inside the block"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def docx_resume(text):
+    from docx import Document
+    document = Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+@pytest.fixture
+def client():
+    app.config['ANALYSIS_INLINE'] = True
+    with app.test_client() as client:
+        # First visit creates the user and seeds the badges and sample jobs
+        assert client.get('/').status_code == 200
+        yield client
+
+def test_repeat_dashboard_visit(client):
+    with recorded_statements() as statements:
+        assert client.get('/').status_code == 200
+    # The user row (with its counters) and the three most recent badges
+    assert len(statements) == 2
+
+def test_dashboard_statements_do_not_grow_with_resumes(client):
+    for index in range(3):
+        resume = docx_resume(f"Jane Doe\njane{index}@example.com\nExperience\n"
+                             f"Python developer for {index + 2} years\nEducation\nBSc Computer Science")
+        response = client.post('/upload', data={'resume': (io.BytesIO(resume), f'cv{index}.docx')},
+                               content_type='multipart/form-data')
+        assert response.status_code == 302
+        assert client.post('/analyze', data={'job_description': ''}).status_code == 302
+
+    with recorded_statements() as statements:
+        response = client.get('/')
+    assert response.status_code == 200
+    assert len(statements) == 2
+    with app.app_context():
+        user = User.query.order_by(User.id.desc()).first()
+        assert (user.resume_count, user.analysis_count) == (3, 3)
+    # Counters come from the user row, never from loading resume text
+    assert not any('resume.content' in statement for statement in statements)
@@ -0,0 +1,178 @@
+"""
+Text Compaction - Shrinks extracted document text before it is embedded in an LLM prompt
+"""
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Tuple
+
+from document_parser import PAGE_BREAK
+from local_scorer import section_for_heading
+
+CHARS_PER_TOKEN = 4
+TRUNCATION_MARKER = "[...]"
+
+# Lines this short that repeat at the same position on most pages are headers/footers
+BOILERPLATE_MAX_CHARS = 80
+# Lines at the top and at the bottom of each page that may be a header/footer
+BOILERPLATE_EDGE_LINES = 3
+# Shorter lines (dates, "Python", ...) may legitimately repeat and are never deduped
+DEDUPE_MIN_CHARS = 25
+
+PAGE_NUMBER_RE = re.compile(r'^(page\s*)?\d{1,3}(\s*(of|/)\s*\d{1,3})?$', re.IGNORECASE)
+HYPHEN_BREAK_RE = re.compile(r'(\w)-\n(\w)')
+SPACE_RE = re.compile(r'[ \t\f\v\u00a0\u2000-\u200b\u3000]+')
+CONTROL_RE = re.compile(r'[\x00-\x08\x0b-\x1f\x7f]')
+BULLET_ONLY_RE = re.compile(r'^[•●▪◦‣⁃\-\*·o]+$')
+
+def estimate_tokens(text: str) -> int:
+    """Local token estimate (about 4 characters per token for English text)"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+@dataclass(frozen=True)
+class CompactedText:
+    text: str
+    original_tokens: int
+    tokens: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.original_tokens - self.tokens
+
+def normalize_lines(text: str) -> List[str]:
+    """Normalize unicode and whitespace, rejoin hyphenated line breaks, and strip each line"""
+    text = unicodedata.normalize('NFKC', text).replace('\r\n', '\n').replace('\r', '\n')
+    text = HYPHEN_BREAK_RE.sub(r'\1\2', CONTROL_RE.sub(' ', text))
+    return [SPACE_RE.sub(' ', line).strip() for line in text.split('\n')]
+
+def _edge_keys(lines: List[str]) -> List[Tuple[int, str]]:
+    """(position, line) of a page's first and last few non-empty lines; bottom positions are negative"""
+    body = [line.lower() for line in lines if line]
+    keys = {(index, line) for index, line in enumerate(body[:BOILERPLATE_EDGE_LINES])}
+    keys.update((index - len(body), body[index]) for index in range(max(0, len(body) - BOILERPLATE_EDGE_LINES), len(body)))
+    return [(position, line) for position, line in keys if len(line) <= BOILERPLATE_MAX_CHARS]
+
+def strip_boilerplate(pages: List[List[str]]) -> List[str]:
+    """Drop page numbers and bullet-only lines, and repeats of per-page headers/footers
+
+    A header/footer is a line found at the same position from the top or
+    bottom of more than half the pages (at least two). Single-page text,
+    such as DOCX extractions, has none. The first occurrence is kept, since
+    it usually carries the candidate's name.
+    """
+    pages = [[line for line in page if not (line and (PAGE_NUMBER_RE.match(line) or BULLET_ONLY_RE.match(line)))]
+             for page in pages]
+    counts = Counter(key for page in pages for key in set(_edge_keys(page)))
+    boilerplate = {key for key, count in counts.items()
+                   if count >= 2 and 2 * count > len(pages) and section_for_heading(key[1]) is None}
+
+    emitted = set()
+    result = []
+    for page in pages:
+        repeated = {key for key in _edge_keys(page) if key in boilerplate}
+        body_count = sum(1 for line in page if line)
+        index = 0
+        for line in page:
+            if not line:
+                result.append(line)
+                continue
+            key = line.lower()
+            position, index = index, index + 1
+            if (position, key) in repeated or (position - body_count, key) in repeated:
+                if key in emitted:
+                    continue
+                emitted.add(key)
+            result.append(line)
+    return result
+
+def dedupe_lines(lines: List[str]) -> List[str]:
+    """Keep the first occurrence of each long line and collapse runs of blank lines"""
+    seen = set()
+    result = []
+    for line in lines:
+        if not line:
+            if result and result[-1]:
+                result.append(line)
+            continue
+        if len(line) >= DEDUPE_MIN_CHARS:
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+        result.append(line)
+    while result and not result[-1]:
+        result.pop()
+    return result
+
+def split_sections(lines: List[str]) -> List[Tuple[str, List[str]]]:
+    """Split lines into (section name, lines) blocks; text before the first heading is 'preamble'"""
+    sections = [('preamble', [])]
+    for line in lines:
+        heading = section_for_heading(line)
+        if heading:
+            sections.append((heading, [line]))
+        else:
+            sections[-1][1].append(line)
+    return [(name, block) for name, block in sections if any(block)]
+
+def _truncate_block(block: List[str], token_cap: int) -> List[str]:
+    """Keep the leading lines of a block within token_cap, marking the cut
+
+    The line that overflows is cut to fill what is left of the cap, wherever it
+    falls in the block, so a heading followed by one long paragraph keeps the
+    start of the paragraph.
+    """
+    kept = []
+    used = 0
+    for line in block:
+        cost = estimate_tokens(line) + 1
+        if used + cost > token_cap:
+            # Both the cut line and the marker pay the one-token line cost
+            room = (token_cap - used - estimate_tokens(TRUNCATION_MARKER) - 2) * CHARS_PER_TOKEN
+            if room > 20:
+                kept.append(line[:room].rsplit(' ', 1)[0])
+            kept.append(TRUNCATION_MARKER)
+            return kept
+        kept.append(line)
+        used += cost
+    return kept
+
+def fit_to_budget(sections: List[Tuple[str, List[str]]], token_budget: int) -> List[str]:
+    """Trim the largest sections first so the whole text fits within token_budget
+
+    Finds the per-section cap at which the sections total the budget (small
+    sections stay whole) and keeps the head of each section over the cap.
+    """
+    sizes = [sum(estimate_tokens(line) + 1 for line in block) for _name, block in sections]
+    if sum(sizes) <= token_budget:
+        return [line for _name, block in sections for line in block]
+
+    cap = token_budget
+    remaining_budget = token_budget
+    remaining = sorted(sizes)
+    while remaining:
+        cap = remaining_budget // len(remaining)
+        if remaining[0] > cap:
+            break
+        remaining_budget -= remaining.pop(0)
+
+    lines = []
+    for (_name, block), size in zip(sections, sizes):
+        lines.extend(block if size <= cap else _truncate_block(block, cap))
+    return lines
+
+@lru_cache(maxsize=512)
+def compact_text(text: str, token_budget: int = 0) -> CompactedText:
+    """Normalize, de-boilerplate and dedupe text, then trim it to token_budget (0 = no limit)
+
+    Cached because the same resume is compacted once per job it is matched against.
+    """
+    original_tokens = estimate_tokens(text or "")
+    pages = [normalize_lines(page) for page in (text or "").split(PAGE_BREAK)]
+    lines = dedupe_lines(strip_boilerplate(pages))
+    if token_budget:
+        lines = fit_to_budget(split_sections(lines), token_budget)
+    compacted = "\n".join(lines)
+    return CompactedText(compacted, original_tokens, estimate_tokens(compacted))